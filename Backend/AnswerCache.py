@@ -0,0 +1,183 @@
+import os
+import json
+import atexit
+import hashlib
+import threading
+import logging
+from time import time
+from collections import OrderedDict, Counter
+from Backend.DecisionCache import NormalizeQuery
+from Backend.Metrics import IncrementCounter, RecordLatency
+
+ANSWER_CACHE_PATH = os.path.join("Data", "AnswerCache.json")
+MAX_ENTRIES = 500
+MAX_BYTES = 2 * 1024 * 1024  # Total size of cached answers
+TTL = 7 * 24 * 60 * 60  # Seconds; general knowledge changes slowly, but it does change
+SAVE_EVERY = 5  # Flush to disk after this many new answers (and always at exit)
+NEAR_DUPLICATE_THRESHOLD = 0.85  # Dice similarity of character trigrams for "same question, other words"
+
+# Words that make an answer depend on the moment or on earlier turns, so it must not be reused
+TIME_WORDS = set("""
+today tonight tomorrow yesterday now current currently latest recent recently news weather price prices
+score scores time date day week month year live trending this next last ago upcoming
+""".split())
+CONTEXT_WORDS = set("it its it's that this these those they them their he him his she her there".split())
+# Ignored when comparing near-duplicate queries; everything else (numbers included) must match exactly
+FILLER_WORDS = set("a an the is are was were be of to in on for and or do does did can could you me please tell about what's".split())
+
+def ContextHash(*parts: str) -> str:
+    """Short hash of everything besides the query that shapes an answer (model, prompts, injected context)."""
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()[:16]
+
+def Cacheable(query: str) -> bool:
+    """Whether an answer to this query can be reused later: nothing time- or conversation-dependent."""
+    words = set(NormalizeQuery(query).split())
+    return bool(words) and not words & TIME_WORDS and not words & CONTEXT_WORDS
+
+def ContentWords(query: str) -> frozenset[str]:
+    return frozenset(word for word in query.split() if word not in FILLER_WORDS)
+
+def Trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class AnswerCache:
+    """Answers to general questions, keyed by normalised query plus context hash.
+
+    Bounded by entry count and total answer size (least recently used go
+    first) and by a TTL, persisted as JSON. With fuzzy=True a miss falls
+    back to the most similar cached query under the same context, if its
+    trigram similarity clears NEAR_DUPLICATE_THRESHOLD and it has exactly
+    the same content words and numbers ("what is the python language" may
+    reuse "what is python language", "2 plus 3" never reuses "2 plus 2").
+    """
+
+    def __init__(self, path: str = ANSWER_CACHE_PATH, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES,
+                 ttl: float = TTL, fuzzy: bool = False):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.fuzzy = fuzzy
+        self.entries = OrderedDict()  # key -> {"answer", "expires", "latency"}
+        self.grams = {}  # trigram -> set of keys
+        self.size = 0
+        self.lock = threading.Lock()
+        self.unsaved = 0
+        self.load()
+
+    @staticmethod
+    def key(query: str, context: str) -> str:
+        return f"{context}|{NormalizeQuery(query)}"
+
+    def load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                stored = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        now = time()
+        with self.lock:
+            for key, entry in stored:
+                if entry["expires"] > now:
+                    self._insert(key, entry)
+
+    def save(self) -> None:
+        with self.lock:
+            snapshot = list(self.entries.items())
+            self.unsaved = 0
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path + ".tmp", "w", encoding="utf-8") as file:
+                json.dump(snapshot, file, ensure_ascii=False)
+            os.replace(self.path + ".tmp", self.path)
+        except OSError as e:
+            logging.error(f"Failed to save answer cache: {e}")
+
+    def _insert(self, key: str, entry: dict) -> None:
+        if key in self.entries:
+            self._remove(key)
+        self.entries[key] = entry
+        self.size += len(entry["answer"].encode("utf-8"))
+        for gram in Trigrams(key.split("|", 1)[1]):
+            self.grams.setdefault(gram, set()).add(key)
+        while self.entries and (len(self.entries) > self.max_entries or self.size > self.max_bytes):
+            self._remove(next(iter(self.entries)))
+
+    def _remove(self, key: str) -> None:
+        entry = self.entries.pop(key)
+        self.size -= len(entry["answer"].encode("utf-8"))
+        for gram in Trigrams(key.split("|", 1)[1]):
+            keys = self.grams.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.grams[gram]
+
+    def _nearest(self, key: str) -> str | None:
+        context, query = key.split("|", 1)
+        grams = Trigrams(query)
+        words = ContentWords(query)
+        overlaps = Counter(candidate for gram in grams for candidate in self.grams.get(gram, ()) if candidate.startswith(context + "|"))
+        best, best_score = None, NEAR_DUPLICATE_THRESHOLD
+        for candidate, common in overlaps.items():
+            if ContentWords(candidate.split("|", 1)[1]) != words:
+                continue
+            score = 2 * common / (len(grams) + len(Trigrams(candidate.split("|", 1)[1])))
+            if score >= best_score:
+                best, best_score = candidate, score
+        return best
+
+    def get(self, query: str, context: str) -> str | None:
+        key = self.key(query, context)
+        near = False
+        with self.lock:
+            if key not in self.entries and self.fuzzy:
+                nearest = self._nearest(key)
+                key, near = (nearest, True) if nearest else (key, False)
+            entry = self.entries.get(key)
+            if entry and entry["expires"] <= time():
+                self._remove(key)
+                entry = None
+            if entry:
+                self.entries.move_to_end(key)
+        if entry is None:
+            IncrementCounter("answers.cache_misses")
+            return None
+        IncrementCounter("answers.cache_near_hits" if near else "answers.cache_hits")
+        RecordLatency("answers.latency_saved", entry["latency"])
+        return entry["answer"]
+
+    def put(self, query: str, context: str, answer: str, latency: float) -> None:
+        """Store an answer that took `latency` seconds to produce; callers check Cacheable() first."""
+        if not answer:
+            return
+        with self.lock:
+            self._insert(self.key(query, context), {"answer": answer, "expires": time() + self.ttl, "latency": latency})
+            self.unsaved += 1
+            should_save = self.unsaved >= SAVE_EVERY
+        if should_save:
+            self.save()
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"entries": len(self.entries), "bytes": self.size}
+
+answer_cache = AnswerCache()
+atexit.register(answer_cache.save)
+
+if __name__ == "__main__":
+    # Admission and matching on a few questions: python -m Backend.AnswerCache
+    from time import perf_counter
+    from Backend.Metrics import GetMetrics
+    demo = AnswerCache(path=os.devnull, fuzzy=True)
+    context = ContextHash("llama3-70b-8192", "system prompt")
+    demo.put("What is python programming language?", context, "Python is a general-purpose programming language.", 2.4)
+    demo.put("What is 2 plus 2?", context, "4", 1.1)
+    for query in ["what is python programming language", "What is the Python programming language?",
+                  "what is java programming language?", "what is 2 plus 3?", "what is 12 plus 2?",
+                  "what is the weather today?", "who wrote it?"]:
+        start = perf_counter()
+        answer = demo.get(query, context) if Cacheable(query) else None
+        print(f"{(perf_counter() - start) * 1e6:7.1f} us  cacheable={Cacheable(query)!s:5}  {query!r} -> {answer!r}")
+    print(GetMetrics()["counters"], GetMetrics()["latencies"].get("answers.latency_saved"))
@@ -0,0 +1,271 @@
+import os
+import re
+import json
+import shlex
+import signal
+import threading
+import subprocess
+import logging
+from collections import Counter
+from dataclasses import dataclass
+from time import monotonic
+from Backend.Metrics import IncrementCounter, RecordLatency
+
+APP_LINKS_PATH = os.path.join("Data", "AppLinks.json")
+MIN_SCORE = 0.6  # Dice similarity of trigram sets below which a fuzzy match is rejected
+REFRESH_INTERVAL = 30.0  # Seconds between directory checks triggered by lookups
+FIELD_CODES = re.compile(r"\s%[a-zA-Z]")  # %f, %U, ... placeholders in desktop Exec lines
+
+@dataclass
+class AppEntry:
+    name: str  # Normalised lookup name
+    display: str  # Name as shown to the user
+    command: list[str]
+    source: str  # "desktop" or "path"
+    executable: str  # Basename of the program, used to find its processes
+
+def NormalizeName(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", name.lower()).strip()
+
+def Trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def ApplicationDirectories() -> list[str]:
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    data_dirs = (os.environ.get("XDG_DATA_DIRS") or "/usr/local/share:/usr/share").split(":")
+    return [os.path.join(directory, "applications") for directory in [data_home, *data_dirs, "/var/lib/flatpak/exports/share"]]
+
+def ParseDesktopFile(path: str) -> AppEntry | None:
+    values, section = {}, None
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as file:
+            for line in file:
+                line = line.strip()
+                if line.startswith("["):
+                    section = line
+                elif section == "[Desktop Entry]" and "=" in line:
+                    key, value = line.split("=", 1)
+                    values.setdefault(key.strip(), value.strip())
+    except OSError:
+        return None
+    if values.get("Type", "Application") != "Application" or values.get("NoDisplay") == "true" or "Exec" not in values:
+        return None
+    try:
+        command = shlex.split(FIELD_CODES.sub("", values["Exec"]))
+    except ValueError:
+        return None
+    if not command or "Name" not in values:
+        return None
+    program = command[1] if command[0] == "env" and len(command) > 1 else command[0]
+    return AppEntry(NormalizeName(values["Name"]), values["Name"], command, "desktop", os.path.basename(program))
+
+class AppIndex:
+    """Installed applications by name, with trigram fuzzy matching.
+
+    Built from .desktop entries and executables on PATH, normally in the
+    background at startup. Only .desktop entries are matched fuzzily; PATH
+    holds hundreds of system tools ("chroot", "install") that look like app
+    names, so an executable must be named exactly. Each scanned directory
+    remembers its mtime, so refresh() only rescans directories that changed;
+    lookups call it at most every REFRESH_INTERVAL seconds, when they miss.
+    """
+
+    def __init__(self):
+        self.entries = {}  # name -> AppEntry; desktop entries win over bare executables
+        self.by_directory = {}  # directory -> (mtime, [AppEntry])
+        self.grams = {}  # trigram -> set of names
+        self.sizes = {}  # name -> number of trigrams
+        self.matches = {}  # query -> name; fuzzy results, valid until the next rebuild
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.started = False  # Whether a build has begun; resolve() only waits for one that has
+        self.checked = 0.0
+
+    def _scan(self, directory: str) -> list[AppEntry]:
+        found = []
+        try:
+            with os.scandir(directory) as items:
+                for item in items:
+                    if item.name.endswith(".desktop"):
+                        entry = ParseDesktopFile(item.path)
+                        if entry:
+                            found.append(entry)
+                    elif item.is_file() and os.access(item.path, os.X_OK):
+                        found.append(AppEntry(NormalizeName(item.name), item.name, [item.path], "path", item.name))
+        except OSError:
+            pass
+        return found
+
+    def _add(self, entry: AppEntry) -> bool:
+        current = self.entries.get(entry.name)
+        if current is not None and (current.source == "desktop" or entry.source == "path"):
+            return False  # Earlier PATH directories and desktop entries take precedence
+        self.entries[entry.name] = entry
+        if entry.source == "desktop":
+            grams = Trigrams(entry.name)
+            self.sizes[entry.name] = len(grams)
+            for gram in grams:
+                self.grams.setdefault(gram, set()).add(entry.name)
+        return True
+
+    def _rebuild(self) -> None:
+        self.entries.clear()
+        self.grams.clear()
+        self.sizes.clear()
+        self.matches.clear()
+        for directory in ApplicationDirectories() + os.environ.get("PATH", "").split(os.pathsep):
+            for entry in self.by_directory.get(directory, (0, []))[1]:
+                self._add(entry)
+
+    def refresh(self) -> int:
+        """Rescan directories whose mtime changed; returns how many were rescanned."""
+        self.started = True
+        start = monotonic()
+        directories = ApplicationDirectories() + [d for d in os.environ.get("PATH", "").split(os.pathsep) if d]
+        changed = {}
+        for directory in directories:
+            try:
+                mtime = os.stat(directory).st_mtime
+            except OSError:
+                continue
+            if self.by_directory.get(directory, (None,))[0] != mtime:
+                changed[directory] = (mtime, self._scan(directory))
+        with self.lock:
+            if changed:
+                self.by_directory.update(changed)
+                self._rebuild()
+            self.checked = monotonic()
+        self.ready.set()
+        RecordLatency("apps.refresh", monotonic() - start)
+        return len(changed)
+
+    def start(self) -> None:
+        """Build the index on a background thread."""
+        self.started = True
+        threading.Thread(target=self.refresh, name="AppIndex", daemon=True).start()
+
+    def _match(self, name: str, fuzzy: bool = True) -> AppEntry | None:
+        with self.lock:
+            entry = self.entries.get(name)
+            if entry is not None or not fuzzy:
+                return entry
+            entry = self.entries.get(self.matches.get(name))
+            if entry is not None:
+                return entry
+            grams = Trigrams(name)
+            overlaps = Counter(candidate for gram in grams for candidate in self.grams.get(gram, ()))
+            best, best_score = None, MIN_SCORE
+            for candidate, common in overlaps.items():
+                score = 2 * common / (len(grams) + self.sizes[candidate])
+                if candidate.startswith(name):
+                    score += 0.1  # "visual studio" -> "visual studio code"
+                if score > best_score or (score == best_score and best and len(candidate) < len(best)):
+                    best, best_score = candidate, score
+            if best is None:
+                return None
+            self.matches[name] = best
+            return self.entries[best]
+
+    def resolve(self, name: str, wait: float = 2.0, fuzzy: bool = True) -> AppEntry | None:
+        """The installed application best matching name, or None; fuzzy=False accepts only an exact name.
+
+        Waits up to `wait` seconds for a build already under way; with none started, builds the index now.
+        """
+        start = monotonic()
+        if not self.ready.is_set():
+            if self.started:
+                self.ready.wait(wait)
+            else:
+                self.refresh()
+        name = NormalizeName(name)
+        entry = self._match(name, fuzzy)
+        if entry is None and monotonic() - self.checked > REFRESH_INTERVAL and self.refresh():
+            entry = self._match(name, fuzzy)
+        IncrementCounter("apps.hits" if entry else "apps.misses")
+        RecordLatency("apps.resolve", monotonic() - start)
+        return entry
+
+def Launch(entry: AppEntry) -> bool:
+    try:
+        subprocess.Popen(entry.command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+        logging.info(f"Launched {entry.display}: {entry.command}")
+        return True
+    except OSError as e:
+        logging.error(f"Failed to launch {entry.display}: {e}")
+        return False
+
+def FindProcesses(names: set[str]) -> list[int]:
+    """Pids whose executable name (from /proc/<pid>/comm or the argv[0] basename) is in names."""
+    pids, own = [], os.getpid()
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit() or int(pid) == own:
+            continue
+        try:
+            with open(f"/proc/{pid}/comm", "r") as file:
+                comm = file.read().strip()
+            with open(f"/proc/{pid}/cmdline", "rb") as file:
+                argv0 = os.path.basename(file.read().split(b"\0", 1)[0].decode(errors="replace"))
+        except OSError:
+            continue  # Exited while we looked, or not ours to read
+        if comm in names or argv0 in names:
+            pids.append(int(pid))
+    return pids
+
+def CloseProcesses(names: set[str]) -> int:
+    """SIGTERM every matching process; returns how many were signalled."""
+    closed = 0
+    for pid in FindProcesses(names):
+        try:
+            os.kill(pid, signal.SIGTERM)
+            closed += 1
+        except (ProcessLookupError, PermissionError):
+            pass
+    return closed
+
+class AppLinks:
+    """Persisted app name -> website cache for apps that aren't installed, so a web lookup happens once."""
+
+    def __init__(self, path: str = APP_LINKS_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                self.links = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.links = {}
+
+    def get(self, app: str) -> str | None:
+        with self.lock:
+            return self.links.get(NormalizeName(app))
+
+    def put(self, app: str, url: str) -> None:
+        with self.lock:
+            self.links[NormalizeName(app)] = url
+            snapshot = dict(self.links)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path + ".tmp", "w", encoding="utf-8") as file:
+                json.dump(snapshot, file, indent=2)
+            os.replace(self.path + ".tmp", self.path)
+        except OSError as e:
+            logging.error(f"Failed to save app links: {e}")
+
+app_index = AppIndex()
+app_links = AppLinks()
+
+if __name__ == "__main__":
+    # Build time and lookup speed on this machine: python -m Backend.AppIndex [name ...]
+    import sys
+    start = monotonic()
+    app_index.refresh()
+    print(f"indexed {len(app_index.entries)} apps in {(monotonic() - start) * 1000:.1f} ms")
+    start = monotonic()
+    print(f"incremental refresh rescanned {app_index.refresh()} directories in {(monotonic() - start) * 1000:.2f} ms")
+    for name in sys.argv[1:] or ["python", "python3", "git", "firefox", "chrome", "instagram", "not an app"]:
+        start = monotonic()
+        entry = app_index.resolve(name)
+        elapsed = (monotonic() - start) * 1e6
+        print(f"{elapsed:8.1f} us  {name!r} -> {entry.display + ' ' + str(entry.command) if entry else None}")
+        if entry:
+            print(f"           running: {FindProcesses({entry.executable})}")
@@ -0,0 +1,356 @@
+import heapq
+import queue
+import itertools
+import threading
+import logging
+from enum import Enum
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic
+from Backend.Metrics import RecordLatency
+
+class State(Enum):
+    IDLE = "Idle"
+    LISTENING = "Listening"
+    THINKING = "Thinking"
+    ANSWERING = "Answering"
+    SLEEPING = "Sleeping"
+
+class Event(Enum):
+    MIC_ON = "mic on"
+    MIC_OFF = "mic off"
+    WAKE_DETECTED = "wake detected"
+    UTTERANCE_READY = "utterance ready"
+    ANSWER_STARTED = "answer started"
+    TURN_DONE = "turn done"
+    INACTIVITY_TIMEOUT = "inactivity timeout"
+    STOP = "stop"
+
+class Scheduler:
+    """Posts events after a delay from one timer thread that sleeps until the next deadline."""
+
+    def __init__(self, post):
+        self.post = post
+        self.timers = []  # heap of (deadline, sequence, event, payload)
+        self.cancelled = set()
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        threading.Thread(target=self._run, name="AssistantScheduler", daemon=True).start()
+
+    def schedule(self, delay: float, event: Event, payload=None) -> int:
+        with self.condition:
+            timer_id = next(self.sequence)
+            heapq.heappush(self.timers, (monotonic() + delay, timer_id, event, payload))
+            self.condition.notify()
+            return timer_id
+
+    def cancel(self, timer_id: int | None) -> None:
+        if timer_id is not None:
+            with self.condition:
+                self.cancelled.add(timer_id)
+                self.condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self.condition:
+                while self.timers and self.timers[0][1] in self.cancelled:
+                    self.cancelled.discard(heapq.heappop(self.timers)[1])
+                if not self.timers:
+                    self.condition.wait()
+                    continue
+                deadline, timer_id, event, payload = self.timers[0]
+                remaining = deadline - monotonic()
+                if remaining > 0:
+                    self.condition.wait(remaining)
+                    continue
+                heapq.heappop(self.timers)
+            self.post(event, payload)
+
+class AssistantHooks:
+    """Blocking actions the state machine runs on worker threads; main.py supplies the real ones."""
+
+    def arm_listen(self):
+        """Token taken when listening starts; a cancel_listen() after this makes listen(token) return ""."""
+        return None
+
+    def listen(self, token=None) -> str:
+        return ""
+
+    def cancel_listen(self) -> None:
+        pass
+
+    def handle(self, query: str) -> None:
+        pass
+
+    def enter_sleep(self, asleep) -> None:
+        """Announce sleep. asleep(action=None) is False once the assistant has been woken again;
+        otherwise it runs action while no transition can happen, then returns True."""
+        pass
+
+    def wake(self) -> None:
+        pass
+
+    def arm_wake(self):
+        """Token taken before enter_sleep; a cancel_wake() after this makes wait_for_wake(token) return False."""
+        return None
+
+    def wait_for_wake(self, token=None) -> bool:
+        """Block until a wake trigger (clap, voice) is detected; False when cancelled."""
+        return False
+
+    def cancel_wake(self) -> None:
+        pass
+
+    def idle(self) -> None:
+        pass
+
+class AssistantStateMachine:
+    """Event-driven assistant loop: Idle, Listening, Thinking, Answering and Sleeping.
+
+    Every state change happens on one thread that blocks on the event queue,
+    so the assistant uses no CPU while nothing is happening. Blocking work
+    (recognition, answering, wake detection) runs on worker threads that
+    report back with events; the inactivity timeout is a scheduled event.
+    """
+
+    def __init__(self, hooks: AssistantHooks, inactivity_timeout: float = 60.0):
+        self.hooks = hooks
+        self.inactivity_timeout = inactivity_timeout
+        self.state = State.IDLE
+        self.microphone = False
+        self.events = queue.Queue()
+        self.scheduler = Scheduler(self.post)
+        self.workers = ThreadPoolExecutor(max_workers=3, thread_name_prefix="AssistantWorker")
+        # Listens get their own thread: an abandoned listen stuck in the recognizer must not starve turns or wake detection
+        self.listen_workers = ThreadPoolExecutor(max_workers=1, thread_name_prefix="AssistantListener")
+        self.inactivity_timer = None
+        self.listen_generation = 0  # Results from an abandoned listen are ignored
+        self.sleep_generation = 0  # Bumped on every wake, so a stale sleep worker backs off
+        self.lock = threading.Lock()  # Held for transitions; sleep workers check the state under it
+        self.wake_time = None
+        self.listeners = []
+        self.thread = None
+
+    def subscribe(self, callback) -> None:
+        """Call callback(old state, new state, event) on every transition."""
+        self.listeners.append(callback)
+
+    def post(self, event: Event, payload=None) -> None:
+        """Thread-safe; the event is handled on the state machine thread."""
+        self.events.put((event, payload))
+
+    def start(self) -> None:
+        self.thread = threading.Thread(target=self.run, name="AssistantStateMachine", daemon=True)
+        self.thread.start()
+
+    def run(self) -> None:
+        while True:
+            event, payload = self.events.get()
+            if event is Event.STOP:
+                self.scheduler.cancel(self.inactivity_timer)
+                return
+            try:
+                self.handle(event, payload)
+            except Exception as e:
+                logging.error(f"State machine failed handling {event.value} in {self.state.value}: {e}")
+
+    def _transition(self, state: State, event: Event) -> None:
+        with self.lock:
+            old, self.state = self.state, state
+            if old is State.SLEEPING:
+                self.sleep_generation += 1
+        logging.debug(f"Assistant state: {old.value} -> {state.value} ({event.value})")
+        for listener in self.listeners:
+            listener(old, state, event)
+
+    def _reset_inactivity_timer(self) -> None:
+        self.scheduler.cancel(self.inactivity_timer)
+        self.inactivity_timer = self.scheduler.schedule(self.inactivity_timeout, Event.INACTIVITY_TIMEOUT)
+
+    def _stop_inactivity_timer(self) -> None:
+        self.scheduler.cancel(self.inactivity_timer)
+        self.inactivity_timer = None
+
+    def _run_worker(self, function, *args, done: Event | None = None, generation: int | None = None,
+                    executor: ThreadPoolExecutor | None = None) -> None:
+        def task():
+            try:
+                result = function(*args)
+            except Exception as e:
+                logging.error(f"Assistant action {function.__name__} failed: {e}")
+                result = None
+            if done is not None:
+                self.post(done, (generation, result))
+        (executor or self.workers).submit(task)
+
+    def _start_listening(self, event: Event, before=None) -> None:
+        self._transition(State.LISTENING, event)
+        self.listen_generation += 1
+        wake_time, self.wake_time = self.wake_time, None
+        token = self.hooks.arm_listen()  # Here, not on the worker, so an abandon right after still cancels it
+
+        def listen():
+            if before is not None:
+                before()
+            if wake_time is not None:
+                RecordLatency("assistant.wake_to_listen", monotonic() - wake_time)
+            return self.hooks.listen(token)
+        listen.__name__ = "listen"
+        self._run_worker(listen, done=Event.UTTERANCE_READY, generation=self.listen_generation,
+                         executor=self.listen_workers)
+
+    def _abandon_listening(self) -> None:
+        self.listen_generation += 1
+        self.hooks.cancel_listen()
+
+    def handle(self, event: Event, payload=None) -> None:
+        state = self.state
+
+        if event is Event.MIC_ON:
+            self.microphone = True
+            if state is State.SLEEPING:
+                self._wake(event)
+            elif state is State.IDLE:
+                self._reset_inactivity_timer()
+                self._start_listening(event)
+
+        elif event is Event.MIC_OFF:
+            self.microphone = False
+            if state is State.LISTENING:
+                self._abandon_listening()
+                self._stop_inactivity_timer()
+                self._transition(State.IDLE, event)
+                self._run_worker(self.hooks.idle)
+
+        elif event is Event.UTTERANCE_READY:
+            generation, text = payload
+            if state is not State.LISTENING or generation != self.listen_generation:
+                return
+            if not text:
+                self._start_listening(event)
+                return
+            self._reset_inactivity_timer()
+            self._transition(State.THINKING, event)
+            self._run_worker(self.hooks.handle, text, done=Event.TURN_DONE)
+
+        elif event is Event.ANSWER_STARTED:
+            if state is State.THINKING:
+                self._transition(State.ANSWERING, event)
+
+        elif event is Event.TURN_DONE:
+            if state in (State.THINKING, State.ANSWERING):
+                self._reset_inactivity_timer()
+                if self.microphone:
+                    self._start_listening(event)
+                else:
+                    self._transition(State.IDLE, event)
+                    self._run_worker(self.hooks.idle)
+
+        elif event is Event.INACTIVITY_TIMEOUT:
+            self.inactivity_timer = None
+            if state is State.LISTENING:
+                self._abandon_listening()
+                self._transition(State.SLEEPING, event)
+                self._run_worker(self._sleep, self.sleep_generation)
+
+        elif event is Event.WAKE_DETECTED:
+            if state is State.SLEEPING:
+                self._wake(event, payload)
+
+    def _sleep(self, generation: int) -> None:
+        def asleep(action=None) -> bool:
+            with self.lock:
+                if self.state is not State.SLEEPING or self.sleep_generation != generation:
+                    return False
+                if action is not None:
+                    action()
+                return True
+
+        token = self.hooks.arm_wake()  # Before the countdown, so a wake during it cancels the wait below
+        self.hooks.enter_sleep(asleep)
+        if asleep() and self.hooks.wait_for_wake(token):
+            self.post(Event.WAKE_DETECTED, monotonic())
+
+    def _wake(self, event: Event, detected_at: float | None = None) -> None:
+        self.wake_time = detected_at or monotonic()
+        self.hooks.cancel_wake()
+        self.microphone = True
+        self._reset_inactivity_timer()
+        self._start_listening(event, before=self.hooks.wake)
+
+if __name__ == "__main__":
+    # Synthetic-event harness; run from the project root: python -m Backend.AssistantStateMachine
+    from time import sleep, process_time
+    from Backend.Metrics import GetMetrics
+
+    class SyntheticHooks(AssistantHooks):
+        def __init__(self):
+            self.utterances = queue.Queue()
+            self.wake_condition = threading.Condition()
+            self.wake_generation = 0
+            self.clapped = False
+            self.countdowns = self.waits = 0
+            self.muted = []
+
+        def listen(self, token=None):
+            return self.utterances.get()
+
+        def cancel_listen(self):
+            self.utterances.put("")
+
+        def handle(self, query):
+            machine.post(Event.ANSWER_STARTED)
+            sleep(0.05)
+
+        def enter_sleep(self, asleep):
+            self.countdowns += 1
+            sleep(0.4)  # Countdown; the second sleep is woken by MIC_ON during it
+            self.muted.append(asleep())
+
+        def clap(self):
+            with self.wake_condition:
+                self.clapped = True
+                self.wake_condition.notify_all()
+
+        def arm_wake(self):
+            with self.wake_condition:
+                self.clapped = False
+                return self.wake_generation
+
+        def wait_for_wake(self, token=None):
+            self.waits += 1
+            with self.wake_condition:
+                self.wake_condition.wait_for(lambda: self.clapped or self.wake_generation != token)
+                return self.clapped and self.wake_generation == token
+
+        def cancel_wake(self):
+            with self.wake_condition:
+                self.wake_generation += 1
+                self.wake_condition.notify_all()
+
+    hooks = SyntheticHooks()
+    machine = AssistantStateMachine(hooks, inactivity_timeout=0.3)
+    transitions = []
+    machine.subscribe(lambda old, new, event: transitions.append((old.value, new.value, event.value)))
+    machine.start()
+
+    machine.post(Event.MIC_ON)
+    hooks.utterances.put("what is python?")
+    sleep(0.2)
+    sleep(0.4)  # Inactivity timeout -> Sleeping
+    cpu_start, wall_start = process_time(), monotonic()
+    sleep(1.0)
+    idle_cpu = (process_time() - cpu_start) / (monotonic() - wall_start)
+    hooks.clap()
+    sleep(0.5)  # Inactivity timeout again after 0.3s, then the mic comes on during the 0.4s countdown
+    machine.post(Event.MIC_ON)
+    sleep(0.1)
+    machine.post(Event.MIC_OFF)
+    sleep(0.4)  # Countdown ends and finds the assistant awake
+
+    for transition in transitions:
+        print("%-10s -> %-10s (%s)" % transition)
+    expected = ["Listening", "Thinking", "Answering", "Listening", "Sleeping", "Listening", "Sleeping", "Listening", "Idle"]
+    print("transitions ok:", [new for _, new, _ in transitions] == expected)
+    print(f"countdowns {hooks.countdowns}, muted after countdown {hooks.muted}, wake waits {hooks.waits} (expected 2, [True, False], 1)")
+    print(f"idle CPU while sleeping: {idle_cpu * 100:.2f}%")
+    print("wake to listen:", GetMetrics()["latencies"].get("assistant.wake_to_listen"))
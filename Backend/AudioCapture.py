@@ -0,0 +1,319 @@
+import wave
+import threading
+import logging
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from Backend.Metrics import IncrementCounter
+
+SAMPLE_RATE = 16000
+BLOCK_SIZE = 512  # Samples per capture callback (32 ms)
+RING_SECONDS = 10  # Audio kept for late subscribers and VAD look-back
+
+FRAME_SIZE = 512  # Onset analysis window (32 ms)
+HOP_SIZE = 256
+FLOOR_SECONDS = 1.0  # Noise floor is the median over this much preceding audio
+FLUX_RATIO = 3.0  # Onset when spectral flux exceeds the floor by this factor...
+FLUX_DELTA = 0.5  # ...plus this margin
+ENERGY_RISE_DB = 12.0  # ...and frame energy rises this far above its floor
+REFRACTORY = 0.12  # Seconds between distinct onsets
+
+class RingBuffer:
+    """Fixed-size float32 sample ring; positions count samples since the stream started."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.samples = np.zeros(capacity, dtype=np.float32)
+        self.position = 0  # Total samples ever written
+        self.condition = threading.Condition()
+
+    def write(self, samples: np.ndarray) -> None:
+        samples = samples[-self.capacity:]
+        with self.condition:
+            start = self.position % self.capacity
+            first = min(len(samples), self.capacity - start)
+            self.samples[start:start + first] = samples[:first]
+            self.samples[:len(samples) - first] = samples[first:]
+            self.position += len(samples)
+            self.condition.notify_all()
+
+    def read(self, start: int, end: int | None = None) -> tuple[np.ndarray, int]:
+        """Samples in [start, end), clipped to what is still buffered; returns (samples, actual start)."""
+        with self.condition:
+            end = self.position if end is None else min(end, self.position)
+            start = max(start, end - self.capacity, 0)
+            indices = np.arange(start, end) % self.capacity
+            return self.samples[indices], start
+
+    def latest(self, count: int) -> np.ndarray:
+        with self.condition:
+            position = self.position
+        return self.read(position - count, position)[0]
+
+    def wait(self, position: int, timeout: float | None = None) -> bool:
+        """Block until samples past position have been written."""
+        with self.condition:
+            return self.condition.wait_for(lambda: self.position > position, timeout)
+
+class AudioCapture:
+    """One persistent microphone stream feeding a ring buffer and any number of subscribers.
+
+    PyAudio is opened once, in callback mode, the first time capture is
+    started; subscribers receive each block as float32 samples in [-1, 1)
+    on a dispatcher thread, so slow consumers never stall the audio callback.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, block_size: int = BLOCK_SIZE, ring_seconds: float = RING_SECONDS):
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.ring = RingBuffer(int(sample_rate * ring_seconds))
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.audio = None
+        self.stream = None
+        self.dispatcher = None
+
+    def start(self) -> None:
+        with self.lock:
+            if self.stream is not None:
+                return
+            import pyaudio
+            self.audio = pyaudio.PyAudio()
+            self.stream = self.audio.open(
+                format=pyaudio.paInt16, channels=1, rate=self.sample_rate, input=True,
+                frames_per_buffer=self.block_size, stream_callback=self._callback,
+            )
+        self._start_dispatcher()
+
+    def _start_dispatcher(self) -> None:
+        with self.lock:
+            if self.dispatcher is None:
+                self.dispatcher = threading.Thread(target=self._dispatch, name="AudioCaptureDispatch", daemon=True)
+                self.dispatcher.start()
+
+    def _callback(self, data, frame_count, time_info, status):
+        import pyaudio
+        if status:
+            IncrementCounter("audio.overflows")
+        self.ring.write(np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0)
+        return None, pyaudio.paContinue
+
+    def feed(self, samples: np.ndarray) -> None:
+        """Push samples as if they had been captured (used for WAV input)."""
+        self._start_dispatcher()
+        self.ring.write(np.asarray(samples, dtype=np.float32))
+
+    def _dispatch(self) -> None:
+        position = self.ring.position
+        while True:
+            self.ring.wait(position)
+            samples, start = self.ring.read(position)
+            if start > position:
+                IncrementCounter("audio.dropped_samples", start - position)
+            position = start + len(samples)
+            with self.lock:
+                callbacks = list(self.subscribers)
+            for callback in callbacks:
+                try:
+                    callback(samples, start)
+                except Exception as e:
+                    logging.error(f"Audio subscriber failed: {e}")
+
+    def subscribe(self, callback):
+        """Call callback(samples, start position) for every new block; returns an unsubscribe function."""
+        with self.lock:
+            self.subscribers.append(callback)
+        def unsubscribe():
+            with self.lock:
+                if callback in self.subscribers:
+                    self.subscribers.remove(callback)
+        return unsubscribe
+
+    def stop(self) -> None:
+        with self.lock:
+            stream, audio = self.stream, self.audio
+            self.stream = self.audio = None
+        if stream is not None:
+            stream.stop_stream()
+            stream.close()
+            audio.terminate()
+
+def ReadWav(path: str) -> tuple[np.ndarray, int]:
+    """Mono float32 samples and the sample rate of a 16-bit PCM WAV file."""
+    with wave.open(path, "rb") as file:
+        if file.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV is supported")
+        rate, channels = file.getframerate(), file.getnchannels()
+        samples = np.frombuffer(file.readframes(file.getnframes()), dtype=np.int16).astype(np.float32) / 32768.0
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+def WriteWav(path: str, samples: np.ndarray, rate: int) -> None:
+    with wave.open(path, "wb") as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(rate)
+        file.writeframes((np.clip(samples, -1, 1 - 1 / 32768) * 32768).astype(np.int16).tobytes())
+
+class OnsetDetector:
+    """Vectorized clap/onset detector over short-time energy and spectral flux.
+
+    Whole buffers are framed at once; state carried between calls (leftover
+    samples, last spectrum, recent flux and energy) makes feeding a stream in
+    blocks equivalent to processing it in one piece. The thresholds adapt to
+    a running median of the preceding FLOOR_SECONDS, so steady background
+    noise raises the floor instead of triggering onsets.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, frame_size: int = FRAME_SIZE, hop_size: int = HOP_SIZE):
+        self.sample_rate = sample_rate
+        self.frame_size = frame_size
+        self.hop_size = hop_size
+        self.window = np.hanning(frame_size).astype(np.float32)
+        self.floor_frames = max(1, int(FLOOR_SECONDS * sample_rate / hop_size))
+        self.reset()
+
+    def reset(self) -> None:
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.frames_done = 0
+        self.last_spectrum = None
+        self.flux_history = np.zeros(0, dtype=np.float32)
+        self.energy_history = np.zeros(0, dtype=np.float32)
+        self.last_onset = -np.inf
+
+    def process(self, samples: np.ndarray) -> list[float]:
+        """Feed samples; returns onset times in seconds since the first sample fed."""
+        buffer = np.concatenate([self.pending, np.asarray(samples, dtype=np.float32)])
+        if len(buffer) < self.frame_size:
+            self.pending = buffer
+            return []
+        frames = sliding_window_view(buffer, self.frame_size)[::self.hop_size]
+        consumed = len(frames) * self.hop_size
+        self.pending = buffer[consumed:]
+
+        energy = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        spectrum = np.log1p(100 * np.abs(np.fft.rfft(frames * self.window, axis=1)))
+        previous = spectrum[:1] if self.last_spectrum is None else self.last_spectrum[None, :]
+        flux = np.maximum(np.diff(spectrum, axis=0, prepend=previous), 0).mean(axis=1)
+        self.last_spectrum = spectrum[-1]
+
+        # Median of the preceding floor_frames values for every new frame
+        flux_floor = self._running_floor(self.flux_history, flux)
+        energy_floor = self._running_floor(self.energy_history, energy)
+        self.flux_history = np.concatenate([self.flux_history, flux])[-self.floor_frames:]
+        self.energy_history = np.concatenate([self.energy_history, energy])[-self.floor_frames:]
+
+        candidates = (flux > flux_floor * FLUX_RATIO + FLUX_DELTA) & (energy > energy_floor + ENERGY_RISE_DB)
+        times = (self.frames_done + np.flatnonzero(candidates)) * self.hop_size / self.sample_rate
+        self.frames_done += len(frames)
+
+        onsets = []
+        for onset in times:
+            if onset - self.last_onset >= REFRACTORY:
+                onsets.append(float(onset))
+            self.last_onset = onset
+        return onsets
+
+    def _running_floor(self, history: np.ndarray, values: np.ndarray) -> np.ndarray:
+        if not len(history):
+            history = values[:1]  # No past yet: the first frame stands in for the floor
+        series = np.concatenate([history, values])
+        pad = max(0, self.floor_frames - len(history))
+        series = np.concatenate([np.full(pad, series[0], dtype=series.dtype), series])
+        windows = sliding_window_view(series, self.floor_frames)[-len(values) - 1:-1]
+        return np.median(windows, axis=1)
+
+class ClapDetector:
+    """Signals when a clap is heard on an AudioCapture stream.
+
+    cancel() bumps a generation counter instead of setting a shared flag, so
+    a cancel is never lost: a caller that takes a token with arm() before
+    doing other work (a sleep countdown, say) and then passes it to wait()
+    returns at once if cancel() was called in between.
+    """
+
+    def __init__(self, capture: AudioCapture):
+        self.capture = capture
+        self.detector = OnsetDetector(capture.sample_rate)
+        self.condition = threading.Condition()
+        self.generation = 0
+        self.clapped = False
+
+    def _on_audio(self, samples: np.ndarray, start: int) -> None:
+        if self.detector.process(samples):
+            IncrementCounter("audio.claps")
+            with self.condition:
+                self.clapped = True
+                self.condition.notify_all()
+
+    def arm(self) -> int:
+        """Token for a later wait(); any cancel() after this call ends that wait."""
+        with self.condition:
+            return self.generation
+
+    def wait(self, timeout: float | None = None, token: int | None = None) -> bool:
+        """Block until a clap (True), or until cancel() is called or timeout expires (False)."""
+        with self.condition:
+            if token is None:
+                token = self.generation
+            if token != self.generation:
+                return False  # Cancelled before the wait began
+            self.clapped = False
+        self.detector.reset()
+        self.capture.start()
+        unsubscribe = self.capture.subscribe(self._on_audio)
+        try:
+            with self.condition:
+                self.condition.wait_for(lambda: self.clapped or self.generation != token, timeout)
+                return self.clapped and self.generation == token
+        finally:
+            unsubscribe()
+
+    def cancel(self) -> None:
+        with self.condition:
+            self.generation += 1
+            self.condition.notify_all()
+
+audio_capture = AudioCapture()
+clap_detector = ClapDetector(audio_capture)
+
+if __name__ == "__main__":
+    # Offline check, no microphone needed: python -m Backend.AudioCapture [recording.wav]
+    import os
+    import sys
+    import tempfile
+    from time import perf_counter
+
+    if len(sys.argv) > 1:
+        samples, rate = ReadWav(sys.argv[1])
+        expected = None
+    else:
+        rate = SAMPLE_RATE
+        rng = np.random.default_rng(0)
+        seconds = 20
+        t = np.arange(seconds * rate) / rate
+        # Background: hum plus noise that gets louder halfway through
+        samples = 0.02 * np.sin(2 * np.pi * 120 * t) + rng.normal(0, 0.005, len(t)) * (1 + 3 * (t > seconds / 2))
+        expected = [1.5, 4.0, 4.4, 9.0, 13.2, 17.7]
+        for clap in expected:
+            start = int(clap * rate)
+            burst = rng.normal(0, 0.6, int(0.02 * rate)) * np.exp(-np.arange(int(0.02 * rate)) / (0.004 * rate))
+            samples[start:start + len(burst)] += burst
+        samples = samples.astype(np.float32)
+        path = os.path.join(tempfile.mkdtemp(), "claps.wav")
+        WriteWav(path, samples, rate)
+        samples, rate = ReadWav(path)
+
+    start = perf_counter()
+    onsets = OnsetDetector(rate).process(samples)
+    elapsed = perf_counter() - start
+
+    detector = OnsetDetector(rate)
+    streamed = [onset for i in range(0, len(samples), BLOCK_SIZE) for onset in detector.process(samples[i:i + BLOCK_SIZE])]
+
+    print("onsets:", [round(onset, 3) for onset in onsets])
+    print("block-fed stream matches:", np.allclose(onsets, streamed) if len(onsets) == len(streamed) else False)
+    print(f"{len(samples) / rate:.1f} s of audio in {elapsed * 1000:.1f} ms ({len(samples) / rate / elapsed:.0f}x real time)")
+    if expected is not None:
+        hits = sum(any(abs(onset - clap) < 0.05 for onset in onsets) for clap in expected)
+        print(f"detected {hits}/{len(expected)} claps, {len(onsets) - hits} false positives")
@@ -0,0 +1,106 @@
+import io
+import pygame
+import queue
+import atexit
+import threading
+import logging
+from collections import deque
+from time import monotonic
+
+class Clip:
+    """A queued piece of audio; done is set when it finishes playing or is stopped."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.done = threading.Event()
+        self.interrupted = False
+
+class AudioPlayer:
+    """Plays in-memory audio clips through one mixer kept open for the process lifetime.
+
+    Clips are decoded ahead of time and handed to the channel queue so that
+    consecutive clips play back to back. Completion is signalled through
+    each clip's event, timed from the decoded length, instead of polling.
+    """
+
+    def __init__(self):
+        self.requests = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.channel = None
+        self.playing = deque()  # (end time, clip) for the sound on the channel and the one queued behind it
+        self.backlog = deque()  # decoded (sound, clip) waiting for a free channel queue slot
+        self.muted = False  # Clips complete immediately without touching the mixer (load tests, headless runs)
+
+    def _start(self) -> None:
+        with self.lock:
+            if self.thread is not None:
+                return
+            pygame.mixer.init()
+            self.channel = pygame.mixer.Channel(0)
+            pygame.mixer.set_reserved(1)
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+            atexit.register(pygame.mixer.quit)
+
+    def play(self, data: bytes) -> Clip:
+        """Queue audio bytes (mp3/ogg/wav) for playback and return immediately."""
+        clip = Clip(data)
+        if self.muted:
+            self._finish(clip)
+            return clip
+        self._start()
+        self.requests.put(("play", clip))
+        return clip
+
+    def stop(self) -> None:
+        """Stop the current clip and drop everything queued behind it."""
+        if self.thread is not None:
+            self.requests.put(("stop", None))
+
+    def _finish(self, clip: Clip, interrupted: bool = False) -> None:
+        clip.interrupted = interrupted
+        clip.data = b""
+        clip.done.set()
+
+    def _feed_channel(self) -> None:
+        # The channel holds one playing sound and one queued sound
+        while self.backlog and len(self.playing) < 2:
+            sound, clip = self.backlog.popleft()
+            now = monotonic()
+            if self.playing:
+                start = self.playing[-1][0]
+                self.channel.queue(sound)
+            else:
+                start = now
+                self.channel.play(sound)
+            self.playing.append((start + sound.get_length(), clip))
+
+    def _run(self) -> None:
+        while True:
+            timeout = max(0.0, self.playing[0][0] - monotonic()) if self.playing else None
+            try:
+                command, clip = self.requests.get(timeout=timeout)
+            except queue.Empty:
+                command, clip = None, None
+
+            if command == "play":
+                try:
+                    sound = pygame.mixer.Sound(file=io.BytesIO(clip.data))
+                    self.backlog.append((sound, clip))
+                except Exception as e:
+                    logging.error(f"Failed to decode audio clip: {e}")
+                    self._finish(clip, interrupted=True)
+            elif command == "stop":
+                self.channel.stop()
+                while self.playing:
+                    self._finish(self.playing.popleft()[1], interrupted=True)
+                while self.backlog:
+                    self._finish(self.backlog.popleft()[1], interrupted=True)
+
+            now = monotonic()
+            while self.playing and self.playing[0][0] <= now:
+                self._finish(self.playing.popleft()[1])
+            self._feed_channel()
+
+player = AudioPlayer()
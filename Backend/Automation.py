@@ -3,6 +3,9 @@ from pywhatkit import search as pywhatkit_search, playonyt
 from dotenv import dotenv_values
 from bs4 import BeautifulSoup
 from groq import Groq
+from Backend.ContentWriter import ContentWriter
+from Backend.CommandRegistry import CommandRegistry, CommandResult, FormatResults
+from Backend.AppIndex import app_index, app_links, Launch, CloseProcesses
 import webbrowser
 import subprocess
 import requests
@@ -10,6 +13,7 @@ import keyboard
 import asyncio
 import os
 import logging
+from time import perf_counter
 
 # Setup logging
 logging.basicConfig(level=logging.DEBUG, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -33,13 +37,14 @@ except Exception as e:
 session = requests.Session()
 session.headers.update({"User-Agent": USER_AGENT})
 
-# Chat history for content generation
-messages = []
-SYSTEM_PROMPT = {
-    "role": "system",
-    "content": f"Hello, I'm {os.environ.get('Username', 'Assistant')}. You're a content writer."
-}
+# Skills register their prefixes here; TranslateAndExecute never needs to change for a new one
+registry = CommandRegistry()
+registry.passthrough("general ", "realtime ")  # Answered by the chatbot and search layers
 
+# Content tasks stream to their own files, each topic with its own bounded history
+content_writer = ContentWriter(client)
+
+@registry.command("google search ", concurrency=4, timeout=15)
 def GoogleSearch(topic: str) -> bool:
     logging.debug(f"GoogleSearch: {topic}")
     try:
@@ -49,60 +54,26 @@ def GoogleSearch(topic: str) -> bool:
         logging.error(f"Google search failed: {e}")
         return False
 
-def Content(topic: str) -> bool:
-    """Generate content and open it in Notepad."""
-    def open_notepad(file_path: str) -> bool:
+@registry.command("content ", "write ", concurrency=4, timeout=180)
+def Content(topic: str, cancel=None) -> bool:
+    """Stream generated content into a file, then open it in the editor once the document is complete."""
+    def open_notepad(task) -> None:
         try:
             default_text_editor = "notepad.exe" if os.name == "nt" else "gedit"
-            subprocess.Popen([default_text_editor, file_path])
-            logging.info(f"Opened {file_path} in {default_text_editor}")
-            return True
+            subprocess.Popen([default_text_editor, task.path])
+            logging.info(f"Opened {task.path} in {default_text_editor}")
         except Exception as e:
             logging.error(f"Failed to open Notepad: {e}")
-            return False
-
-    def content_writer_ai(prompt: str) -> str:
-        """Generate content using Groq API or a fallback."""
-        if client:
-            try:
-                messages.append({"role": "user", "content": prompt})
-                completion = client.chat.completions.create(
-                    model="mixtral-8x7b-32768",
-                    messages=[SYSTEM_PROMPT] + messages,
-                    max_tokens=2048,
-                    temperature=0.7,
-                    top_p=1,
-                    stream=True,
-                    stop=None
-                )
-                answer = "".join(chunk.choices[0].delta.content or "" for chunk in completion)
-                messages.append({"role": "assistant", "content": answer})
-                logging.debug(f"Generated AI content for '{prompt}'")
-                return answer
-            except Exception as e:
-                logging.error(f"AI content generation failed: {e}")
-                return f"Error: {e}"
-        else:
-            # Fallback content if Groq fails
-            logging.warning("Groq client unavailable, using fallback content")
-            return f"This is a fallback response for '{prompt}' because the AI service is unavailable."
 
     topic = topic.replace("content", "").strip()
     logging.debug(f"Content: Generating for topic '{topic}'")
-    content_by_ai = content_writer_ai(topic)
-    
-    # Always write content, even if it's an error message
-    os.makedirs("Data", exist_ok=True)
-    file_path = os.path.join("Data", f"{topic.lower().replace(' ', '')}.txt")
-    try:
-        with open(file_path, "w", encoding="utf-8") as file:
-            file.write(content_by_ai)
-        logging.debug(f"Content written to {file_path}")
-        return open_notepad(file_path)
-    except Exception as e:
-        logging.error(f"Failed to write or open file: {e}")
+    task = content_writer.write(topic, cancel)
+    if task.status != "done":
         return False
+    open_notepad(task)  # Not before: an editor reads the file once and would show it cut off
+    return True
 
+@registry.command("youtube search ", concurrency=4, timeout=15)
 def YoutubeSearch(topic: str) -> bool:
     logging.debug(f"YoutubeSearch: {topic}")
     try:
@@ -113,6 +84,7 @@ def YoutubeSearch(topic: str) -> bool:
         logging.error(f"YouTube search failed: {e}")
         return False
 
+@registry.command("play ", concurrency=1, timeout=20)
 def PlayYoutube(query: str) -> bool:
     logging.debug(f"PlayYoutube: {query}")
     try:
@@ -122,33 +94,56 @@ def PlayYoutube(query: str) -> bool:
         logging.error(f"YouTube playback failed: {e}")
         return False
 
-def OpenApp(app: str) -> bool:
-    logging.debug(f"OpenApp: {app}")
+def FindOfficialSite(app: str) -> str | None:
+    """First result of a web search for the app's site; only used when app_links has no entry."""
+    url = f"https://www.google.com/search?q={app}+official+site"
     try:
-        appopen(app, match_closest=True, output=True, throw_error=True)
-        return True
-    except Exception:
-        def extract_link(html: str) -> list[str]:
-            soup = BeautifulSoup(html, "html.parser")
-            links = soup.find_all("a", {"jsname": "UWckNb"})
-            return [link.get("href") for link in links if link.get("href")]
+        response = session.get(url, timeout=10)
+        response.raise_for_status()
+    except Exception as e:
+        logging.error(f"Web fallback failed for {app}: {e}")
+        return None
+    soup = BeautifulSoup(response.text, "html.parser")
+    links = [link.get("href") for link in soup.find_all("a", {"jsname": "UWckNb"}) if link.get("href")]
+    return links[0] if links else None
 
-        url = f"https://www.google.com/search?q={app}+official+site"
+@registry.command("open ", concurrency=8, timeout=20)
+def OpenApp(app: str) -> bool:
+    logging.debug(f"OpenApp: {app}")
+    if os.name == "nt":
         try:
-            response = session.get(url, timeout=10)
-            response.raise_for_status()
-            links = extract_link(response.text)
-            if links:
-                webbrowser.open(links[0])
-                return True
+            appopen(app, match_closest=True, output=True, throw_error=True)
+            return True
+        except Exception:
+            pass
+    else:
+        entry = app_index.resolve(app)
+        if entry is not None:
+            return Launch(entry)
+    url = app_links.get(app)
+    if url is None:
+        url = FindOfficialSite(app)
+        if url is None:
             logging.warning(f"No valid links found for {app}")
             return False
-        except Exception as e:
-            logging.error(f"Web fallback failed for {app}: {e}")
-            return False
+        app_links.put(app, url)
+    webbrowser.open(url)
+    return True
 
+@registry.command("close ", concurrency=8, timeout=15)
 def CloseApp(app: str) -> bool:
     logging.debug(f"CloseApp: {app}")
+    if os.name != "nt":
+        entry = app_index.resolve(app, fuzzy=False)  # Never kill by a guessed name
+        names = {app.strip().lower(), app.strip().lower().replace(" ", "-")}
+        if entry is not None:
+            names.add(entry.executable)
+        closed = CloseProcesses(names)
+        if closed:
+            logging.info(f"{app} closed successfully ({closed} processes)")
+        else:
+            logging.error(f"Failed to close {app}: no matching process")
+        return bool(closed)
     if "chrome" in app.lower():
         try:
             subprocess.run(["taskkill", "/IM", "chrome.exe", "/F"], check=True)
@@ -165,6 +160,7 @@ def CloseApp(app: str) -> bool:
         logging.error(f"Failed to close {app}: {e}")
         return False
 
+@registry.command("system ", concurrency=1, timeout=5)  # Keypresses must not interleave
 def System(command: str) -> bool:
     logging.debug(f"System: {command}")
     actions = {
@@ -184,55 +180,25 @@ def System(command: str) -> bool:
     logging.warning(f"Unknown system command: {command}")
     return False
 
-async def TranslateAndExecute(commands: list[str]) -> list[bool]:
+async def TranslateAndExecute(commands: list[str], deadline: float | None = None) -> list[CommandResult]:
+    """Dispatch each command to its registered skill; chat/search and unrecognised commands are left out."""
     logging.debug(f"TranslateAndExecute: {commands}")
-    funcs = []
-    for command in commands:
-        command = command.strip()
-        if not command:
-            continue
-        if command.startswith("open "):
-            funcs.append(asyncio.to_thread(OpenApp, command.removeprefix("open ").strip()))
-        elif command.startswith("close "):
-            funcs.append(asyncio.to_thread(CloseApp, command.removeprefix("close ").strip()))
-        elif command.startswith("play "):
-            funcs.append(asyncio.to_thread(PlayYoutube, command.removeprefix("play ").strip()))
-        elif command.startswith("content "):
-            funcs.append(asyncio.to_thread(Content, command.removeprefix("content ").strip()))
-        elif command.startswith("write "):  # Added to support "write " for content generation
-            funcs.append(asyncio.to_thread(Content, command.removeprefix("write ").strip()))
-        elif command.startswith("google search "):
-            funcs.append(asyncio.to_thread(GoogleSearch, command.removeprefix("google search ").strip()))
-        elif command.startswith("youtube search "):
-            funcs.append(asyncio.to_thread(YoutubeSearch, command.removeprefix("youtube search ").strip()))
-        elif command.startswith("system "):
-            funcs.append(asyncio.to_thread(System, command.removeprefix("system ").strip()))
-        elif command.startswith("general "):
-            logging.info(f"General query not implemented: {command.removeprefix('general ')}")
-        elif command.startswith("realtime "):
-            logging.info(f"Realtime query not implemented: {command.removeprefix('realtime ')}")
-        else:
-            logging.warning(f"No function found for: {command}")
-
-    if not funcs:
-        logging.debug("No valid commands to execute")
-        return []
-
-    results = await asyncio.gather(*funcs, return_exceptions=True)
-    processed_results = [False if isinstance(r, Exception) else r for r in results]
-    logging.debug(f"Execution results: {processed_results}")
-    return processed_results
+    results = await registry.execute_all(commands, deadline)
+    return [result for result in results if result.status not in ("skipped", "unknown")]
 
-async def Automation(commands: list[str]) -> bool:
+async def Automation(commands: list[str], timeout: float | None = None) -> bool:
+    """Run the commands; timeout bounds the whole batch on top of each command's own deadline."""
     logging.debug(f"Automation starting with commands: {commands}")
-    results = await TranslateAndExecute(commands)
+    deadline = perf_counter() + timeout if timeout is not None else None
+    results = await TranslateAndExecute(commands, deadline)
     if not results:
         logging.warning("No valid commands executed")
         return False
-    success = all(results)
+    logging.info("Automation results:\n" + FormatResults(results))
+    success = all(result.ok for result in results)
     logging.debug(f"Automation completed: {success}")
     if not success:
-        logging.error(f"Some commands failed: {results}")
+        logging.error(f"Some commands failed: {[(result.command, result.status, result.error) for result in results if not result.ok]}")
     return success
 
 if __name__ == "__main__":
@@ -1,8 +1,11 @@
-import os
 from groq import Groq
-from json import load, dump
 import datetime
+from time import perf_counter
 from dotenv import dotenv_values
+from Backend.ConversationStore import conversation
+from Backend.ContextWindow import BuildContext, LLMSummarizer, chat_summary
+from Backend.RetrievalIndex import RelevantContext
+from Backend.AnswerCache import answer_cache, Cacheable, ContextHash
 
 # Load environment variables
 env_vars = dotenv_values(".env")
@@ -12,25 +15,17 @@ GroqAPIKey = env_vars.get("GroqAPIKey")
 # Initialize Groq Client
 client = Groq(api_key=GroqAPIKey)
 
-# Initialize messages and system prompt
-messages = []
+# Fold old turns into a rolling summary written by the model itself
+chat_summary.summarizer = LLMSummarizer(client, "llama3-70b-8192")
+
+# Initialize system prompt
 System = f"""Hello, I am {Username}, You are a very accurate and advanced AI chatbot named {Assistantname} which also has real-time up-to-date information from the internet.
 *** Do not tell time until I ask, do not talk too much, just answer the question.***
 *** Reply in only English, even if the question is in Hindi, reply in English.***
 *** Do not provide notes in the output, just answer the question and never mention your training data. ***
 """
 SystemChatBot = [{"role": "system", "content": System}]
-
-# Load chat log or create if not found
-chat_log_path = "Data/ChatLog.json"
-os.makedirs(os.path.dirname(chat_log_path), exist_ok=True)
-
-try:
-    with open(chat_log_path, "r") as f:
-        messages = load(f)
-except FileNotFoundError:
-    with open(chat_log_path, "w") as f:
-        dump([], f)
+ChatModel = "llama3-70b-8192"
 
 # Functions
 def RealtimeInformation():
@@ -51,17 +46,46 @@ def AnswerModifier(answer):
     non_empty_lines = [line.strip() for line in lines if line.strip()]
     return '\n'.join(non_empty_lines)
 
-def ChatBot(query):
-    """Send user query to the chatbot and return the AI's response."""
-    global messages
+def ChatBotStream(query, cacheable=False):
+    """Yield the AI's response token by token; the full answer is logged when the stream ends.
+
+    cacheable marks a query the decision layer classified as general; if it
+    is also not time- or conversation-dependent, a cached answer is served
+    without calling Groq, and a fresh one is stored for next time. Such
+    queries get neither the date/time message nor retrieved conversation
+    context (which would pull in the previous answer to the same question
+    and change the key on every repeat), so the cache key covers exactly
+    the prompt they are sent with: the model and system prompt.
+    """
+    answer = ""
+    cacheable = cacheable and Cacheable(query)
+    injected = [] if cacheable else [{"role": "system", "content": RealtimeInformation()}] + RelevantContext(query)
+    answer_context = ContextHash(ChatModel, System, *(message["content"] for message in injected))
+    start = perf_counter()
+    complete = False  # Only a fully streamed answer is cached
     try:
-        # Add user query to messages
-        messages.append({"role": "user", "content": query})
+        # Add user query to the shared conversation
+        conversation.append("user", query)
+
+        if cacheable:
+            cached = answer_cache.get(query, answer_context)
+            if cached is not None:
+                answer = cached
+                cacheable = False  # Already stored
+                yield cached
+                return
 
         # Call Groq API
         completion = client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=SystemChatBot + [{"role": "system", "content": RealtimeInformation()}] + messages,
+            model=ChatModel,
+            messages=BuildContext(
+                ChatModel,
+                SystemChatBot + injected,
+                conversation.messages,
+                max_output_tokens=1024,
+                summary=chat_summary,
+                name="chatbot"
+            ),
             max_tokens=1024,
             temperature=0.7,
             top_p=1,
@@ -69,21 +93,27 @@ def ChatBot(query):
         )
 
         # Process response
-        answer = ""
         for chunk in completion:
-            if chunk.choices[0].delta.content:
-                answer += chunk.choices[0].delta.content
-        answer = answer.replace("</s>", "").strip()
-
-        # Append assistant response and save log
-        messages.append({"role": "assistant", "content": answer})
-        with open(chat_log_path, "w") as f:
-            dump(messages, f, indent=4)
-        
-        return AnswerModifier(answer)
+            token = chunk.choices[0].delta.content
+            if token:
+                answer += token
+                yield token
+        complete = True
     except Exception as e:
         print(f"Error: {e}")
-        return "An error occurred. Please try again."
+        if not answer:
+            answer = "An error occurred. Please try again."
+            yield answer
+    finally:
+        # Append assistant response to the log; "</s>" can arrive split over tokens, so it is stripped here
+        answer = answer.replace("</s>", "")
+        conversation.append("assistant", answer.strip())
+        if cacheable and complete and answer.strip():
+            answer_cache.put(query, answer_context, answer.strip(), perf_counter() - start)
+
+def ChatBot(query, cacheable=False):
+    """Send user query to the chatbot and return the AI's response."""
+    return AnswerModifier("".join(ChatBotStream(query, cacheable)).replace("</s>", "").strip())
 
 # Main loop
 if __name__ == "__main__":
@@ -0,0 +1,211 @@
+import asyncio
+import inspect
+import threading
+import logging
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter, time
+from Backend.Metrics import IncrementCounter, RecordLatency
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_TIMEOUT = 30.0  # Seconds
+
+@dataclass
+class CommandResult:
+    command: str  # The text as received, e.g. "open notepad"
+    name: str | None  # Registered command name, None if nothing matched
+    argument: str = ""
+    status: str = "ok"  # ok, failed, timeout, cancelled, unknown, skipped
+    value: object = None  # Whatever the skill returned
+    error: str | None = None
+    started: float = field(default_factory=time)
+    queued: float = 0.0  # Seconds waiting for a free slot
+    duration: float = 0.0  # Seconds from dispatch to result, including the wait
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+@dataclass
+class Command:
+    name: str
+    prefixes: tuple[str, ...]
+    function: object  # fn(argument) -> result; None for prefixes handled elsewhere
+    concurrency: int = DEFAULT_CONCURRENCY
+    timeout: float | None = DEFAULT_TIMEOUT
+    cancellable: bool = False  # Whether function takes a `cancel` threading.Event
+    executor: ThreadPoolExecutor | None = None
+    semaphores: dict = field(default_factory=dict, repr=False)  # One per event loop
+
+class PrefixTrie:
+    """Character trie from command prefixes to values, answering longest-prefix queries."""
+
+    def __init__(self):
+        self.root = {}
+
+    def insert(self, prefix: str, value) -> None:
+        node = self.root
+        for character in prefix:
+            node = node.setdefault(character, {})
+        node[None] = value
+
+    def longest_match(self, text: str):
+        """(value, prefix length) for the longest inserted prefix of text, or (None, 0)."""
+        node, match = self.root, (None, 0)
+        for length, character in enumerate(text, 1):
+            node = node.get(character)
+            if node is None:
+                break
+            if None in node:
+                match = (node[None], length)
+        return match
+
+class CommandRegistry:
+    """Maps command prefixes ("open ", "google search ") to skills and runs them.
+
+    Each command gets its own thread pool sized to its concurrency limit, so
+    a slow skill cannot starve the others, and a deadline after which its
+    result is reported as a timeout. Skills that accept a `cancel` event are
+    told when they time out or are cancelled so they can stop early; others
+    finish in the background and their late result is discarded.
+    """
+
+    def __init__(self):
+        self.commands = {}
+        self.trie = PrefixTrie()
+        self.lock = threading.Lock()
+
+    def register(self, name: str, prefixes, function=None, concurrency: int = DEFAULT_CONCURRENCY,
+                 timeout: float | None = DEFAULT_TIMEOUT) -> Command:
+        if isinstance(prefixes, str):
+            prefixes = (prefixes,)
+        cancellable = function is not None and "cancel" in inspect.signature(function).parameters
+        command = Command(name, tuple(prefixes), function, concurrency, timeout, cancellable)
+        with self.lock:
+            self.commands[name] = command
+            for prefix in command.prefixes:
+                self.trie.insert(prefix, command)
+        return command
+
+    def command(self, *prefixes: str, name: str | None = None, concurrency: int = DEFAULT_CONCURRENCY,
+                timeout: float | None = DEFAULT_TIMEOUT):
+        """Decorator form of register(); the name defaults to the function's."""
+        def decorator(function):
+            self.register(name or function.__name__, prefixes, function, concurrency, timeout)
+            return function
+        return decorator
+
+    def passthrough(self, *prefixes: str) -> None:
+        """Recognise prefixes that other layers answer (chat, search) so they are skipped rather than unknown."""
+        for prefix in prefixes:
+            self.register(prefix.strip(), prefix)
+
+    def match(self, text: str) -> tuple[Command | None, str]:
+        command, length = self.trie.longest_match(text)
+        return command, text[length:].strip()
+
+    def _executor(self, command: Command) -> ThreadPoolExecutor:
+        with self.lock:
+            if command.executor is None:
+                command.executor = ThreadPoolExecutor(max_workers=command.concurrency, thread_name_prefix=f"Command-{command.name}")
+            return command.executor
+
+    def _semaphore(self, command: Command) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if loop not in command.semaphores:
+            command.semaphores[loop] = asyncio.Semaphore(command.concurrency)
+        return command.semaphores[loop]
+
+    async def execute(self, text: str, deadline: float | None = None) -> CommandResult:
+        """Run one command; deadline (perf_counter time) caps the command's own timeout."""
+        text = text.strip()
+        command, argument = self.match(text)
+        result = CommandResult(text, command and command.name, argument)
+        if command is None:
+            result.status = "unknown"
+            logging.warning(f"No function found for: {text}")
+        elif command.function is None:
+            result.status = "skipped"
+        else:
+            await self._run(command, result, deadline)
+            RecordLatency(f"automation.{command.name}", result.duration)
+        IncrementCounter(f"automation.{result.status}")
+        return result
+
+    async def _run(self, command: Command, result: CommandResult, deadline: float | None) -> None:
+        start = perf_counter()
+        cancel = threading.Event()
+        call = (lambda: command.function(result.argument, cancel=cancel)) if command.cancellable else (lambda: command.function(result.argument))
+        timeout = command.timeout
+        if deadline is not None:
+            timeout = min(timeout, deadline - start) if timeout is not None else deadline - start
+
+        async def limited():
+            async with self._semaphore(command):
+                result.queued = perf_counter() - start
+                return await asyncio.get_running_loop().run_in_executor(self._executor(command), call)
+
+        try:
+            result.value = await asyncio.wait_for(limited(), timeout)
+            result.status = "ok" if result.value is not False else "failed"
+        except asyncio.TimeoutError:
+            result.status, result.error = "timeout", f"no result after {timeout:.1f}s"
+            cancel.set()
+        except asyncio.CancelledError:
+            result.status = "cancelled"
+            cancel.set()
+            raise
+        except Exception as e:
+            result.status, result.error = "failed", str(e)
+            logging.error(f"Command {result.command!r} failed: {e}")
+        finally:
+            result.duration = perf_counter() - start
+
+    async def execute_all(self, commands: list[str], deadline: float | None = None) -> list[CommandResult]:
+        """Run commands concurrently (each within its own limits); results keep the input order."""
+        commands = [text.strip() for text in commands if text.strip()]
+        results = await asyncio.gather(*(self.execute(text, deadline) for text in commands), return_exceptions=True)
+        return [
+            result if isinstance(result, CommandResult) else CommandResult(text, None, status="failed", error=str(result))
+            for text, result in zip(commands, results)
+        ]
+
+    def shutdown(self) -> None:
+        for command in self.commands.values():
+            if command.executor is not None:
+                command.executor.shutdown(wait=False, cancel_futures=True)
+
+def FormatResults(results: list[CommandResult]) -> str:
+    return "\n".join(
+        f"{result.duration * 1000:8.1f} ms  {result.status:9} {result.command}" + (f"  ({result.error})" if result.error else "")
+        for result in results
+    )
+
+if __name__ == "__main__":
+    # Limits and deadlines with sleeping stand-in skills: python -m Backend.CommandRegistry
+    from time import sleep
+    registry = CommandRegistry()
+
+    @registry.command("press ", concurrency=1, timeout=5)
+    def Press(key):
+        sleep(0.2)
+        return True
+
+    @registry.command("open ", concurrency=8, timeout=5)
+    def Open(app):
+        sleep(0.2)
+        return True
+
+    @registry.command("write ", timeout=0.5)
+    def Write(topic, cancel):
+        for _ in range(20):
+            if cancel.wait(0.1):
+                return False
+        return True
+
+    registry.passthrough("general ")
+    commands = ["press a", "press b", "press c"] + [f"open app{i}" for i in range(8)] + ["write essay", "general hello", "dance"]
+    start = perf_counter()
+    results = asyncio.run(registry.execute_all(commands))
+    print(FormatResults(results))
+    print(f"total {perf_counter() - start:.2f}s (presses serialised, opens in parallel, write cut off at its deadline)")
@@ -0,0 +1,170 @@
+import os
+import re
+import threading
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from time import perf_counter
+from Backend.ContextWindow import BuildContext, ExtractiveSummary
+from Backend.Metrics import IncrementCounter, RecordLatency, RecordValue
+
+CONTENT_MODEL = "mixtral-8x7b-32768"
+CONTENT_DIRECTORY = "Data"
+MAX_OUTPUT_TOKENS = 2048
+MAX_CONVERSATIONS = 16  # Topics whose history is kept for follow-up requests
+MAX_TURNS = 8  # Messages kept verbatim per topic; older ones survive only in its summary
+
+@dataclass
+class ContentTask:
+    topic: str
+    path: str
+    status: str = "running"  # running, done, failed, cancelled
+    characters: int = 0
+    chunks: int = 0
+    ttfb: float | None = None  # Seconds until the first text reached the file
+    duration: float = 0.0
+    error: str | None = None
+
+    @property
+    def throughput(self) -> float:
+        """Characters written per second after the first byte."""
+        streaming = self.duration - (self.ttfb or 0.0)
+        return self.characters / streaming if streaming > 0 else 0.0
+
+class Conversation:
+    """History of one topic: its own lock, the last MAX_TURNS messages and a summary of older ones."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.messages = []
+        self.summary = ""
+
+    def add(self, message: dict) -> None:
+        self.messages.append(message)
+        overflow = len(self.messages) - MAX_TURNS
+        if overflow > 0:
+            self.summary = ExtractiveSummary(self.summary, self.messages[:overflow])
+            del self.messages[:overflow]
+
+    def context(self, system_prompt: dict) -> list[dict]:
+        if not self.summary:
+            return [system_prompt]
+        return [system_prompt, {"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"}]
+
+class ContentWriter:
+    """Writes generated documents to disk as the model streams them.
+
+    Every chunk is written and flushed as it arrives, so a cancelled or
+    failed request still leaves everything generated up to that point.
+    Each topic has its own Conversation, which also serialises requests for
+    the same file; different topics run fully in parallel.
+    """
+
+    def __init__(self, client, model: str = CONTENT_MODEL, directory: str = CONTENT_DIRECTORY, system_prompt: str | None = None):
+        self.client = client
+        self.model = model
+        self.directory = directory
+        self.system_prompt = {
+            "role": "system",
+            "content": system_prompt or f"Hello, I'm {os.environ.get('Username', 'Assistant')}. You're a content writer.",
+        }
+        self.conversations = OrderedDict()
+        self.lock = threading.Lock()
+
+    def conversation(self, topic: str) -> Conversation:
+        key = topic.lower()
+        with self.lock:
+            conversation = self.conversations.pop(key, None) or Conversation()
+            self.conversations[key] = conversation
+            while len(self.conversations) > MAX_CONVERSATIONS:
+                self.conversations.popitem(last=False)
+        return conversation
+
+    def path(self, topic: str) -> str:
+        return os.path.join(self.directory, re.sub(r"[^\w-]", "", topic.lower().replace(" ", "")) + ".txt")
+
+    def stream(self, conversation: Conversation, topic: str):
+        """Text chunks for the topic; a fallback message when there is no client."""
+        if self.client is None:
+            logging.warning("Groq client unavailable, using fallback content")
+            yield f"This is a fallback response for '{topic}' because the AI service is unavailable."
+            return
+        completion = self.client.chat.completions.create(
+            model=self.model,
+            messages=BuildContext(self.model, conversation.context(self.system_prompt), conversation.messages,
+                                  max_output_tokens=MAX_OUTPUT_TOKENS, name="content"),
+            max_tokens=MAX_OUTPUT_TOKENS,
+            temperature=0.7,
+            top_p=1,
+            stream=True,
+            stop=None,
+        )
+        for chunk in completion:
+            text = chunk.choices[0].delta.content
+            if text:
+                yield text
+
+    def write(self, topic: str, cancel: threading.Event | None = None) -> ContentTask:
+        """Generate a document for topic into its file, returning the task with its timings."""
+        task = ContentTask(topic, self.path(topic))
+        conversation = self.conversation(topic)
+        os.makedirs(os.path.dirname(task.path) or ".", exist_ok=True)
+        with conversation.lock:
+            start = perf_counter()
+            conversation.add({"role": "user", "content": topic})
+            answer = []
+            try:
+                with open(task.path, "w", encoding="utf-8") as file:
+                    for text in self.stream(conversation, topic):
+                        if cancel is not None and cancel.is_set():
+                            task.status = "cancelled"
+                            break
+                        file.write(text)
+                        file.flush()
+                        answer.append(text)
+                        task.chunks += 1
+                        task.characters += len(text)
+                        if task.ttfb is None:
+                            task.ttfb = perf_counter() - start
+                    else:
+                        task.status = "done"
+            except Exception as e:
+                task.status, task.error = "failed", str(e)
+                logging.error(f"Content generation for '{topic}' failed: {e}")
+            finally:
+                task.duration = perf_counter() - start
+            if answer:
+                conversation.add({"role": "assistant", "content": "".join(answer)})
+        IncrementCounter(f"content.{task.status}")
+        RecordLatency("content.document", task.duration)
+        if task.ttfb is not None:
+            RecordLatency("content.ttfb", task.ttfb)
+            RecordValue("content.chars_per_second", task.throughput)
+        logging.info(f"Content '{topic}': {task.status}, {task.characters} chars, "
+                      f"first byte {task.ttfb or 0:.2f}s, {task.throughput:.0f} chars/s, {task.duration:.2f}s total")
+        return task
+
+if __name__ == "__main__":
+    # Concurrent documents from a stand-in streaming client: python -m Backend.ContentWriter
+    from time import sleep
+    from types import SimpleNamespace
+    from concurrent.futures import ThreadPoolExecutor
+
+    class StandInClient:
+        def __init__(self):
+            self.chat = SimpleNamespace(completions=self)
+
+        def create(self, messages, **kwargs):
+            sleep(0.3)  # Time to first token
+            for word in f"A short piece about {messages[-1]['content']}. ".split() * 40:
+                sleep(0.005)
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word + " "))])
+
+    writer = ContentWriter(StandInClient(), directory=os.path.join("Data", "ContentDemo"))
+    topics = ["leave application", "cover letter", "poem about rain", "cover letter"]
+    start = perf_counter()
+    with ThreadPoolExecutor(max_workers=len(topics)) as executor:
+        tasks = list(executor.map(writer.write, topics))
+    for task in tasks:
+        print(f"{task.topic:20} {task.status:9} ttfb {task.ttfb:.2f}s  {task.throughput:7.0f} chars/s  {task.duration:.2f}s  {task.path}")
+    print(f"all done in {perf_counter() - start:.2f}s; 'cover letter' history: {len(writer.conversation('cover letter').messages)} messages")
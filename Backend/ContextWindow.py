@@ -0,0 +1,131 @@
+import re
+import threading
+import logging
+from functools import lru_cache
+from Backend.Metrics import RecordValue
+
+# Context window size (tokens) per model; unknown models get the smallest
+MODEL_CONTEXT_TOKENS = {
+    "llama3-70b-8192": 8192,
+    "mixtral-8x7b-32768": 32768,
+}
+DEFAULT_CONTEXT_TOKENS = 8192
+SAFETY_MARGIN = 256  # Slack for the estimate being off against the real tokenizer
+MESSAGE_OVERHEAD = 4  # Role and separator tokens per chat message
+SUMMARY_MAX_TOKENS = 400
+
+@lru_cache(maxsize=8192)
+def CountTokens(text: str) -> int:
+    """Cheap tokenizer estimate: roughly 4 characters or 0.75 words per token."""
+    if not text:
+        return 0
+    return max(len(text) // 4, int(len(re.findall(r"\w+|[^\w\s]", text)) * 0.75)) + 1
+
+def MessageTokens(message: dict) -> int:
+    return CountTokens(message["content"]) + MESSAGE_OVERHEAD
+
+def ExtractiveSummary(previous: str, messages: list[dict]) -> str:
+    """Local fallback summarizer: keep the first sentence of each turn, newest last."""
+    lines = [previous] if previous else []
+    for message in messages:
+        first_sentence = re.split(r"(?<=[.!?])\s", message["content"].strip(), maxsplit=1)[0]
+        lines.append(f"{message['role']}: {first_sentence[:200]}")
+    summary = "\n".join(lines)
+    # Keep the tail when over budget; newer context matters more
+    while CountTokens(summary) > SUMMARY_MAX_TOKENS and "\n" in summary:
+        summary = summary.split("\n", 1)[1]
+    return summary
+
+def LLMSummarizer(client, model: str):
+    """Summarize with a Groq-compatible chat client, falling back to ExtractiveSummary on errors."""
+    def summarize(previous: str, messages: list[dict]) -> str:
+        transcript = "\n".join(f"{message['role']}: {message['content']}" for message in messages)
+        try:
+            completion = client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": "Summarize the conversation so far in a few short sentences. Keep names, facts and open questions."},
+                    {"role": "user", "content": f"Earlier summary:\n{previous}\n\nNew turns:\n{transcript}"},
+                ],
+                max_tokens=SUMMARY_MAX_TOKENS,
+                temperature=0.2,
+            )
+            return completion.choices[0].message.content.strip()
+        except Exception as e:
+            logging.error(f"Summarization failed, using extractive summary: {e}")
+            return ExtractiveSummary(previous, messages)
+    return summarize
+
+class RollingSummary:
+    """Summary of the oldest part of a history, extended in the background as it grows.
+
+    One per caller: it is only consistent with the cut points of the
+    BuildContext calls that extend it.
+    """
+
+    def __init__(self, summarizer=ExtractiveSummary):
+        self.summarizer = summarizer
+        self.text = ""
+        self.covered = 0  # Number of leading history messages folded into text
+        self.lock = threading.Lock()
+        self.updating = False
+
+    def get(self, history: list[dict], upto: int) -> tuple[str, int]:
+        """Return (summary, messages it covers) and start folding history[covered:upto] into it if needed."""
+        with self.lock:
+            if upto > self.covered and not self.updating:
+                self.updating = True
+                pending = history[self.covered:upto]
+                threading.Thread(target=self._update, args=(self.text, pending, upto), daemon=True).start()
+            return self.text, self.covered
+
+    def _update(self, previous: str, pending: list[dict], upto: int) -> None:
+        try:
+            text = self.summarizer(previous, pending)
+            with self.lock:
+                self.text, self.covered = text, upto
+        finally:
+            with self.lock:
+                self.updating = False
+
+def BuildContext(model: str, system_messages: list[dict], history: list[dict], max_output_tokens: int,
+                 summary: RollingSummary | None = None, name: str = "chat") -> list[dict]:
+    """Fit system messages, a summary of old turns and the newest turns into the model's budget.
+
+    The last message (the current user turn) is always kept, even when the system messages leave no room for it.
+    """
+    budget = MODEL_CONTEXT_TOKENS.get(model, DEFAULT_CONTEXT_TOKENS) - max_output_tokens - SAFETY_MARGIN
+    used = sum(MessageTokens(message) for message in system_messages)
+
+    # Newest turns verbatim, as many as fit
+    start = len(history)
+    while start > 0 and (start == len(history) or used + MessageTokens(history[start - 1]) <= budget):
+        start -= 1
+        used += MessageTokens(history[start])
+    recent = list(history[start:])
+    if used > budget:
+        logging.warning(f"Context {name}: system messages leave no room, sending ~{used} tokens for a {budget} budget")
+
+    summary_messages = []
+    if start > 0 and summary is not None:
+        text, covered = summary.get(history, start)
+        if text:
+            # The summary may reach past this cut (an earlier call had more room); don't repeat those turns
+            while len(recent) > 1 and len(history) - len(recent) < covered:
+                used -= MessageTokens(recent.pop(0))
+            summary_message = {"role": "system", "content": f"Summary of the earlier conversation:\n{text}"}
+            used += MessageTokens(summary_message)
+            while len(recent) > 1 and used > budget:
+                used -= MessageTokens(recent.pop(0))
+            if used <= budget:
+                summary_messages.append(summary_message)
+            else:
+                used -= MessageTokens(summary_message)
+
+    RecordValue(f"context.{name}.prompt_tokens", used)
+    logging.debug(f"Context {name}: ~{used} prompt tokens, {len(recent)} recent turns, {len(history) - len(recent)} older turns summarized or dropped")
+    return system_messages + summary_messages + recent
+
+# Summaries of the shared conversation, one per engine since each cuts it at its own point
+chat_summary = RollingSummary()
+realtime_summary = RollingSummary()
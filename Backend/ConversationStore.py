@@ -0,0 +1,170 @@
+import os
+import re
+import gzip
+import json
+import shutil
+import threading
+import logging
+from time import time
+
+CONVERSATION_DIR = os.path.join("Data", "Conversation")
+LEGACY_CHAT_LOG_PATH = os.path.join("Data", "ChatLog.json")
+ACTIVE_SEGMENT = "current.jsonl"
+MAX_SEGMENT_BYTES = 4 * 1024 * 1024
+SEGMENT_PATTERN = re.compile(r"^segment-(\d+)\.jsonl(\.gz)?$")
+
+class ConversationStore:
+    """Append-only conversation log shared by the chat and realtime engines.
+
+    Each turn is one JSON line appended to the active segment, so a write
+    costs O(turn) instead of rewriting the whole history. Full segments are
+    rotated and gzip-compressed in the background. The in-memory message
+    list is only built the first time it is needed.
+    """
+
+    def __init__(self, directory: str = CONVERSATION_DIR, durable: bool = True,
+                 max_segment_bytes: int = MAX_SEGMENT_BYTES, legacy_path: str | None = LEGACY_CHAT_LOG_PATH):
+        self.directory = directory
+        self.durable = durable
+        self.max_segment_bytes = max_segment_bytes
+        self.lock = threading.RLock()
+        self.listeners = []
+        self._messages = None
+        self._file = None
+        os.makedirs(directory, exist_ok=True)
+        self._repair_active_segment()
+        if legacy_path:
+            self._import_legacy(legacy_path)
+
+    @property
+    def active_path(self) -> str:
+        return os.path.join(self.directory, ACTIVE_SEGMENT)
+
+    def _segments(self) -> list[str]:
+        """Rotated segment files, oldest first, preferring the compressed copy."""
+        found = {}
+        for name in os.listdir(self.directory):
+            match = SEGMENT_PATTERN.match(name)
+            if match and (match.group(2) or int(match.group(1)) not in found):
+                found[int(match.group(1))] = name
+        return [os.path.join(self.directory, found[index]) for index in sorted(found)]
+
+    def _repair_active_segment(self) -> None:
+        """Drop a torn trailing line left by a crash mid-write."""
+        try:
+            with open(self.active_path, "rb+") as file:
+                data = file.read()
+                if data and not data.endswith(b"\n"):
+                    file.truncate(data.rfind(b"\n") + 1)
+        except FileNotFoundError:
+            pass
+
+    def _import_legacy(self, legacy_path: str) -> None:
+        """One-time migration from the old rewrite-everything ChatLog.json."""
+        if self._segments() or os.path.exists(self.active_path):
+            return
+        try:
+            with open(legacy_path, "r", encoding="utf-8") as file:
+                legacy_messages = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        for message in legacy_messages:
+            self.append(message["role"], message["content"])
+        logging.info(f"Imported {len(legacy_messages)} messages from {legacy_path}")
+
+    @staticmethod
+    def _read_segment(path: str) -> list[dict]:
+        opener = gzip.open if path.endswith(".gz") else open
+        messages = []
+        try:
+            with opener(path, "rt", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    messages.append({"role": record["role"], "content": record["content"]})
+        except FileNotFoundError:
+            pass
+        return messages
+
+    @property
+    def messages(self) -> list[dict]:
+        """All messages as {"role", "content"} dicts, loaded from disk on first access."""
+        with self.lock:
+            if self._messages is None:
+                messages = []
+                for path in self._segments() + [self.active_path]:
+                    messages.extend(self._read_segment(path))
+                self._messages = messages
+            return self._messages
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def subscribe(self, callback) -> None:
+        """Call callback(message) after every append."""
+        self.listeners.append(callback)
+
+    def append(self, role: str, content: str) -> dict:
+        message = {"role": role, "content": content}
+        line = json.dumps({**message, "time": time()}, ensure_ascii=False) + "\n"
+        with self.lock:
+            if self._file is None:
+                self._file = open(self.active_path, "a", encoding="utf-8")
+            self._file.write(line)
+            self._file.flush()
+            if self.durable:
+                os.fsync(self._file.fileno())
+            if self._messages is not None:
+                self._messages.append(message)
+            if self._file.tell() >= self.max_segment_bytes:
+                self._rotate()
+        for listener in self.listeners:
+            listener(message)
+        return message
+
+    def _rotate(self) -> None:
+        self._file.close()
+        self._file = None
+        indexes = [int(SEGMENT_PATTERN.match(os.path.basename(path)).group(1)) for path in self._segments()]
+        segment_path = os.path.join(self.directory, f"segment-{max(indexes, default=0) + 1:06d}.jsonl")
+        os.replace(self.active_path, segment_path)
+        threading.Thread(target=self._compress, args=(segment_path,), daemon=True).start()
+
+    @staticmethod
+    def _compress(path: str) -> None:
+        try:
+            with open(path, "rb") as source, gzip.open(path + ".gz.tmp", "wb") as target:
+                shutil.copyfileobj(source, target)
+            os.replace(path + ".gz.tmp", path + ".gz")
+            os.remove(path)
+        except OSError as e:
+            logging.error(f"Failed to compress conversation segment {path}: {e}")
+
+    def close(self) -> None:
+        with self.lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+conversation = ConversationStore()
+
+if __name__ == "__main__":
+    # Run from the project root: python -m Backend.ConversationStore [turns] [--fsync]
+    import sys
+    import tempfile
+    from time import perf_counter
+
+    turns = int(next((arg for arg in sys.argv[1:] if arg.isdigit()), 100_000))
+    store = ConversationStore(tempfile.mkdtemp(), durable="--fsync" in sys.argv, legacy_path=None)
+    window = max(turns // 10, 1)
+    text = "What is the capital of France and why is it famous for its museums?"
+    start = perf_counter()
+    for turn in range(1, turns + 1):
+        store.append("user" if turn % 2 else "assistant", text)
+        if turn % window == 0:
+            elapsed = perf_counter() - start
+            print(f"turns {turn - window + 1:>7}-{turn:<7} {elapsed / window * 1e6:8.1f} us/turn")
+            start = perf_counter()
+    store.close()
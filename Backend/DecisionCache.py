@@ -0,0 +1,111 @@
+import os
+import re
+import json
+import atexit
+import threading
+import logging
+from time import time
+from collections import OrderedDict
+from Backend.IntentClassifier import DecisionCategory
+from Backend.Metrics import IncrementCounter
+
+DECISION_CACHE_PATH = os.path.join("Data", "DecisionCache.json")
+MAX_ENTRIES = 2000
+SAVE_EVERY = 10  # Flush to disk after this many new entries (and always at exit)
+
+# Seconds a cached decision stays valid, by category; a decision uses its shortest category TTL
+CATEGORY_TTL = {
+    "realtime": 10 * 60,
+    "general": 24 * 60 * 60,
+    "exit": 30 * 24 * 60 * 60,
+}
+TASK_TTL = 30 * 24 * 60 * 60  # open, close, play, system, ...
+
+def NormalizeQuery(query: str) -> str:
+    """Cache key: case, punctuation and whitespace folded, QueryModifier suffix removed."""
+    query = re.sub(r"[^\w\s']", " ", query.lower())
+    return re.sub(r"\s+", " ", query).strip()
+
+def DecisionTTL(decision: list[str]) -> float:
+    ttls = [CATEGORY_TTL.get(DecisionCategory(item), TASK_TTL) for item in decision]
+    return min(ttls) if ttls else 0
+
+class DecisionCache:
+    """LRU cache of FirstLayerDMM decisions with per-category TTLs, persisted as JSON."""
+
+    def __init__(self, path: str = DECISION_CACHE_PATH, max_entries: int = MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.unsaved = 0
+        self.load()
+
+    def load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                stored = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        now = time()
+        for key, entry in stored:
+            if entry["expires"] > now:
+                self.entries[key] = entry
+
+    def save(self) -> None:
+        with self.lock:
+            snapshot = list(self.entries.items())
+            self.unsaved = 0
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as file:
+                json.dump(snapshot, file)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logging.error(f"Failed to save decision cache: {e}")
+
+    def get(self, query: str) -> list[str] | None:
+        key = NormalizeQuery(query)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry["expires"] <= time():
+                del self.entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+        IncrementCounter("dmm.cache_hits" if entry else "dmm.cache_misses")
+        return list(entry["decision"]) if entry else None
+
+    def put(self, query: str, decision: list[str]) -> None:
+        ttl = DecisionTTL(decision)
+        if ttl <= 0:
+            return
+        with self.lock:
+            key = NormalizeQuery(query)
+            self.entries[key] = {"decision": list(decision), "expires": time() + ttl}
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self.unsaved += 1
+            should_save = self.unsaved >= SAVE_EVERY
+        if should_save:
+            self.save()
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+decision_cache = DecisionCache()
+atexit.register(decision_cache.save)
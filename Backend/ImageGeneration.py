@@ -1,124 +1,317 @@
 import asyncio
-from random import randint
-from PIL import Image
+import atexit
+import hashlib
+import json
+import random
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import get_key
 import os
 import logging
-from time import sleep
+from time import monotonic
+from Backend.Runtime import runtime
+from Backend.Metrics import IncrementCounter, RecordLatency
 
 # Setup logging
 logging.basicConfig(level=logging.DEBUG, format="%(asctime)s - %(levelname)s - %(message)s")
 
-def open_images(prompt):
-    """Open generated images."""
-    folder_path = r"Data"
-    prompt = prompt.replace(" ", "_")
-    files = [f"{prompt}{i}.jpg" for i in range(1, 5)]
+IMAGE_STORE_PATH = os.path.join("Data", "Images")
+DEFAULT_API_URL = "https://api-inference.huggingface.co/models/stabilityai/stable-diffusion-xl-base-1.0"
+VARIANTS = 4  # Images per prompt unless asked otherwise
+CONCURRENCY = 4  # Requests in flight to the inference API, across all prompts
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 90  # Generation itself can take a while
+MAX_ATTEMPTS = 4
+BACKOFF = 1.0  # Seconds before the first retry; doubles each attempt, with jitter
+MAX_BACKOFF = 20.0
+RETRY_STATUS = {429, 500, 502, 503, 504}
+THUMBNAIL_SIZE = (256, 256)
 
-    for jpg_file in files:
-        image_path = os.path.join(folder_path, jpg_file)
+def open_images(paths):
+    """Open generated images in the system viewer."""
+    from PIL import Image
+    for image_path in paths:
         try:
             img = Image.open(image_path)
             logging.info(f"Opening image: {image_path}")
             img.show()
-            sleep(1)
         except IOError as e:
             logging.error(f"Error opening image {image_path}: {e}")
 
-API_URL = "https://api-inference.huggingface.co/models/stabilityai/stable-diffusion-xl-base-1.0"
+API_URL = get_key('.env', 'ImageGenerationURL') or DEFAULT_API_URL
 HF_API_KEY = get_key('.env', 'HuggingFaceAPIKey')
 if not HF_API_KEY:
     logging.error("HuggingFaceAPIKey not found in .env")
 headers = {"Authorization": f"Bearer {HF_API_KEY}"}
 
-async def query(payload):
-    """Query the Hugging Face API for image generation."""
-    try:
-        response = await asyncio.to_thread(requests.post, API_URL, headers=headers, json=payload)
-        response.raise_for_status()
-        return response.content
-    except requests.RequestException as e:
-        logging.error(f"API query failed: {e}")
+def NormalizePrompt(prompt: str) -> str:
+    return " ".join(prompt.lower().split())
+
+def VariantSeeds(prompt: str, count: int, repeatable: bool = False) -> list[int]:
+    """Fresh seeds for every request, so asking again gives new images; with repeatable=True
+    they are stable per prompt, and asking again reuses the stored images."""
+    if not repeatable:
+        return random.sample(range(1, 1000001), count)
+    base = int(hashlib.sha256(NormalizePrompt(prompt).encode("utf-8")).hexdigest()[:8], 16)
+    return [(base + i * 7919) % 1000000 + 1 for i in range(count)]
+
+class ImageStore:
+    """Content-addressed image files plus a (prompt, seed) -> content hash index.
+
+    Images live at Images/<first two hex digits>/<sha256>.<ext>, so identical
+    output is stored once and nothing is ever overwritten; thumbnails are
+    made on a background thread after an image is added. Only repeatable
+    (pinned-seed) images are indexed, since a fresh random seed is never
+    looked up again; the index is written once per batch and at exit.
+    """
+
+    def __init__(self, directory: str = IMAGE_STORE_PATH):
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.json")
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()  # One index write at a time, each with the latest snapshot
+        self.unsaved = 0
+        self.thumbnails = ThreadPoolExecutor(max_workers=1, thread_name_prefix="Thumbnails")
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as file:
+                self.index = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.index = {}
+        atexit.register(self.save)
+
+    @staticmethod
+    def key(prompt: str, seed: int) -> str:
+        return f"{NormalizePrompt(prompt)}|{seed}"
+
+    def path(self, digest: str, extension: str = "jpg") -> str:
+        return os.path.join(self.directory, digest[:2], f"{digest}.{extension}")
+
+    def thumbnail_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "thumbnails", f"{digest}.png")
+
+    def lookup(self, prompt: str, seed: int) -> str | None:
+        with self.lock:
+            entry = self.index.get(self.key(prompt, seed))
+        if entry and os.path.exists(entry["path"]):
+            return entry["path"]
         return None
 
-async def generate_images(prompt: str):
-    """Generate multiple images concurrently."""
-    os.makedirs("Data", exist_ok=True)
-    tasks = []
-    for i in range(4):
+    def add(self, prompt: str, seed: int, data: bytes, indexed: bool = True) -> str:
+        """Store an image; indexed=False keeps it out of the (prompt, seed) index."""
+        digest = hashlib.sha256(data).hexdigest()
+        extension = "png" if data[:8] == b"\x89PNG\r\n\x1a\n" else "jpg"
+        path = self.path(digest, extension)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".tmp", "wb") as file:
+                file.write(data)
+            os.replace(path + ".tmp", path)
+        if indexed:
+            with self.lock:
+                self.index[self.key(prompt, seed)] = {"path": path, "sha256": digest}
+                self.unsaved += 1
+        self.thumbnails.submit(self.make_thumbnail, path, digest)
+        return path
+
+    def save(self) -> None:
+        """Write the index if images were indexed since the last save."""
+        with self.save_lock:
+            with self.lock:
+                if not self.unsaved:
+                    return
+                snapshot = dict(self.index)
+                self.unsaved = 0
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                with open(self.index_path + ".tmp", "w", encoding="utf-8") as file:
+                    json.dump(snapshot, file)
+                os.replace(self.index_path + ".tmp", self.index_path)
+            except OSError as e:
+                logging.error(f"Failed to save image index: {e}")
+
+    def make_thumbnail(self, path: str, digest: str) -> None:
+        thumbnail = self.thumbnail_path(digest)
+        if os.path.exists(thumbnail):
+            return
+        try:
+            from PIL import Image
+            os.makedirs(os.path.dirname(thumbnail), exist_ok=True)
+            with Image.open(path) as img:
+                img.thumbnail(THUMBNAIL_SIZE)
+                img.save(thumbnail, "PNG")
+        except Exception as e:
+            logging.debug(f"Thumbnail failed for {path}: {e}")
+
+class ImageGenerator:
+    """Batched text-to-image client: many prompts, bounded concurrency, retries, and a disk store."""
+
+    def __init__(self, api_url: str = API_URL, store: ImageStore | None = None, concurrency: int = CONCURRENCY):
+        self.api_url = api_url
+        self.store = store or ImageStore()
+        self.concurrency = concurrency
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        self.session.mount("http://", HTTPAdapter(pool_maxsize=concurrency))
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=concurrency))
+        self.semaphores = {}  # One per event loop
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if loop not in self.semaphores:
+            self.semaphores[loop] = asyncio.Semaphore(self.concurrency)
+        return self.semaphores[loop]
+
+    def _post(self, payload: dict) -> requests.Response:
+        return self.session.post(self.api_url, json=payload, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+
+    async def query(self, prompt: str, seed: int) -> bytes | None:
+        """One image from the API, retrying throttling, server errors and timeouts with backoff."""
         payload = {
-            "inputs": f"{prompt}, quality=4k, sharpness=maximum, Ultra High details, high resolution, seed={randint(1, 1000000)}",
+            "inputs": f"{prompt}, quality=4k, sharpness=maximum, Ultra High details, high resolution",
+            "parameters": {"seed": seed},
         }
-        task = asyncio.create_task(query(payload))
-        tasks.append(task)
-
-    image_bytes_list = await asyncio.gather(*tasks)
-    for i, image_bytes in enumerate(image_bytes_list):
-        if image_bytes:
-            file_path = f"Data/{prompt.replace(' ', '_')}{i+1}.jpg"
+        delay = BACKOFF
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            start = monotonic()
             try:
-                with open(file_path, "wb") as f:
-                    f.write(image_bytes)
-                logging.debug(f"Image saved: {file_path}")
-            except Exception as e:
-                logging.error(f"Failed to save image {file_path}: {e}")
+                async with self._semaphore():
+                    response = await asyncio.to_thread(self._post, payload)
+                RecordLatency("images.request", monotonic() - start)
+                if response.status_code not in RETRY_STATUS:
+                    response.raise_for_status()
+                    return response.content
+                retry_after = response.headers.get("Retry-After")
+                wait = float(retry_after) if retry_after and retry_after.isdigit() else delay
+                error = f"HTTP {response.status_code}"
+            except requests.exceptions.Timeout as e:
+                wait, error = delay, str(e)
+            except requests.RequestException as e:
+                logging.error(f"API query failed: {e}")
+                IncrementCounter("images.request_errors")
+                return None
+            if attempt == MAX_ATTEMPTS:
+                break
+            IncrementCounter("images.retries")
+            logging.debug(f"Image request for {prompt!r} failed ({error}), retrying in {wait:.1f}s")
+            await asyncio.sleep(min(wait, MAX_BACKOFF) * random.uniform(0.8, 1.2))
+            delay *= 2
+        logging.error(f"API query failed after {MAX_ATTEMPTS} attempts: {error}")
+        IncrementCounter("images.request_errors")
+        return None
+
+    async def variant(self, prompt: str, seed: int, repeatable: bool = False) -> str | None:
+        path = self.store.lookup(prompt, seed) if repeatable else None
+        if path:
+            IncrementCounter("images.store_hits")
+            return path
+        image_bytes = await self.query(prompt, seed)
+        if not image_bytes:
+            return None
+        return await asyncio.to_thread(self.store.add, prompt, seed, image_bytes, repeatable)
+
+    async def generate_batch(self, prompts: dict[str, int], progress=None, repeatable: bool = False) -> dict[str, list[str]]:
+        """Generate variants for many prompts at once ({prompt: count}); returns {prompt: saved paths}.
+
+        progress(done, total) is called as each image finishes, whether it was generated or found on disk.
+        Each call gets new images unless repeatable, which uses the same seeds (and stored images) per prompt.
+        """
+        async def labelled(prompt, seed):
+            return prompt, await self.variant(prompt, seed, repeatable)
+
+        tasks = [
+            asyncio.create_task(labelled(prompt, seed))
+            for prompt, count in prompts.items() for seed in VariantSeeds(prompt, count, repeatable)
+        ]
+        results = {prompt: [] for prompt in prompts}
+        try:
+            for done, task in enumerate(asyncio.as_completed(tasks), 1):
+                prompt, path = await task
+                if path:
+                    results[prompt].append(path)
+                if progress is not None:
+                    progress(done, len(tasks))
+        finally:
+            for task in tasks:
+                task.cancel()
+            if repeatable:
+                await asyncio.to_thread(self.store.save)
+        return results
+
+image_generator = ImageGenerator()
+
+async def generate_images(prompt: str, progress=None, variants: int = VARIANTS, repeatable: bool = False) -> list[str]:
+    """Generate images for one prompt; returns the saved paths and calls progress(done, total) as each finishes."""
+    return (await image_generator.generate_batch({prompt: variants}, progress, repeatable))[prompt]
 
 def GenerateImages(prompt: str):
     """Generate and open images for the given prompt."""
     try:
-        asyncio.run(generate_images(prompt))
-        open_images(prompt)
-        return True
+        paths = runtime.run(generate_images(prompt))
+        open_images(paths)
+        return bool(paths)
     except Exception as e:
         logging.error(f"Image generation failed: {e}")
         return False
 
-def main():
-    """Monitor ImageGeneration.data and generate images when triggered."""
-    data_file = r"Frontend\Files\ImageGeneration.data"
-    ensure_file_exists(data_file, "None,False")  # Ensure file exists initially
+def StandInServer(latency: float = 0.2, failure_rate: float = 0.25):
+    """Local stand-in for the inference API: returns a small PNG per seed after `latency`,
+    and fails a share of requests with 503 to exercise the retries. Returns (server, url)."""
+    import struct
+    import zlib
+    from time import sleep
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 
-    while True:
-        try:
-            with open(data_file, "r") as f:
-                data = f.read().strip()
-            if not data:
-                logging.debug("No data in ImageGeneration.data, waiting...")
-                sleep(1)
-                continue
-
-            prompt, status = data.split(",", 1)
-            status = status.strip()
-
-            if status.lower() == "true":
-                logging.info(f"Generating images for prompt: {prompt}")
-                success = GenerateImages(prompt)
-                with open(data_file, "w") as f:
-                    f.write(f"{prompt},False" if success else "None,False")
-                logging.info("Image generation completed" if success else "Image generation failed")
-                break  # Exit after one successful run (adjust as needed)
-            else:
-                logging.debug(f"Status is {status}, waiting...")
-                sleep(1)
-
-        except FileNotFoundError:
-            logging.warning(f"{data_file} not found, creating it")
-            ensure_file_exists(data_file, "None,False")
-            sleep(1)
-        except Exception as e:
-            logging.error(f"Error in image generation loop: {e}")
-            sleep(1)
+    def Png(seed: int) -> bytes:
+        def chunk(kind, data):
+            return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+        row = b"\x00" + bytes([seed % 256, seed // 256 % 256, 128]) * 64
+        return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", 64, 64, 8, 2, 0, 0, 0))
+                + chunk(b"IDAT", zlib.compress(row * 64)) + chunk(b"IEND", b""))
 
-def ensure_file_exists(path, default_content=""):
-    """Create file and directory if they don’t exist."""
-    try:
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        if not os.path.exists(path):
-            with open(path, "w", encoding="utf-8") as f:
-                f.write(default_content)
-    except Exception as e:
-        logging.error(f"Failed to ensure file exists at {path}: {e}")
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            sleep(latency)
+            if random.random() < failure_rate:
+                self.send_response(503)
+                self.send_header("Retry-After", "0")
+                self.end_headers()
+                return
+            body = Png(payload["parameters"]["seed"])
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import sys
+    if "--stand-in" in sys.argv:
+        # Batch against a local stand-in API, fresh and repeatable: python -m Backend.ImageGeneration --stand-in
+        from Backend.Metrics import GetMetrics
+        server, url = StandInServer()
+        generator = ImageGenerator(url)
+        prompts = {"a red fox in snow": 4, "city skyline at dusk": 4, "a bowl of ramen": 2, "lighthouse in a storm": 4}
+        seen = set()
+        for label, repeatable in (("fresh", False), ("again", False), ("pinned", True), ("repeat", True)):
+            start = monotonic()
+            results = runtime.run(generator.generate_batch(prompts, repeatable=repeatable))
+            paths = {path for paths in results.values() for path in paths}
+            print(f"{label:6} {len(paths)} images for {len(prompts)} prompts in {monotonic() - start:.2f}s, "
+                  f"{len(paths - seen)} not seen before")
+            seen |= paths
+        generator.store.thumbnails.shutdown(wait=True)
+        print(GetMetrics()["counters"])
+        server.shutdown()
+    else:
+        # One-off generation: python -m Backend.ImageGeneration "a prompt"; the assistant uses Backend.ImageWorker
+        GenerateImages(" ".join(sys.argv[1:]))
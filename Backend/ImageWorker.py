@@ -0,0 +1,232 @@
+import os
+import sys
+import uuid
+import asyncio
+import threading
+import subprocess
+import logging
+from dataclasses import dataclass, field
+from multiprocessing.connection import Listener, Client
+from time import time
+from Backend.Metrics import IncrementCounter, RecordLatency
+
+CONCURRENCY = 2  # Jobs generating at once in the worker; the rest wait in its queue
+CONNECT_TIMEOUT = 30.0  # Seconds for a freshly started worker to connect back
+AUTHKEY_VARIABLE = "IMAGE_WORKER_AUTHKEY"
+
+@dataclass
+class ImageJob:
+    id: str
+    prompts: list[str]
+    variants: int = 4  # Images per prompt
+    status: str = "queued"  # queued, running, done, failed, cancelled
+    progress: float = 0.0
+    paths: list[str] = field(default_factory=list)
+    error: str | None = None
+    submitted: float = field(default_factory=time)
+    finished: float | None = None
+    completed: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def prompt(self) -> str:
+        return "; ".join(self.prompts)
+
+    @property
+    def finished_ok(self) -> bool:
+        return self.status == "done"
+
+class ImageWorker:
+    """Client for one long-lived image generation process.
+
+    The worker is started with `python -m Backend.ImageWorker --serve` on
+    first use and connects back over an authenticated local socket, so the
+    interpreter, HTTP clients and imports are paid for once. Jobs are
+    identified by id; progress, completion, failure and cancellation arrive
+    as events that update the ImageJob and are passed to subscribers.
+    """
+
+    def __init__(self, concurrency: int = CONCURRENCY):
+        self.concurrency = concurrency
+        self.jobs = {}
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.send_lock = threading.Lock()
+        self.process = None
+        self.connection = None
+
+    def start(self) -> None:
+        with self.lock:
+            if self.connection is not None and self.process.poll() is None:
+                return
+            authkey = os.urandom(16)
+            listener = Listener(("127.0.0.1", 0), authkey=authkey)
+            environment = dict(os.environ, **{AUTHKEY_VARIABLE: authkey.hex()})
+            process = subprocess.Popen(
+                [sys.executable, "-m", "Backend.ImageWorker", "--serve", str(listener.address[1]), str(self.concurrency)],
+                env=environment,
+            )
+            accepted = {}
+            acceptor = threading.Thread(target=lambda: accepted.setdefault("connection", listener.accept()), daemon=True)
+            acceptor.start()
+            acceptor.join(CONNECT_TIMEOUT)
+            listener.close()
+            if "connection" not in accepted:
+                process.kill()
+                raise RuntimeError("Image worker did not connect")
+            self.process, self.connection = process, accepted["connection"]
+            threading.Thread(target=self._read, args=(self.connection,), name="ImageWorkerEvents", daemon=True).start()
+
+    def _send(self, *message) -> None:
+        with self.send_lock:
+            self.connection.send(message)
+
+    def _read(self, connection) -> None:
+        while True:
+            try:
+                message = connection.recv()
+            except (EOFError, OSError):
+                break
+            self._handle(*message)
+        with self.lock:
+            if self.connection is connection:
+                logging.error("Image worker exited unexpectedly")
+                self.connection = None
+            lost = [job for job in self.jobs.values() if not job.completed.is_set()]
+        for job in lost:
+            self._finish(job, "failed", error="image worker exited")
+
+    def _handle(self, kind: str, job_id: str, *details) -> None:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        if kind == "started":
+            job.status = "running"
+            self._notify(job)
+        elif kind == "progress":
+            done, total = details
+            job.progress = done / total
+            self._notify(job)
+        elif kind == "done":
+            job.paths = list(details[0])
+            self._finish(job, "done")
+        elif kind == "failed":
+            self._finish(job, "failed", error=details[0])
+        elif kind == "cancelled":
+            self._finish(job, "cancelled")
+
+    def _finish(self, job: ImageJob, status: str, error: str | None = None) -> None:
+        job.status, job.error, job.finished = status, error, time()
+        if status == "done":
+            job.progress = 1.0
+        IncrementCounter(f"images.{status}")
+        RecordLatency("images.job", job.finished - job.submitted)
+        job.completed.set()
+        self._notify(job)
+
+    def _notify(self, job: ImageJob) -> None:
+        for callback in list(self.subscribers):
+            try:
+                callback(job)
+            except Exception as e:
+                logging.error(f"Image job subscriber failed: {e}")
+
+    def subscribe(self, callback):
+        """Call callback(job) whenever a job starts, progresses or finishes; returns an unsubscribe function."""
+        self.subscribers.append(callback)
+        return lambda: callback in self.subscribers and self.subscribers.remove(callback)
+
+    def submit(self, *prompts: str, variants: int = 4) -> ImageJob:
+        """Queue one job generating `variants` images for each prompt, as a single batch."""
+        job = ImageJob(uuid.uuid4().hex[:12], list(prompts), variants)
+        self.jobs[job.id] = job
+        self.start()
+        self._send("submit", job.id, job.prompts, variants)
+        return job
+
+    def cancel(self, job_id: str) -> None:
+        job = self.jobs.get(job_id)
+        if job is not None and not job.completed.is_set() and self.connection is not None:
+            self._send("cancel", job_id)
+
+    def wait(self, job_id: str, timeout: float | None = None) -> ImageJob:
+        job = self.jobs[job_id]
+        job.completed.wait(timeout)
+        return job
+
+    def stop(self) -> None:
+        with self.lock:
+            process, connection = self.process, self.connection
+            self.process = self.connection = None
+        if connection is not None:
+            try:
+                with self.send_lock:
+                    connection.send(("stop", ""))
+            except OSError:
+                pass
+        if process is not None:
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+def Serve(port: int, concurrency: int) -> None:
+    """Worker side: run jobs from the parent on one event loop, at most `concurrency` at a time."""
+    from Backend.ImageGeneration import image_generator
+    connection = Client(("127.0.0.1", port), authkey=bytes.fromhex(os.environ[AUTHKEY_VARIABLE]))
+    loop = asyncio.new_event_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = {}
+
+    async def run(job_id: str, prompts: list[str], variants: int) -> None:
+        try:
+            async with semaphore:
+                connection.send(("started", job_id))
+                results = await image_generator.generate_batch(
+                    dict.fromkeys(prompts, variants), lambda done, total: connection.send(("progress", job_id, done, total))
+                )
+                paths = [path for prompt in prompts for path in results[prompt]]
+            connection.send(("done", job_id, paths) if paths else ("failed", job_id, "no images were returned"))
+        except asyncio.CancelledError:
+            connection.send(("cancelled", job_id))
+        except Exception as e:
+            connection.send(("failed", job_id, str(e)))
+        finally:
+            tasks.pop(job_id, None)
+
+    def handle(kind: str, job_id: str, *details) -> None:
+        if kind == "submit":
+            tasks[job_id] = loop.create_task(run(job_id, *details))
+        elif kind == "cancel" and job_id in tasks:
+            tasks[job_id].cancel()
+        elif kind == "stop":
+            loop.stop()
+
+    def read() -> None:
+        while True:
+            try:
+                message = connection.recv()
+            except (EOFError, OSError):
+                message = ("stop", "")
+            loop.call_soon_threadsafe(handle, *message)
+            if message[0] == "stop":
+                return
+
+    threading.Thread(target=read, daemon=True).start()
+    loop.run_forever()
+
+image_worker = ImageWorker()
+
+if __name__ == "__main__":
+    if "--serve" in sys.argv:
+        index = sys.argv.index("--serve")
+        Serve(int(sys.argv[index + 1]), int(sys.argv[index + 2]))
+    else:
+        # Run from the project root: python -m Backend.ImageWorker "prompt one" "prompt two" ...
+        # (one job per prompt, plus one batch job with all of them)
+        image_worker.subscribe(lambda job: print(f"{job.id} {job.status:9} {job.progress:4.0%} {job.prompt!r} {job.error or ''}"))
+        submitted = [image_worker.submit(prompt) for prompt in sys.argv[1:]] + [image_worker.submit(*sys.argv[1:])]
+        for job in submitted:
+            image_worker.wait(job.id)
+        for job in submitted:
+            print(job.id, job.status, job.paths)
+        image_worker.stop()
@@ -0,0 +1,242 @@
+import os
+import re
+import json
+import math
+import threading
+import logging
+from time import perf_counter
+from dotenv import dotenv_values
+
+# Load environment variables
+env_vars = dotenv_values(".env")
+ConfidenceThreshold = float(env_vars.get("IntentConfidenceThreshold", 0.9))
+
+DECISION_LOG_PATH = os.path.join("Data", "DecisionLog.jsonl")
+
+# Categories the decision layer can emit, longest first so "google search" wins over "google"
+CATEGORIES = sorted([
+    "exit", "general", "realtime", "open", "close", "play", "generate image", "system", "content",
+    "google search", "youtube search", "reminder"
+], key=len, reverse=True)
+
+# Categories the n-gram model may emit on its own: they echo the query instead of extracting arguments
+QUERY_CATEGORIES = ("general", "realtime", "exit")
+
+# Minimum number of labelled examples before the n-gram model is trusted at all
+MIN_TRAINING_EXAMPLES = 20
+RULE_CONFIDENCE = 1.0
+
+RULES = [
+    (re.compile(r"^(?:google search|search google for|search on google for)\s+(.+)$"), "google search"),
+    (re.compile(r"^search\s+(.+?)\s+on\s+google$"), "google search"),
+    (re.compile(r"^(?:youtube search|search youtube for|search on youtube for)\s+(.+)$"), "youtube search"),
+    (re.compile(r"^search\s+(.+?)\s+on\s+youtube$"), "youtube search"),
+    (re.compile(r"^(?:open|launch)\s+(.+)$"), "open"),
+    (re.compile(r"^close\s+(.+)$"), "close"),
+    (re.compile(r"^play\s+(.+)$"), "play"),
+    (re.compile(r"^(?:system\s+)?(?:please\s+)?(?:turn\s+)?(?:the\s+)?(mute|unmute|volume up|volume down)$"), "system"),
+]
+
+# "open chrome and firefox" -> the bare "firefox" clause inherits the verb
+CARRY_CATEGORIES = ("open", "close")
+# "play rock and roll" -> the trailing clause belongs to the argument
+ABSORB_CATEGORIES = ("play", "google search", "youtube search")
+CLAUSE_SEPARATOR = re.compile(r"(\s*,\s*|\s+and\s+|\s+then\s+)")
+QUESTION_WORDS = ("how", "what", "where", "when", "which", "why", "who", "whose", "whom", "tell", "can", "is", "are")
+
+def NormalizeText(text: str) -> str:
+    """Lower-case and strip the punctuation QueryModifier adds."""
+    return re.sub(r"\s+", " ", text.lower()).strip().rstrip(".?!").strip()
+
+def Tokenize(text: str) -> list[str]:
+    return re.findall(r"[a-z0-9']+", text.lower())
+
+def DecisionCategory(decision: str) -> str | None:
+    for category in CATEGORIES:
+        if decision == category or decision.startswith(category + " "):
+            return category
+    return None
+
+class NGramModel:
+    """Multinomial naive Bayes over word unigrams and bigrams."""
+
+    def __init__(self):
+        self.label_counts = {}
+        self.feature_counts = {}
+        self.feature_totals = {}
+        self.vocabulary = set()
+        self.examples = 0
+
+    @staticmethod
+    def features(text: str) -> list[str]:
+        words = ["<s>"] + Tokenize(text) + ["</s>"]
+        return words[1:-1] + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def learn(self, text: str, label: str) -> None:
+        self.examples += 1
+        self.label_counts[label] = self.label_counts.get(label, 0) + 1
+        counts = self.feature_counts.setdefault(label, {})
+        for feature in self.features(text):
+            counts[feature] = counts.get(feature, 0) + 1
+            self.feature_totals[label] = self.feature_totals.get(label, 0) + 1
+            self.vocabulary.add(feature)
+
+    def predict(self, text: str) -> tuple[str | None, float]:
+        """Return the most likely label and its posterior probability."""
+        if not self.label_counts:
+            return None, 0.0
+        features = self.features(text)
+        vocabulary_size = len(self.vocabulary) + 1
+        scores = {}
+        for label, label_count in self.label_counts.items():
+            counts = self.feature_counts[label]
+            denominator = self.feature_totals.get(label, 0) + vocabulary_size
+            score = math.log(label_count / self.examples)
+            for feature in features:
+                score += math.log((counts.get(feature, 0) + 1) / denominator)
+            scores[label] = score
+        best = max(scores, key=scores.get)
+        total = sum(math.exp(score - scores[best]) for score in scores.values())
+        return best, 1.0 / total
+
+class IntentClassifier:
+    """Local fast path in front of the Cohere decision model."""
+
+    def __init__(self):
+        self.model = NGramModel()
+        self.lock = threading.Lock()
+
+    def learn(self, query: str, decision: list[str]) -> None:
+        """Train on a (query, decision) pair when it maps to a single query-echoing category."""
+        if len(decision) != 1:
+            return
+        category = DecisionCategory(decision[0])
+        if category in QUERY_CATEGORIES:
+            with self.lock:
+                self.model.learn(NormalizeText(query), category)
+
+    def predict_clause(self, clause: str) -> tuple[str | None, float]:
+        with self.lock:
+            if self.model.examples < MIN_TRAINING_EXAMPLES:
+                return None, 0.0
+            label, confidence = self.model.predict(clause)
+        if label == "exit":
+            return "exit", confidence
+        return f"{label} {clause}", confidence
+
+    @staticmethod
+    def match_rule(clause: str) -> tuple[str, str] | None:
+        for pattern, category in RULES:
+            match = pattern.match(clause)
+            if match:
+                return category, match.group(1).strip()
+        return None
+
+    def classify(self, query: str) -> tuple[list[str], float]:
+        """Return a decision list in FirstLayerDMM's shape and a confidence in [0, 1]."""
+        text = NormalizeText(query)
+        if not text:
+            return [], 0.0
+
+        parts = CLAUSE_SEPARATOR.split(text)
+        clauses, separators = parts[0::2], [""] + parts[1::2]
+        decisions = []
+        confidence = RULE_CONFIDENCE
+        for clause, separator in zip(clauses, separators):
+            rule = self.match_rule(clause)
+            if rule:
+                decisions.append(list(rule))
+                continue
+            last = decisions[-1] if decisions and len(decisions[-1]) == 2 else None
+            if last and last[0] in ABSORB_CATEGORIES:
+                last[1] += separator + clause
+            elif last and last[0] in CARRY_CATEGORIES and len(clause.split()) <= 2 and not clause.startswith(QUESTION_WORDS):
+                decisions.append([last[0], clause])
+            else:
+                decision, clause_confidence = self.predict_clause(clause)
+                if decision is None:
+                    break
+                decisions.append([decision])
+                confidence = min(confidence, clause_confidence)
+        else:
+            return [" ".join(decision) for decision in decisions], confidence
+
+        # Some clause was not understood locally: fall back to a whole-query prediction
+        decision, confidence = self.predict_clause(text)
+        return ([decision], confidence) if decision else ([], 0.0)
+
+def LoadDecisionLog(path: str = DECISION_LOG_PATH) -> list[dict]:
+    entries = []
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return entries
+
+def LogDecision(query: str, decision: list[str], latency: float, path: str = DECISION_LOG_PATH) -> None:
+    """Record a remote decision (and its latency) and learn from it online."""
+    classifier.learn(query, decision)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as file:
+            file.write(json.dumps({"query": query, "decision": decision, "latency": latency}) + "\n")
+    except OSError as e:
+        logging.error(f"Failed to log decision: {e}")
+
+def TrainFromChatHistory(chat_history: list[dict]) -> None:
+    """Train on the few-shot User/Chatbot pairs used as the Cohere prompt."""
+    for user, bot in zip(chat_history[0::2], chat_history[1::2]):
+        decision = [item.strip() for item in bot["message"].split(",")]
+        classifier.learn(user["message"], decision)
+
+def ClassifyIntent(query: str) -> tuple[list[str], float]:
+    return classifier.classify(query)
+
+classifier = IntentClassifier()
+for entry in LoadDecisionLog():
+    classifier.learn(entry["query"], entry["decision"])
+
+def Benchmark(corpus_path: str = DECISION_LOG_PATH, chat_history: list[dict] | None = None) -> dict:
+    """Replay a logged query corpus in order and report hit rate and latency saved.
+
+    Each entry is classified locally before the model learns it, exactly as
+    in production, so the numbers reflect online behaviour.
+    """
+    global classifier
+    corpus = LoadDecisionLog(corpus_path)
+    classifier = IntentClassifier()
+    if chat_history:
+        TrainFromChatHistory(chat_history)
+
+    hits = correct = 0
+    local_time = remote_time_saved = 0.0
+    for entry in corpus:
+        start = perf_counter()
+        decision, confidence = ClassifyIntent(entry["query"])
+        local_time += perf_counter() - start
+        if decision and confidence >= ConfidenceThreshold:
+            hits += 1
+            correct += decision == entry["decision"]
+            remote_time_saved += entry.get("latency", 0.0)
+        classifier.learn(entry["query"], entry["decision"])
+
+    total = len(corpus)
+    return {
+        "queries": total,
+        "hits": hits,
+        "hit_rate": hits / total if total else 0.0,
+        "agreement": correct / hits if hits else 0.0,
+        "local_ms_per_query": 1000 * local_time / total if total else 0.0,
+        "latency_saved_s": remote_time_saved - local_time,
+    }
+
+if __name__ == "__main__":
+    # Run from the project root: python -m Backend.IntentClassifier [corpus.jsonl]
+    import sys
+    from Backend.Model import ChatHistory
+    print(Benchmark(sys.argv[1] if len(sys.argv) > 1 else DECISION_LOG_PATH, ChatHistory))
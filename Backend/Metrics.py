@@ -0,0 +1,54 @@
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+
+# Process-wide counters and latency aggregates shared by the backends
+_lock = threading.Lock()
+_counters = {}
+_latencies = {}
+_values = {}
+
+def _aggregate(table: dict, name: str, value: float) -> None:
+    stats = table.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+    stats["count"] += 1
+    stats["total"] += value
+    stats["max"] = max(stats["max"], value)
+
+def _summarize(table: dict) -> dict:
+    return {
+        name: {**stats, "avg": stats["total"] / stats["count"] if stats["count"] else 0.0}
+        for name, stats in table.items()
+    }
+
+def IncrementCounter(name: str, amount: int = 1) -> None:
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+def RecordLatency(name: str, seconds: float) -> None:
+    """Add one latency sample (in seconds) to the named aggregate."""
+    with _lock:
+        _aggregate(_latencies, name, seconds)
+
+def RecordValue(name: str, value: float) -> None:
+    """Add one sample of a non-time quantity (sizes, token counts) to the named aggregate."""
+    with _lock:
+        _aggregate(_values, name, value)
+
+@contextmanager
+def MeasureLatency(name: str):
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        RecordLatency(name, perf_counter() - start)
+
+def GetMetrics() -> dict:
+    """Return a snapshot of all counters and aggregates."""
+    with _lock:
+        return {"counters": dict(_counters), "latencies": _summarize(_latencies), "values": _summarize(_values)}
+
+def ResetMetrics() -> None:
+    with _lock:
+        _counters.clear()
+        _latencies.clear()
+        _values.clear()
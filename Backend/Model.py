@@ -1,6 +1,10 @@
 import cohere
 from rich import print
 from dotenv import dotenv_values
+from time import perf_counter
+from Backend.IntentClassifier import ClassifyIntent, ConfidenceThreshold, LogDecision, TrainFromChatHistory
+from Backend.Metrics import IncrementCounter, RecordLatency
+from Backend.DecisionCache import decision_cache
 
 # Load environment variables
 env_vars = dotenv_values(".env")
@@ -9,6 +13,9 @@ CohereAPIKey = env_vars.get("CohereAPIKey")
 # Initialize Cohere Client
 co = cohere.Client(api_key=CohereAPIKey)
 
+# Extra Cohere calls allowed when a response still contains the "(query)" placeholder
+MAX_RETRIES = 2
+
 # List of valid functions
 funcs = [
     "exit", "general", "realtime", "open", "close", "play", "generate image", "system", "content", "google search", "youtube search", "reminder"
@@ -52,8 +59,11 @@ ChatHistory = [
     {"role": "Chatbot", "message": "general chat with me."}
 ]
 
-def FirstLayerDMM(prompt: str = "test"):
-    messages.append({"role": "user", "content": f"{prompt}"})
+# Seed the local classifier with the same few-shot examples Cohere sees
+TrainFromChatHistory(ChatHistory)
+
+def RemoteDecision(prompt: str) -> list[str]:
+    """Ask Cohere for a decision; raises on API errors."""
     stream = None
     try:
         # Initialize the generator
@@ -79,25 +89,48 @@ def FirstLayerDMM(prompt: str = "test"):
         response = [i.strip() for i in response]
 
         # Filter valid tasks
-        filtered_response = [
+        return [
             task for task in response
             if any(task.startswith(func) for func in funcs)
         ]
-
-        # Handle recursive case for "(query)"
-        if "(query)" in filtered_response:
-            return FirstLayerDMM(prompt=prompt)
-        else:
-            return filtered_response
-
-    except Exception as e:
-        print(f"Error: {e}")
-        return ["general (query)"]  # Fallback response
     finally:
         # Ensure the generator is properly closed
         if stream is not None:
             stream.close()
 
+def FirstLayerDMM(prompt: str = "test"):
+    cached = decision_cache.get(prompt)
+    if cached:
+        return cached
+
+    # Fast path: answer locally when the rules or n-gram model are confident enough
+    decision, confidence = ClassifyIntent(prompt)
+    if decision and confidence >= ConfidenceThreshold:
+        IncrementCounter("dmm.local_hits")
+        return decision
+    IncrementCounter("dmm.remote_calls")
+
+    messages.append({"role": "user", "content": f"{prompt}"})
+    start = perf_counter()
+    try:
+        # Retry a bounded number of times when the model echoes the "(query)" placeholder
+        for attempt in range(MAX_RETRIES + 1):
+            filtered_response = RemoteDecision(prompt)
+            if not any("(query)" in task for task in filtered_response):
+                latency = perf_counter() - start
+                RecordLatency("dmm.remote", latency)
+                LogDecision(prompt, filtered_response, latency)
+                decision_cache.put(prompt, filtered_response)
+                return filtered_response
+            IncrementCounter("dmm.retries")
+
+        print(f"Error: no usable decision after {MAX_RETRIES + 1} attempts")
+        return [f"general {prompt}"]
+
+    except Exception as e:
+        print(f"Error: {e}")
+        return [f"general {prompt}"]  # Same fallback as an unusable decision
+
 
 if __name__ == "__main__":
     while True:
@@ -0,0 +1,147 @@
+import os
+import re
+import json
+import threading
+import logging
+import requests
+from dataclasses import dataclass
+from time import time, monotonic
+from concurrent.futures import ThreadPoolExecutor, wait
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from Backend.Metrics import IncrementCounter, RecordLatency
+
+PAGE_CACHE_PATH = os.path.join("Data", "PageCache.json")
+MAX_WORKERS = 6
+REQUEST_TIMEOUT = 3.0  # Per page: connect plus download
+MAX_PAGE_BYTES = 1024 * 1024  # Stop reading a page after this much HTML
+MAX_TEXT_CHARS = 4000  # Extracted text kept per page
+MAX_CACHE_ENTRIES = 200
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/89.0.142.86 Safari/537.36"
+)
+NOISE_TAGS = ["script", "style", "noscript", "nav", "header", "footer", "aside", "form", "svg", "iframe"]
+
+@dataclass
+class PageDocument:
+    url: str
+    title: str
+    text: str
+    from_cache: bool = False
+
+def ExtractMainText(html: str) -> tuple[str, str]:
+    """Return (title, main text) of an HTML page, preferring <article>/<main> content."""
+    soup = BeautifulSoup(html, "html.parser")
+    title = soup.title.get_text(strip=True) if soup.title else ""
+    for tag in soup(NOISE_TAGS):
+        tag.decompose()
+    root = soup.find("article") or soup.find("main") or soup.body or soup
+    paragraphs = [element.get_text(" ", strip=True) for element in root.find_all(["p", "li", "h1", "h2", "h3"])]
+    text = "\n".join(paragraph for paragraph in paragraphs if len(paragraph) > 30)
+    if not text:
+        text = root.get_text(" ", strip=True)
+    return title, re.sub(r"[ \t]+", " ", text)[:MAX_TEXT_CHARS]
+
+class PageFetcher:
+    """Fetch result pages concurrently and extract their text, with HTTP revalidation caching."""
+
+    def __init__(self, cache_path: str | None = PAGE_CACHE_PATH, max_workers: int = MAX_WORKERS):
+        self.cache_path = cache_path
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="PageFetcher")
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": USER_AGENT})
+        self.session.mount("http://", HTTPAdapter(pool_maxsize=max_workers))
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=max_workers))
+        self.lock = threading.Lock()
+        self.cache = {}  # url -> {"title", "text", "etag", "last_modified", "time"}
+        if cache_path:
+            try:
+                with open(cache_path, "r", encoding="utf-8") as file:
+                    self.cache = json.load(file)
+            except (FileNotFoundError, json.JSONDecodeError):
+                pass
+
+    def save(self) -> None:
+        if not self.cache_path:
+            return
+        with self.lock:
+            snapshot = dict(self.cache)
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(self.cache_path + ".tmp", "w", encoding="utf-8") as file:
+                json.dump(snapshot, file)
+            os.replace(self.cache_path + ".tmp", self.cache_path)
+        except OSError as e:
+            logging.error(f"Failed to save page cache: {e}")
+
+    def fetch(self, url: str, timeout: float = REQUEST_TIMEOUT, max_bytes: int = MAX_PAGE_BYTES) -> PageDocument | None:
+        """Fetch one page, revalidating a cached copy with ETag/Last-Modified; None if it cannot be read.
+
+        Any failure (network, decoding, parsing) only skips this page. A body cut
+        off by max_bytes or the deadline is returned but not cached, since its
+        validators describe the whole page.
+        """
+        deadline = monotonic() + timeout
+        with self.lock:
+            cached = self.cache.get(url)
+        headers = {}
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        start = monotonic()
+        try:
+            with self.session.get(url, headers=headers, timeout=timeout, stream=True) as response:
+                if response.status_code == 304 and cached:
+                    IncrementCounter("pages.not_modified")
+                    return PageDocument(url, cached["title"], cached["text"], from_cache=True)
+                response.raise_for_status()
+                if "html" not in response.headers.get("Content-Type", "html"):
+                    return None
+                body = bytearray()
+                truncated = False
+                for chunk in response.iter_content(chunk_size=16384):
+                    body += chunk
+                    if len(body) >= max_bytes or monotonic() > deadline:
+                        truncated = True
+                        break
+                html = bytes(body).decode(response.encoding or "utf-8", errors="replace")
+                etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+            title, text = ExtractMainText(html)
+        except requests.exceptions.RequestException as e:
+            IncrementCounter("pages.errors")
+            logging.debug(f"Page fetch failed for {url}: {e}")
+            return None
+        except Exception as e:
+            IncrementCounter("pages.errors")
+            logging.warning(f"Skipping unreadable page {url}: {e}")
+            return None
+        finally:
+            RecordLatency("pages.fetch", monotonic() - start)
+
+        if truncated:
+            IncrementCounter("pages.truncated")
+            return PageDocument(url, title, text)
+        with self.lock:
+            self.cache[url] = {"title": title, "text": text, "etag": etag, "last_modified": last_modified, "time": time()}
+            if len(self.cache) > MAX_CACHE_ENTRIES:
+                del self.cache[min(self.cache, key=lambda cached_url: self.cache[cached_url]["time"])]
+        return PageDocument(url, title, text)
+
+    def fetch_all(self, urls: list[str], budget: float) -> list[PageDocument]:
+        """Fetch pages in parallel and return whatever finished within the latency budget, in input order."""
+        start = monotonic()
+        futures = [self.executor.submit(self.fetch, url, min(REQUEST_TIMEOUT, budget)) for url in urls]
+        done, not_done = wait(futures, timeout=budget)
+        for future in not_done:
+            future.cancel()  # Pages already downloading finish in the background and warm the cache
+        IncrementCounter("pages.late", len(not_done))
+        RecordLatency("pages.fetch_all", monotonic() - start)
+        documents = [future.result() for future in futures if future in done and future.result()]
+        if documents:
+            self.executor.submit(self.save)
+        return documents
+
+page_fetcher = PageFetcher()
@@ -1,9 +1,11 @@
-import os
-import requests
 import datetime
-import json
 from dotenv import dotenv_values
 from groq import Groq
+from Backend.ConversationStore import conversation
+from Backend.ContextWindow import BuildContext, LLMSummarizer, realtime_summary
+from Backend.SearchClient import GOOGLE_CSE_URL, SearchClient, SearchResult
+from Backend.PageFetcher import page_fetcher
+from Backend.RetrievalIndex import RelevantContext
 
 # Load environment variables
 env_vars = dotenv_values(".env")
@@ -13,6 +15,11 @@ GroqAPIKey = env_vars.get("GroqAPIKey")
 Google_API_KEY = env_vars.get("Google_API_KEY")
 CSE_ID = env_vars.get("CSE_ID")  # Default CSE ID
 
+# Deep mode: also read the top result pages, within a latency budget
+DeepMode = env_vars.get("RealtimeDeepMode", "False").lower() == "true"
+DeepPages = int(env_vars.get("RealtimeDeepPages", 3))
+DeepBudget = float(env_vars.get("RealtimeDeepBudget", 2.5))
+
 # Validate API keys
 if not GroqAPIKey or not Google_API_KEY:
     raise ValueError("⚠️ Missing API Keys! Please check your .env file.")
@@ -20,16 +27,8 @@ if not GroqAPIKey or not Google_API_KEY:
 # Initialize Groq Client
 client = Groq(api_key=GroqAPIKey)
 
-# Chat log file path
-CHAT_LOG_PATH = "Data/ChatLog.json"
-os.makedirs(os.path.dirname(CHAT_LOG_PATH), exist_ok=True)
-
-# Load chat history
-try:
-    with open(CHAT_LOG_PATH, "r") as f:
-        messages = json.load(f)
-except (FileNotFoundError, json.JSONDecodeError):
-    messages = []
+# Fold old turns into a rolling summary written by the model itself
+realtime_summary.summarizer = LLMSummarizer(client, "llama3-70b-8192")
 
 # System instructions
 System = f"""Hello, I am {Username}, You are a very accurate AI chatbot named {Assistantname} with real-time web search.
@@ -37,35 +36,19 @@ System = f"""Hello, I am {Username}, You are a very accurate AI chatbot named {A
 *** Provide professional and well-structured answers using correct grammar. ***
 *** Never say "I don't know"—always attempt to find relevant information. ***"""
 
+# Pooled, cached Google Custom Search client
+search_client = SearchClient(Google_API_KEY, CSE_ID, base_url=env_vars.get("GoogleSearchURL", GOOGLE_CSE_URL))
+
 # Function to fetch real-time search results using Google Custom Search API
-def GoogleSearch(query):
-    try:
-        print("🔎 Searching Google for:", query)  # Debugging
-        url = f"https://www.googleapis.com/customsearch/v1?q={query}&key={Google_API_KEY}&cx={CSE_ID}"
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        # Extract relevant search results
-        results = data.get("items", [])
-        if not results:
-            return "⚠️ No relevant search results found."
-
-        # Format search results
-        search_summary = f"🔎 **Search results for:** `{query}`\n\n"
-        extracted_texts = []
-        for result in results[:5]:  # Limit to top 5 results
-            title = result.get("title", "No Title")
-            snippet = result.get("snippet", "No Description Available.")
-            link = result.get("link", "#")
-            extracted_texts.append(f"{title}: {snippet}")
-            search_summary += f"🔹 **{title}**\n📄 {snippet}\n🔗 [Read more]({link})\n\n"
-
-        # Return formatted response + extracted text (for AI processing)
-        return search_summary.strip(), "\n".join(extracted_texts)
-
-    except requests.exceptions.RequestException as e:
-        return f"⚠️ Error fetching search results: {e}", ""
+def GoogleSearch(query) -> SearchResult:
+    print("🔎 Searching Google for:", query)  # Debugging
+    return search_client.search(query)
+
+# Function to read the top result pages for deep mode
+def PageExtracts(search_result: SearchResult) -> str:
+    urls = [item["link"] for item in search_result.items[:DeepPages] if item["link"].startswith("http")]
+    documents = page_fetcher.fetch_all(urls, DeepBudget)
+    return "\n\n".join(f"Source: {document.title} ({document.url})\n{document.text}" for document in documents)
 
 # Function to get real-time system information
 def SystemInformation():
@@ -80,30 +63,40 @@ def SystemInformation():
 def AnswerModifier(answer):
     return "\n".join(line.strip() for line in answer.split('\n') if line.strip())
 
-# Main chatbot function
-def RealtimeSearchEngine(prompt):
-    global messages
-
+# Main chatbot function, streaming tokens as they arrive
+def RealtimeSearchEngineStream(prompt, deep=DeepMode):
     # Append user message
-    messages.append({"role": "user", "content": prompt})
+    conversation.append("user", prompt)
 
     # Get real-time search results
-    search_summary, extracted_search_text = GoogleSearch(prompt)
+    search_result = GoogleSearch(prompt)
 
     # Construct system context (search results go into AI model)
     system_context = [
         {"role": "system", "content": System},
         {"role": "system", "content": SystemInformation()},
-        {"role": "system", "content": search_summary},
-        {"role": "system", "content": f"Relevant search data:\n{extracted_search_text}"}
+        {"role": "system", "content": search_result.summary()},
+        {"role": "system", "content": f"Relevant search data:\n{search_result.text()}"}
     ]
+    if deep and search_result.items:
+        extracts = PageExtracts(search_result)
+        if extracts:
+            system_context.append({"role": "system", "content": f"Extracts from the top result pages:\n{extracts}"})
 
     # Call Groq's AI Model
+    answer = ""
     try:
         print("🧠 Processing AI response...")  # Debugging
         completion = client.chat.completions.create(
             model="llama3-70b-8192",
-            messages=system_context + messages,
+            messages=BuildContext(
+                "llama3-70b-8192",
+                system_context + RelevantContext(prompt),
+                conversation.messages,
+                max_output_tokens=2048,
+                summary=realtime_summary,
+                name="realtime"
+            ),
             temperature=0.7,
             max_tokens=2048,
             top_p=1,
@@ -111,18 +104,23 @@ def RealtimeSearchEngine(prompt):
             stop=None
         )
 
-        # Extract response text
-        answer = "".join(chunk.choices[0].delta.content for chunk in completion if chunk.choices[0].delta.content).strip()
+        for chunk in completion:
+            token = chunk.choices[0].delta.content
+            if token:
+                answer += token
+                yield token
 
     except Exception as e:
-        answer = f"⚠️ AI system error: {e}"
+        if not answer:
+            answer = f"⚠️ AI system error: {e}"
+            yield answer
 
-    # Save assistant response and chat history
-    messages.append({"role": "assistant", "content": answer})
-    with open(CHAT_LOG_PATH, "w") as f:
-        json.dump(messages, f, indent=4)
+    finally:
+        # Save assistant response to the shared conversation
+        conversation.append("assistant", answer.strip())
 
-    return AnswerModifier(answer)
+def RealtimeSearchEngine(prompt, deep=DeepMode):
+    return AnswerModifier("".join(RealtimeSearchEngineStream(prompt, deep)).strip())
 
 # Run chatbot in terminal loop
 if __name__ == "__main__":
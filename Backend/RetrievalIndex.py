@@ -0,0 +1,339 @@
+import os
+import re
+import sys
+import math
+import json
+import heapq
+import pickle
+import threading
+import logging
+import itertools
+import numpy as np
+from array import array
+from collections import Counter
+from Backend.ConversationStore import conversation
+from Backend.Metrics import RecordValue
+
+RETRIEVAL_INDEX_PATH = os.path.join("Data", "RetrievalIndex.pkl")
+RETRIEVAL_LOG_PATH = os.path.join("Data", "RetrievalIndex.log")
+COMPACT_EVERY = 2000  # Logged turns before the log is folded into a new snapshot
+MAX_EXCHANGE_CHARS = 600  # Per injected message
+K1 = 1.2
+B = 0.75
+IMPACT_CAP = 1000  # Postings scored per query term; longer lists are cut to their highest-impact entries
+STOP_WORDS = set("""
+a an and are as at be but by can could do does for from had has have he her his how i if in is it its
+me my no not of on or our she so that the their them then there these they this to was we were what
+when where which who why will with would you your yours please tell about
+""".split())
+
+def IndexTerms(text: str) -> list[str]:
+    return [word for word in re.findall(r"[a-z0-9']+", text.lower()) if word not in STOP_WORDS and len(word) > 1]
+
+class BM25Index:
+    """Incremental BM25 inverted index; document ids are positions in the indexed sequence.
+
+    Common terms have posting lists far longer than anything worth scoring
+    per query, so lists over IMPACT_CAP entries only contribute candidates
+    through their IMPACT_CAP highest-impact postings (term frequency against
+    document length) plus whatever was appended since that list was ranked.
+    The ranking is rebuilt lazily once the unranked tail grows too long.
+    search(exhaustive=True) takes candidates from every posting.
+    """
+
+    def __init__(self):
+        self.postings = {}  # term -> (array of doc ids, array of term frequencies)
+        self.impacts = {}  # term -> (postings ranked, [(doc id, frequency)] best first)
+        self.lengths = array("I")
+        self.total_length = 0
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def __getstate__(self) -> dict:
+        return {key: value for key, value in self.__dict__.items() if key not in ("lock", "impacts")}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.impacts = {}
+        self.lock = threading.Lock()
+
+    def add(self, text: str) -> int:
+        """Index one document in O(len(text)) and return its id."""
+        terms = IndexTerms(text)
+        return self.add_terms(Counter(terms), len(terms))
+
+    def add_terms(self, frequencies: dict, length: int) -> int:
+        """Index one document from its term frequencies and length in terms, as add() or a log replay has them."""
+        with self.lock:
+            doc_id = len(self.lengths)
+            for term, frequency in frequencies.items():
+                posting = self.postings.get(term)
+                if posting is None:
+                    posting = self.postings[term] = (array("I"), array("H"))
+                posting[0].append(doc_id)
+                posting[1].append(min(frequency, 65535))
+            self.lengths.append(length)
+            self.total_length += length
+        return doc_id
+
+    def _ranked(self, term: str, lengths: np.ndarray, average_length: float) -> np.ndarray:
+        """Doc ids of the IMPACT_CAP best postings of a long list, then those appended since it was ranked."""
+        doc_ids = np.frombuffer(self.postings[term][0], dtype=np.uint32)
+        ranked = self.impacts.get(term)
+        if ranked is None or len(doc_ids) - ranked[0] > IMPACT_CAP // 4:
+            frequencies = np.frombuffer(self.postings[term][1], dtype=np.uint16).astype(np.float32)
+            impact = frequencies / (frequencies + K1 * (1 - B + B * lengths[doc_ids] / average_length))
+            best = doc_ids[np.argpartition(-impact, IMPACT_CAP)[:IMPACT_CAP]]  # A copy, not a view
+            ranked = self.impacts[term] = (len(doc_ids), best)
+        covered, best = ranked
+        return np.concatenate([best, doc_ids[covered:]])
+
+    def search(self, query: str, k: int = 3, exclude_from: int | None = None, exhaustive: bool = False) -> list[tuple[int, float]]:
+        """Top-k (doc id, score) pairs; documents with id >= exclude_from are skipped.
+
+        Candidates are every document in the short posting lists plus the
+        ranked head of the long ones; each candidate then gets its exact
+        score from all query terms, so a document found through one term
+        still gets credit for the common terms it also contains.
+        """
+        with self.lock:
+            count = len(self.lengths)
+            if not count:
+                return []
+            average_length = self.total_length / count or 1.0
+            lengths = np.frombuffer(self.lengths, dtype=np.uint32)
+            terms = [term for term in set(IndexTerms(query)) if term in self.postings]
+            if not terms:
+                return []
+            candidates = np.unique(np.concatenate([
+                np.frombuffer(self.postings[term][0], dtype=np.uint32)
+                if exhaustive or len(self.postings[term][0]) <= IMPACT_CAP else self._ranked(term, lengths, average_length)
+                for term in terms
+            ]))
+            if exclude_from is not None:
+                candidates = candidates[candidates < exclude_from]
+            scores = np.zeros(len(candidates), dtype=np.float64)
+            norms = K1 * (1 - B + B * lengths[candidates] / average_length)
+            for term in terms:
+                doc_ids = np.frombuffer(self.postings[term][0], dtype=np.uint32)
+                frequencies = np.frombuffer(self.postings[term][1], dtype=np.uint16)
+                idf = math.log(1 + (count - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+                positions = np.minimum(np.searchsorted(doc_ids, candidates), len(doc_ids) - 1)
+                present = doc_ids[positions] == candidates
+                frequency = frequencies[positions[present]].astype(np.float64)
+                scores[present] += idf * frequency * (K1 + 1) / (frequency + norms[present])
+                del doc_ids, frequencies  # Views must not outlive the lock, or add() can't grow the arrays
+            del lengths
+            top = np.argsort(-scores)[:k] if len(scores) <= k else np.argpartition(-scores, k)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(int(candidates[i]), float(scores[i])) for i in top if scores[i] > 0]
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the index structures."""
+        with self.lock:
+            size = sys.getsizeof(self.postings) + sys.getsizeof(self.lengths)
+            for term, (doc_ids, frequencies) in self.postings.items():
+                size += sys.getsizeof(term) + sys.getsizeof(doc_ids) + sys.getsizeof(frequencies) + 56
+            for _, best in self.impacts.values():
+                size += best.nbytes + 112
+        return size
+
+class ConversationIndex:
+    """BM25 index over every conversation turn, persisted and kept up to date as turns are appended.
+
+    Each new turn's postings are appended to a log as one JSON line, so a
+    turn costs a short write however large the index is. Loading replays
+    the log over the last snapshot; once the log holds COMPACT_EVERY turns
+    it is folded into a new snapshot and emptied. The conversation store
+    stays the source of truth: anything missing from both is re-indexed.
+    """
+
+    def __init__(self, store, path: str = RETRIEVAL_INDEX_PATH, log_path: str = RETRIEVAL_LOG_PATH):
+        self.store = store
+        self.path = path
+        self.log_path = log_path
+        self.index = BM25Index()
+        self.logged = 0  # Turns in the log, i.e. indexed since the snapshot
+        self.compacting = False
+        self.loaded = False
+        self.load_lock = threading.Lock()  # Also serialises log writes with compaction
+        self._log = None
+
+    def _ensure_loaded(self) -> None:
+        with self.load_lock:
+            if self.loaded:
+                return
+            try:
+                with open(self.path, "rb") as file:
+                    self.index = pickle.load(file)
+            except (FileNotFoundError, pickle.UnpicklingError, EOFError, AttributeError):
+                self.index = BM25Index()
+            self.logged = self._replay()
+            if len(self.index) > len(self.store.messages):
+                # Snapshot and log belong to another history; rebuild
+                self.index = BM25Index()
+                self._truncate_log()
+            self._catch_up()
+            self.loaded = True
+            self._schedule_compaction()
+
+    def _replay(self) -> int:
+        """Add the turns logged since the snapshot; returns how many log lines there were."""
+        lines = 0
+        try:
+            with open(self.log_path, "r", encoding="utf-8") as file:
+                for line in file:
+                    lines += 1
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Cut short by a crash; _catch_up() re-indexes and re-logs the turn
+                    # Lines already in the snapshot, or after a gap, are skipped
+                    if record["id"] == len(self.index):
+                        self.index.add_terms(record["terms"], record["length"])
+            if lines and not line.endswith("\n"):
+                with open(self.log_path, "a", encoding="utf-8") as file:
+                    file.write("\n")  # The next record must not run on from the torn line
+        except FileNotFoundError:
+            pass
+        return lines
+
+    def _catch_up(self) -> int:
+        """Index messages appended since the last call and log their postings; returns how many were added."""
+        messages = self.store.messages
+        lines = []
+        while len(self.index) < len(messages):
+            terms = IndexTerms(messages[len(self.index)]["content"])
+            frequencies = Counter(terms)
+            doc_id = self.index.add_terms(frequencies, len(terms))
+            lines.append(json.dumps({"id": doc_id, "length": len(terms), "terms": frequencies}, ensure_ascii=False) + "\n")
+        if lines:
+            try:
+                if self._log is None:
+                    os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+                    self._log = open(self.log_path, "a", encoding="utf-8")
+                self._log.write("".join(lines))
+                self._log.flush()
+            except OSError as e:
+                logging.error(f"Failed to log retrieval postings: {e}")
+            self.logged += len(lines)
+        return len(lines)
+
+    def _truncate_log(self) -> None:
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        try:
+            open(self.log_path, "w").close()
+        except FileNotFoundError:
+            pass
+        self.logged = 0
+
+    def _schedule_compaction(self) -> None:
+        """Start a compaction once the log is long enough; call with load_lock held."""
+        if self.logged >= COMPACT_EVERY and not self.compacting:
+            self.compacting = True
+            threading.Thread(target=self.compact, daemon=True).start()
+
+    def on_append(self, message: dict) -> None:
+        with self.load_lock:
+            if not self.loaded:
+                return  # Picked up when the index is first loaded
+            self._catch_up()
+            self._schedule_compaction()
+
+    def compact(self) -> None:
+        """Write a snapshot of the whole index and empty the log; appends wait meanwhile, so none is lost."""
+        with self.load_lock:
+            self.compacting = False
+            if not self.loaded:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with self.index.lock:
+                    data = pickle.dumps(self.index, protocol=pickle.HIGHEST_PROTOCOL)
+                with open(self.path + ".tmp", "wb") as file:
+                    file.write(data)
+                os.replace(self.path + ".tmp", self.path)
+                self._truncate_log()
+            except (OSError, pickle.PicklingError) as e:
+                logging.error(f"Failed to compact retrieval index: {e}")
+        self.stats()  # Keeps index size in the metrics as it grows
+
+    def relevant_exchanges(self, query: str, k: int = 3, exclude_recent: int = 10) -> list[dict]:
+        """Top-k past user/assistant exchanges relevant to query, skipping the newest messages."""
+        self._ensure_loaded()
+        messages = self.store.messages
+        cutoff = max(0, len(messages) - exclude_recent)
+        starts = []
+        for doc_id, _ in self.index.search(query, k * 2, exclude_from=cutoff):
+            start = doc_id if messages[doc_id]["role"] == "user" else max(0, doc_id - 1)
+            if start not in starts:
+                starts.append(start)
+            if len(starts) == k:
+                break
+        # Oldest first, as they happened
+        return [message for start in sorted(starts) for message in messages[start:min(start + 2, cutoff)]]
+
+    def stats(self) -> dict:
+        self._ensure_loaded()
+        stats = {"documents": len(self.index), "terms": len(self.index.postings), "memory_bytes": self.index.memory_bytes()}
+        RecordValue("retrieval.documents", stats["documents"])
+        RecordValue("retrieval.memory_bytes", stats["memory_bytes"])
+        return stats
+
+def RelevantContext(query: str, k: int = 3) -> list[dict]:
+    """System message with the most relevant earlier exchanges, or nothing if there are none."""
+    messages = conversation_index.relevant_exchanges(query, k)
+    if not messages:
+        return []
+    lines = "\n".join(f"{message['role']}: {message['content'][:MAX_EXCHANGE_CHARS]}" for message in messages)
+    return [{"role": "system", "content": f"Relevant earlier exchanges:\n{lines}"}]
+
+conversation_index = ConversationIndex(conversation)
+conversation.subscribe(conversation_index.on_append)
+
+if __name__ == "__main__":
+    # Run from the project root: python -m Backend.RetrievalIndex [turns]
+    # Words follow a Zipf distribution like real text, so a few terms have very long posting lists
+    import random
+    from time import perf_counter
+    from Backend.Metrics import GetMetrics
+
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    random.seed(0)
+    vocabulary = [f"word{i}" for i in range(50000)]
+    weights = list(itertools.accumulate(1 / (rank + 1) ** 1.07 for rank in range(len(vocabulary))))
+
+    def Words(count):
+        return random.choices(vocabulary, cum_weights=weights, k=count)
+
+    index = BM25Index()
+    start = perf_counter()
+    for _ in range(turns):
+        index.add(" ".join(Words(random.randint(5, 40))))
+    build = perf_counter() - start
+
+    def Measure(exhaustive):
+        random.seed(1)
+        timings, results = [], []
+        for _ in range(300):
+            query = " ".join(Words(random.randint(3, 8)))
+            start = perf_counter()
+            results.append(index.search(query, 6, exclude_from=turns - 10, exhaustive=exhaustive))
+            timings.append(perf_counter() - start)
+        timings.sort()
+        return timings[len(timings) // 2], timings[int(len(timings) * 0.95)], results
+
+    exact_p50, exact_p95, exact = Measure(True)
+    Measure(False)  # Ranks the long posting lists once, as the first queries after startup would
+    p50, p95, pruned = Measure(False)
+    overlap = sum(len({d for d, _ in a} & {d for d, _ in b}) for a, b in zip(exact, pruned)) / sum(len(a) for a in exact)
+    print(f"indexed {turns} turns: {build / turns * 1e6:.1f} us/turn")
+    print(f"exhaustive query p50 {exact_p50 * 1000:.2f} ms, p95 {exact_p95 * 1000:.2f} ms")
+    print(f"pruned query     p50 {p50 * 1000:.2f} ms, p95 {p95 * 1000:.2f} ms, top-6 overlap with exhaustive {overlap:.1%}")
+    print(f"memory ~{index.memory_bytes() / 1e6:.1f} MB for {len(index.postings)} terms")
+    RecordValue("retrieval.memory_bytes", index.memory_bytes())
+    print(GetMetrics()["values"])
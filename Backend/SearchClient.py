@@ -0,0 +1,250 @@
+import os
+import re
+import json
+import atexit
+import threading
+import logging
+import requests
+from dataclasses import dataclass, field
+from time import time, monotonic, sleep
+from requests.adapters import HTTPAdapter
+from Backend.Metrics import IncrementCounter, RecordLatency
+
+GOOGLE_CSE_URL = "https://www.googleapis.com/customsearch/v1"
+SEARCH_CACHE_PATH = os.path.join("Data", "SearchCache.json")
+CACHE_TTL = 15 * 60  # Fresh for this long
+STALE_TTL = 6 * 60 * 60  # Then served stale (to popular queries) while revalidating
+POPULAR_HITS = 2  # Lookups before a query counts as popular
+MAX_CACHE_ENTRIES = 500
+SAVE_EVERY = 5  # Flush the cache to disk after this many new results (and always at exit)
+REQUESTS_PER_SECOND = 1.0  # Per API key
+BURST = 5
+MAX_RATE_WAIT = 5.0
+RESULT_COUNT = 5
+
+@dataclass
+class SearchResult:
+    query: str
+    items: list[dict] = field(default_factory=list)  # {"title", "snippet", "link"}
+    error: str | None = None
+    from_cache: bool = False
+    stale: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def summary(self) -> str:
+        """Markdown summary shown to the model alongside the raw snippets."""
+        if self.error:
+            return f"⚠️ Error fetching search results: {self.error}"
+        if not self.items:
+            return "⚠️ No relevant search results found."
+        summary = f"🔎 **Search results for:** `{self.query}`\n\n"
+        for item in self.items:
+            summary += f"🔹 **{item['title']}**\n📄 {item['snippet']}\n🔗 [Read more]({item['link']})\n\n"
+        return summary.strip()
+
+    def text(self) -> str:
+        return "\n".join(f"{item['title']}: {item['snippet']}" for item in self.items)
+
+def NormalizeSearchQuery(query: str) -> str:
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s'+#.-]", " ", query.lower())).strip(" .")
+
+class RateLimiter:
+    """Token bucket; acquire() waits for a token up to max_wait seconds."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, max_wait: float = MAX_RATE_WAIT) -> bool:
+        deadline = monotonic() + max_wait
+        while True:
+            with self.lock:
+                now = monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            sleep(wait)
+
+class SearchClient:
+    """Google Custom Search client with connection pooling, caching and rate limiting."""
+
+    def __init__(self, api_key: str, cse_id: str, base_url: str = GOOGLE_CSE_URL,
+                 cache_path: str | None = SEARCH_CACHE_PATH, ttl: float = CACHE_TTL, stale_ttl: float = STALE_TTL):
+        self.api_key = api_key
+        self.cse_id = cse_id
+        self.base_url = base_url
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        self.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        self.limiters = {}
+        self.lock = threading.Lock()
+        self.cache = {}  # normalized query -> {"items", "time", "hits"}
+        self.refreshing = set()
+        self.unsaved = 0
+        self.save_lock = threading.Lock()  # Saves from searches, refreshes and exit share one tmp file
+        self.load()
+        if cache_path:
+            atexit.register(self.save)
+
+    def load(self) -> None:
+        if not self.cache_path:
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as file:
+                self.cache = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.cache = {}
+
+    def save(self) -> None:
+        if not self.cache_path:
+            return
+        with self.save_lock:
+            with self.lock:
+                snapshot = dict(self.cache)
+                self.unsaved = 0
+            IncrementCounter("search.cache_saves")
+            try:
+                os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+                with open(self.cache_path + ".tmp", "w", encoding="utf-8") as file:
+                    json.dump(snapshot, file)
+                os.replace(self.cache_path + ".tmp", self.cache_path)
+            except OSError as e:
+                logging.error(f"Failed to save search cache: {e}")
+
+    def limiter(self) -> RateLimiter:
+        with self.lock:
+            return self.limiters.setdefault(self.api_key, RateLimiter(REQUESTS_PER_SECOND, BURST))
+
+    def fetch(self, query: str) -> SearchResult:
+        """Query the API directly, bypassing the cache."""
+        if not self.limiter().acquire():
+            IncrementCounter("search.rate_limited")
+            return SearchResult(query, error="rate limit exceeded")
+        start = monotonic()
+        try:
+            response = self.session.get(
+                self.base_url,
+                params={"q": query, "key": self.api_key, "cx": self.cse_id, "num": RESULT_COUNT},
+                timeout=10,
+            )
+            response.raise_for_status()
+            items = [
+                {
+                    "title": item.get("title", "No Title"),
+                    "snippet": item.get("snippet", "No Description Available."),
+                    "link": item.get("link", "#"),
+                }
+                for item in response.json().get("items", [])[:RESULT_COUNT]
+            ]
+            return SearchResult(query, items)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            IncrementCounter("search.errors")
+            return SearchResult(query, error=str(e))
+        finally:
+            RecordLatency("search.fetch", monotonic() - start)
+
+    def store(self, key: str, result: SearchResult, hits: int) -> None:
+        with self.lock:
+            self.cache[key] = {"items": result.items, "time": time(), "hits": hits}
+            if len(self.cache) > MAX_CACHE_ENTRIES:
+                oldest = min(self.cache, key=lambda cached: self.cache[cached]["time"])
+                del self.cache[oldest]
+            self.unsaved += 1
+            should_save = self.unsaved >= SAVE_EVERY
+        if should_save:
+            self.save()
+
+    def refresh(self, key: str, query: str) -> None:
+        try:
+            result = self.fetch(query)
+            if result.ok:
+                with self.lock:
+                    hits = self.cache.get(key, {}).get("hits", 0)
+                self.store(key, result, hits)
+        finally:
+            with self.lock:
+                self.refreshing.discard(key)
+
+    def search(self, query: str) -> SearchResult:
+        key = NormalizeSearchQuery(query)
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry:
+                entry["hits"] += 1
+                age = time() - entry["time"]
+        if entry and age < self.ttl:
+            IncrementCounter("search.cache_hits")
+            return SearchResult(query, entry["items"], from_cache=True)
+        if entry and age < self.ttl + self.stale_ttl and entry["hits"] >= POPULAR_HITS:
+            # Popular query: answer now from the stale copy and revalidate in the background
+            IncrementCounter("search.stale_hits")
+            with self.lock:
+                start_refresh = key not in self.refreshing
+                self.refreshing.add(key)
+            if start_refresh:
+                threading.Thread(target=self.refresh, args=(key, query), daemon=True).start()
+            return SearchResult(query, entry["items"], from_cache=True, stale=True)
+
+        IncrementCounter("search.cache_misses")
+        result = self.fetch(query)
+        if result.ok:
+            self.store(key, result, entry["hits"] if entry else 1)
+        elif entry:
+            # Better an old answer than none
+            return SearchResult(query, entry["items"], from_cache=True, stale=True)
+        return result
+
+if __name__ == "__main__":
+    # Run from the project root against a local stand-in server: python -m Backend.SearchClient
+    import tempfile
+    from Backend.Metrics import GetMetrics
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import urlparse, parse_qs
+
+    class StandIn(BaseHTTPRequestHandler):
+        requests_served = 0
+
+        def do_GET(self):
+            StandIn.requests_served += 1
+            query = parse_qs(urlparse(self.path).query)["q"][0]
+            body = json.dumps({"items": [{"title": f"Result for {query}", "snippet": "Stand-in snippet.", "link": "http://example.com"}]})
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body.encode())
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    cache_path = os.path.join(tempfile.mkdtemp(), "SearchCache.json")
+    client = SearchClient("test-key", "test-cx", base_url=f"http://127.0.0.1:{server.server_port}/", cache_path=cache_path)
+    for query in ["Who is the Prime Minister of India?", "who is the prime minister of india", "weather & news today"]:
+        result = client.search(query)
+        print(f"{query!r}: cached={result.from_cache} items={len(result.items)} error={result.error}")
+    client.limiters[client.api_key] = RateLimiter(1000.0, 1000)  # The stand-in has no quota
+    start = monotonic()
+    for i in range(20):
+        client.search(f"distinct query {i}")
+    print(f"20 misses in {(monotonic() - start) * 1000:.1f} ms, {GetMetrics()['counters'].get('search.cache_saves', 0)} cache writes")
+    client.save()  # What the exit hook does
+    with open(cache_path, "r", encoding="utf-8") as file:
+        print(f"Entries on disk after the exit save: {len(json.load(file))}")
+    print(f"Requests served by stand-in: {StandIn.requests_served}")
+    server.shutdown()
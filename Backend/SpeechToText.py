@@ -1,15 +1,22 @@
 from selenium import webdriver
-from selenium.webdriver.common.by import By
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 from dotenv import dotenv_values
+from time import monotonic, sleep
 import os
-import mtranslate as mt
+import csv
+import threading
+import logging
+from Backend.StateBus import SetAssistantStatus
+from Backend.Metrics import IncrementCounter, RecordLatency
+from Backend.Translation import Translate, NeedsTranslation
 
 env_vars = dotenv_values(".env")
 
-InputLanguage = env_vars.get("InputLanguage")
+InputLanguage = env_vars.get("InputLanguage") or "en"
+SpeechBackendName = (env_vars.get("SpeechBackend") or "browser").lower()
+LISTEN_SLICE = 1.0  # Seconds per wait on the page; a cancel takes effect within one slice
 
 HtmlCode = '''<!DOCTYPE html>
 <html lang="en">
@@ -22,56 +29,69 @@ HtmlCode = '''<!DOCTYPE html>
     <p id="output"></p>
     <script>
         const output = document.getElementById('output');
-        let recognition;
+        const recognition = new (window.webkitSpeechRecognition || window.SpeechRecognition)();
+        let active = false;   // Whether recognition is wanted
+        let running = false;  // Between start() and onend; start() throws InvalidStateError meanwhile
+        recognition.lang = '__LANGUAGE__';
+        recognition.continuous = true;
 
-        function startRecognition() {
-            recognition = new webkitSpeechRecognition() || new SpeechRecognition();
-            recognition.lang = '';
-            recognition.continuous = true;
+        recognition.onresult = function(event) {
+            const transcript = event.results[event.results.length - 1][0].transcript;
+            output.textContent += transcript;
+        };
 
-            recognition.onresult = function(event) {
-                const transcript = event.results[event.results.length - 1][0].transcript;
-                output.textContent += transcript;
-            };
+        recognition.onend = function() {
+            running = false;
+            if (active) begin();
+        };
 
-            recognition.onend = function() {
+        // Start unless a session is still running or stopping; its onend starts the next one
+        function begin() {
+            if (running) return;
+            try {
                 recognition.start();
-            };
-            recognition.start();
+                running = true;
+            } catch (e) {
+                if (e.name !== "InvalidStateError") throw e;
+                running = true;  // The last session has not ended yet; its onend restarts us
+            }
+        }
+
+        function startRecognition() {
+            output.textContent = "";
+            active = true;
+            begin();
         }
 
         function stopRecognition() {
-            recognition.stop();
-            output.innerHTML = "";
+            active = false;
+            if (running) recognition.stop();
+            output.textContent = "";
+        }
+
+        // Resolves with the transcript as soon as one appears, or null after timeoutMs
+        function awaitTranscript(timeoutMs, done) {
+            if (output.textContent) return done(output.textContent);
+            const observer = new MutationObserver(function() {
+                if (output.textContent) finish(output.textContent);
+            });
+            const timer = setTimeout(function() { finish(null); }, timeoutMs);
+            function finish(text) {
+                observer.disconnect();
+                clearTimeout(timer);
+                done(text);
+            }
+            observer.observe(output, {childList: true, characterData: true, subtree: true});
         }
     </script>
 </body>
 </html>'''
 
-HtmlCode = str(HtmlCode).replace("recognition.lang= '';", f"recognition.lang = '{InputLanguage}';")
-
-with open(r"Data\Voice.html", "w") as f:
-    f.write(HtmlCode)
-
 current_dir = os.getcwd()
 
-Link = f"{current_dir}/Data/Voice.html"
+Link = os.path.join(current_dir, "Data", "Voice.html")
 
-chrome_options = Options()
 user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chorme/89.0.142.86 Safari/537.36"
-chrome_options.add_argument(f'user-agent={user_agent}')
-chrome_options.add_argument("--use-fake-ui-for-media-stream")
-chrome_options.add_argument("--use-fake-device-for-media-stream")
-chrome_options.add_argument("--headless=new")
-
-service = Service(ChromeDriverManager().install())
-driver = webdriver.Chrome(service=service, options=chrome_options)
-
-TempDirPath  = rf"{current_dir}/Frontend/Files"
-
-def SetAssistantStatus(Status):
-    with open(rf'{TempDirPath}/Status.data', "w", encoding='utf-8') as file:
-        file.write(Status)
 
 def QueryModifier(Query):
     new_query = Query.lower().strip()
@@ -92,30 +112,287 @@ def QueryModifier(Query):
     return new_query.capitalize()
 
 def UniversalTranslator(Text):
-    english_translation = mt.translate(Text, "en", "auto")
+    english_translation = Translate(Text, "en")
     return english_translation.capitalize()
 
-def SpeechRecognition():
-    driver.get("file:///" + Link)
-    driver.find_element(by=By.ID, value="start").click()
+class SpeechBackend:
+    """Interface of a speech-to-text engine.
+
+    listen() blocks for the next utterance and returns its final transcript
+    ("" on timeout or cancel), reporting partial transcripts through
+    on_partial as they change. Engines that take audio from the application
+    rather than capturing it themselves receive it through feed().
+
+    cancel() bumps a generation counter rather than setting a flag that the
+    next listen() would clear: a caller takes a token with arm() before it
+    starts waiting (for the VAD gate, for its turn), and a listen() given
+    that token returns "" at once if it was cancelled since.
+    """
+
+    uses_microphone = True  # Whether listening should be gated on live voice activity
+    captures_audio = True  # False for engines that are given the captured audio through feed()
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.generation = 0
+
+    def start(self) -> None:
+        pass
+
+    def feed(self, samples) -> None:
+        pass
+
+    def arm(self) -> int:
+        """Token for a later listen(); any cancel() after this makes that listen return ""."""
+        with self.condition:
+            return self.generation
+
+    def cancelled(self, token: int) -> bool:
+        return token != self.generation
+
+    def listen(self, timeout: float | None = None, on_partial=None, token: int | None = None) -> str:
+        raise NotImplementedError
+
+    def cancel(self) -> None:
+        with self.condition:
+            self.generation += 1
+            self.condition.notify_all()
+
+    def close(self) -> None:
+        pass
+
+class BrowserRecognizer(SpeechBackend):
+    """Chrome's webkitSpeechRecognition driven through Selenium, started on first use and kept warm.
+
+    The transcript is pushed from the page: a MutationObserver on the output
+    element completes an execute_async_script call, so the Python side sleeps
+    in one WebDriver request instead of polling the DOM. Waits are cut into
+    LISTEN_SLICE pieces so cancel() and timeouts take effect promptly.
+    """
 
-    while True:
-        try:
-            Text = driver.find_element(by=By.ID, value="output").text
+    def __init__(self, language: str = InputLanguage):
+        super().__init__()
+        self.language = language
+        self.driver = None
+        self.lock = threading.Lock()  # One listen at a time
+        self.start_lock = threading.Lock()
 
-            if Text:
-                driver.find_element(by=By.ID, value="end").click()
+    def start(self) -> None:
+        """Launch the browser and load the recognition page (idempotent; safe to call for warm-up)."""
+        with self.start_lock:
+            if self.driver is not None:
+                return
+            from webdriver_manager.chrome import ChromeDriverManager
+            start = monotonic()
+            os.makedirs(os.path.dirname(Link), exist_ok=True)
+            with open(Link, "w", encoding="utf-8") as f:
+                f.write(HtmlCode.replace("__LANGUAGE__", self.language))
+            chrome_options = Options()
+            chrome_options.add_argument(f'user-agent={user_agent}')
+            chrome_options.add_argument("--use-fake-ui-for-media-stream")
+            chrome_options.add_argument("--use-fake-device-for-media-stream")
+            chrome_options.add_argument("--headless=new")
+            service = Service(ChromeDriverManager().install())
+            driver = webdriver.Chrome(service=service, options=chrome_options)
+            driver.set_script_timeout(LISTEN_SLICE + 5)
+            driver.get("file:///" + Link)
+            self.driver = driver
+            RecordLatency("stt.browser_start", monotonic() - start)
 
-                if InputLanguage.lower() == "en" or "en" in InputLanguage.lower():
-                    return QueryModifier(Text)
-                else:
-                    SetAssistantStatus("Translating...")
-                    return QueryModifier(UniversalTranslator(Text))
-        except Exception as e:
-            pass
+    def listen(self, timeout: float | None = None, on_partial=None, token: int | None = None) -> str:
+        """Raw transcript of the next utterance; "" on timeout or cancel (also one since arm() gave token)."""
+        if token is None:
+            token = self.arm()
+        with self.lock:
+            if self.cancelled(token):
+                IncrementCounter("stt.cancelled")
+                return ""
+            self.start()
+            deadline = None if timeout is None else monotonic() + timeout
+            start = monotonic()
+            try:
+                self.driver.execute_script("startRecognition();")
+                while not self.cancelled(token):
+                    wait = LISTEN_SLICE if deadline is None else min(LISTEN_SLICE, deadline - monotonic())
+                    if wait <= 0:
+                        IncrementCounter("stt.timeouts")
+                        return ""
+                    Text = self.driver.execute_async_script(
+                        "awaitTranscript(arguments[0], arguments[arguments.length - 1]);", int(wait * 1000)
+                    )
+                    if Text:
+                        RecordLatency("stt.listen", monotonic() - start)
+                        if on_partial is not None:
+                            on_partial(Text)
+                        return Text
+                IncrementCounter("stt.cancelled")
+                return ""
+            except WebDriverException as e:
+                logging.error(f"Speech recognition failed, restarting browser: {e}")
+                IncrementCounter("stt.errors")
+                self.close()
+                return ""
+            finally:
+                if self.driver is not None:
+                    try:
+                        self.driver.execute_script("stopRecognition();")
+                    except WebDriverException:
+                        pass
+
+    def cancel(self) -> None:
+        """Make a running listen() return "" within LISTEN_SLICE, and an armed one at once."""
+        super().cancel()
+
+    def close(self) -> None:
+        with self.start_lock:
+            driver, self.driver = self.driver, None
+        if driver is not None:
+            try:
+                driver.quit()
+            except WebDriverException:
+                pass
+
+class ReplayRecognizer(SpeechBackend):
+    """Replays recorded utterances instead of listening, for load tests and headless runs.
+
+    Each utterance is a transcript, optionally aligned to a WAV file whose
+    length sets how long the "speaker" talks (otherwise estimated from the
+    word count). speed=1 replays in real time, larger values faster, and 0
+    returns immediately; partial transcripts are reported word by word.
+    """
+
+    uses_microphone = False
+    WORDS_PER_SECOND = 2.5
+
+    def __init__(self, utterances: list[tuple[str, str | None]], speed: float = 1.0, loop: bool = False):
+        super().__init__()
+        self.utterances = utterances  # (transcript, wav path or None)
+        self.speed = speed
+        self.loop = loop
+        self.position = 0
+        self.lock = threading.Lock()
+
+    def duration(self, transcript: str, wav: str | None) -> float:
+        if wav:
+            import wave
+            with wave.open(wav, "rb") as file:
+                return file.getnframes() / file.getframerate()
+        return len(transcript.split()) / self.WORDS_PER_SECOND
+
+    def listen(self, timeout: float | None = None, on_partial=None, token: int | None = None) -> str:
+        if token is None:
+            token = self.arm()
+        with self.lock:
+            if self.cancelled(token):
+                return ""
+            if self.position >= len(self.utterances):
+                if not self.loop or not self.utterances:
+                    return ""
+                self.position = 0
+            transcript, wav = self.utterances[self.position]
+            self.position += 1
+        words = transcript.split()
+        step = self.duration(transcript, wav) / max(len(words), 1) / self.speed if self.speed else 0
+        deadline = None if timeout is None else monotonic() + timeout
+        for count in range(1, len(words) + 1):
+            with self.condition:
+                if self.condition.wait_for(lambda: self.cancelled(token), step or 0):
+                    return ""
+            if deadline is not None and monotonic() > deadline:
+                IncrementCounter("stt.timeouts")
+                return ""
+            if on_partial is not None:
+                on_partial(" ".join(words[:count]))
+        return transcript
+
+def LoadReplayManifest(path: str) -> list[tuple[str, str | None]]:
+    """Utterances from a CSV of "wav path,transcript" rows, or a directory of X.wav + X.txt pairs."""
+    if os.path.isdir(path):
+        utterances = []
+        for name in sorted(os.listdir(path)):
+            if name.endswith(".txt"):
+                with open(os.path.join(path, name), "r", encoding="utf-8") as f:
+                    transcript = f.read().strip()
+                wav = os.path.join(path, name[:-4] + ".wav")
+                utterances.append((transcript, wav if os.path.exists(wav) else None))
+        return utterances
+    base = os.path.dirname(path)
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return [(row[1].strip(), os.path.join(base, row[0]) if row[0] else None) for row in csv.reader(f) if len(row) >= 2]
+
+def CreateSpeechBackend(name: str = SpeechBackendName) -> SpeechBackend:
+    if name == "replay":
+        manifest = env_vars.get("SpeechReplayManifest")
+        if not manifest:
+            raise ValueError("SpeechBackend=replay needs SpeechReplayManifest in .env")
+        return ReplayRecognizer(LoadReplayManifest(manifest), float(env_vars.get("SpeechReplaySpeed") or 1.0), loop=True)
+    return BrowserRecognizer()
+
+recognizer = CreateSpeechBackend()
+
+def SetSpeechBackend(backend: SpeechBackend) -> SpeechBackend:
+    """Swap the engine used by SpeechRecognition(); returns the previous one."""
+    global recognizer
+    previous, recognizer = recognizer, backend
+    return previous
+
+def SpeechBackendUsesMicrophone():
+    return recognizer.uses_microphone
+
+def SpeechBackendCapturesAudio():
+    return recognizer.captures_audio
+
+def FeedRecognition(samples):
+    recognizer.feed(samples)
+
+def SpeechRecognition(timeout=None, token=None):
+    """Final, cleaned-up query; token from ArmRecognition() makes an earlier CancelRecognition() count."""
+    Text = recognizer.listen(timeout, token=token)
+    if not Text:
+        return ""
+
+    if InputLanguage.lower() == "en" or "en" in InputLanguage.lower() or not NeedsTranslation(Text, "en"):
+        return QueryModifier(Text)
+    else:
+        SetAssistantStatus("Translating...")
+        return QueryModifier(UniversalTranslator(Text))
+
+def ArmRecognition():
+    return recognizer.arm()
+
+def RecognitionCancelled(token):
+    return recognizer.cancelled(token)
+
+def CancelRecognition():
+    recognizer.cancel()
 
 if __name__ == "__main__":
-    while True:
-        Text  = SpeechRecognition()
-        print(Text)
-            
\ No newline at end of file
+    # Run from the project root: python -m Backend.SpeechToText [--cpu seconds]
+    import sys
+    from time import process_time
+    from selenium.webdriver.common.by import By
+
+    if "--cpu" in sys.argv and isinstance(recognizer, BrowserRecognizer):
+        # Listen-loop CPU of this process while nobody speaks: the old DOM polling loop vs the pushed result
+        seconds = float(sys.argv[sys.argv.index("--cpu") + 1])
+        recognizer.start()
+        driver = recognizer.driver
+        driver.execute_script("startRecognition();")
+        cpu, end = process_time(), monotonic() + seconds
+        while monotonic() < end:
+            try:
+                if driver.find_element(by=By.ID, value="output").text:
+                    break
+            except Exception:
+                pass
+        polling = (process_time() - cpu) / seconds
+        driver.execute_script("stopRecognition();")
+        cpu = process_time()
+        recognizer.listen(seconds)
+        pushed = (process_time() - cpu) / seconds
+        print(f"listen loop CPU: polling {polling * 100:.1f}%, pushed {pushed * 100:.1f}% of one core")
+        recognizer.close()
+    else:
+        while True:
+            Text  = SpeechRecognition()
+            print(Text)
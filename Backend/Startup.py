@@ -0,0 +1,124 @@
+import sys
+import importlib
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+from time import perf_counter
+from Backend.Metrics import RecordLatency
+
+class LazyAttribute:
+    """Stands in for module.name and imports the module the first time it is used.
+
+    Calls, attribute access and instantiation are forwarded to the real
+    object. A warm-up that imports the same module in the background makes
+    the first use cheap; if it is still running, Python's import lock makes
+    the caller wait for it rather than importing twice.
+    """
+
+    def __init__(self, module: str, name: str):
+        self._module = module
+        self._name = name
+        self._target = None
+
+    def resolve(self):
+        if self._target is None:
+            self._target = getattr(ImportModule(self._module), self._name)
+        return self._target
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __getattr__(self, attribute):
+        return getattr(self.resolve(), attribute)
+
+    def __setattr__(self, attribute, value):
+        if attribute.startswith("_"):
+            object.__setattr__(self, attribute, value)
+        else:
+            setattr(self.resolve(), attribute, value)
+
+    def __iter__(self):
+        return iter(self.resolve())
+
+def ImportModule(module: str):
+    """importlib.import_module that records how long a first import took."""
+    if module in sys.modules:
+        return sys.modules[module]
+    start = perf_counter()
+    imported = importlib.import_module(module)
+    startup.imports.setdefault(module, perf_counter() - start)
+    RecordLatency(f"startup.import.{module}", perf_counter() - start)
+    return imported
+
+class Startup:
+    """Runs independent warm-up tasks in parallel and tracks when the assistant is ready.
+
+    Tasks marked required form the readiness barrier; wait() blocks on them
+    (or on named tasks). Everything is timed from the moment this module was
+    imported, which main.py does first, so report() shows where startup time
+    goes.
+    """
+
+    def __init__(self):
+        self.origin = perf_counter()
+        self.tasks = {}  # name -> (function, required)
+        self.futures = {}
+        self.timings = {}  # name -> (start, end) relative to origin
+        self.errors = {}
+        self.imports = {}
+        self.marks = []  # (label, time) relative to origin
+        self.lock = threading.Lock()
+        self.executor = None
+
+    def elapsed(self) -> float:
+        return perf_counter() - self.origin
+
+    def mark(self, label: str) -> None:
+        with self.lock:
+            self.marks.append((label, self.elapsed()))
+
+    def add(self, name: str, function, required: bool = False) -> None:
+        self.tasks[name] = (function, required)
+
+    def _run(self, name: str, function) -> None:
+        start = self.elapsed()
+        try:
+            function()
+        except Exception as e:
+            self.errors[name] = e
+            logging.error(f"Warm-up {name} failed: {e}")
+        finally:
+            end = self.elapsed()
+            self.timings[name] = (start, end)
+            RecordLatency(f"startup.{name}", end - start)
+
+    def start(self) -> None:
+        """Start every registered warm-up at once."""
+        self.executor = ThreadPoolExecutor(max_workers=max(1, len(self.tasks)), thread_name_prefix="WarmUp")
+        for name, (function, _) in self.tasks.items():
+            self.futures[name] = self.executor.submit(self._run, name, function)
+
+    def wait(self, names: list[str] | None = None, timeout: float | None = None) -> bool:
+        """Block until the named (default: required) warm-ups finish; False on timeout."""
+        if names is None:
+            names = [name for name, (_, required) in self.tasks.items() if required]
+        futures = [self.futures[name] for name in names if name in self.futures]
+        _, not_done = wait(futures, timeout)
+        return not not_done
+
+    def report(self) -> str:
+        lines = ["Startup profile (seconds since main.py started importing):"]
+        for label, at in self.marks:
+            lines.append(f"  {at:7.3f}  {label}")
+        lines.append("Warm-ups (start -> end, duration):")
+        for name, (start, end) in sorted(self.timings.items(), key=lambda item: item[1][0]):
+            required = " [required]" if self.tasks[name][1] else ""
+            failed = f" FAILED: {self.errors[name]}" if name in self.errors else ""
+            lines.append(f"  {start:7.3f} -> {end:7.3f}  {end - start:6.3f}  {name}{required}{failed}")
+        if self.imports:
+            lines.append("Lazy imports:")
+            for module, seconds in sorted(self.imports.items(), key=lambda item: -item[1]):
+                lines.append(f"  {seconds:6.3f}  {module}")
+        return "\n".join(lines)
+
+startup = Startup()
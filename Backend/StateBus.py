@@ -0,0 +1,225 @@
+import os
+import sys
+import struct
+import threading
+import logging
+from dataclasses import dataclass
+from time import sleep
+
+TEMP_DIRECTORY = os.path.join(os.getcwd(), "Frontend", "Files")
+COALESCE_DELAY = 0.05  # Seconds to gather a burst of updates into one file write
+POLL_INTERVAL = 0.5  # Watcher fallback where inotify is unavailable
+
+@dataclass(frozen=True)
+class StateKey:
+    name: str
+    type: type
+    file: str
+    default: object
+
+    def encode(self, value) -> str:
+        return str(value)
+
+    def decode(self, text: str):
+        if self.type is bool:
+            return text.strip() == "True"
+        return self.type(text)
+
+STATUS = StateKey("status", str, "Status.data", "")
+MICROPHONE = StateKey("microphone", bool, "Mic.data", False)
+RESPONSES = StateKey("responses", str, "Responses.data", "")
+DATABASE = StateKey("database", str, "Database.data", "")
+IMAGE_GENERATION = StateKey("image_generation", str, "ImageGeneration.data", "None,False")
+KEYS = [STATUS, MICROPHONE, RESPONSES, DATABASE, IMAGE_GENERATION]
+
+class StateBus:
+    """Typed in-process assistant state with atomic updates and change callbacks."""
+
+    def __init__(self, keys: list[StateKey] = KEYS):
+        self.lock = threading.Lock()
+        self.values = {key: key.default for key in keys}
+        self.subscribers = {key: [] for key in keys}
+
+    def get(self, key: StateKey):
+        with self.lock:
+            return self.values[key]
+
+    def set(self, key: StateKey, value) -> bool:
+        """Store value; subscribers are notified only if it changed."""
+        return self.update(key, lambda _: value)
+
+    def update(self, key: StateKey, function) -> bool:
+        """Atomically replace the value with function(old value)."""
+        with self.lock:
+            old = self.values[key]
+            new = function(old)
+            if not isinstance(new, key.type):
+                raise TypeError(f"{key.name} expects {key.type.__name__}, got {type(new).__name__}")
+            if new == old:
+                return False
+            self.values[key] = new
+            callbacks = list(self.subscribers[key])
+        for callback in callbacks:
+            try:
+                callback(key, new)
+            except Exception as e:
+                logging.error(f"State subscriber for {key.name} failed: {e}")
+        return True
+
+    def subscribe(self, key: StateKey, callback):
+        """Call callback(key, value) after each change; returns an unsubscribe function."""
+        with self.lock:
+            self.subscribers[key].append(callback)
+        def unsubscribe():
+            with self.lock:
+                if callback in self.subscribers[key]:
+                    self.subscribers[key].remove(callback)
+        return unsubscribe
+
+class FileAdapter:
+    """Mirrors bus keys to Frontend/Files/*.data for external readers such as the GUI.
+
+    Writes go to a temp file and are renamed into place, so readers never
+    see a torn value. Updates within COALESCE_DELAY are written once.
+    """
+
+    def __init__(self, bus: StateBus, directory: str = TEMP_DIRECTORY):
+        self.bus = bus
+        self.directory = directory
+        self.dirty = set()
+        self.written = {}  # key -> text last written by this process, to ignore our own file events
+        self.condition = threading.Condition()
+        os.makedirs(directory, exist_ok=True)
+        for key in bus.values:
+            self._load(key)
+            bus.subscribe(key, self._changed)
+        threading.Thread(target=self._writer, name="StateFileWriter", daemon=True).start()
+
+    def path(self, key: StateKey) -> str:
+        return os.path.join(self.directory, key.file)
+
+    def _load(self, key: StateKey) -> None:
+        try:
+            with open(self.path(key), "r", encoding="utf-8") as file:
+                self.bus.set(key, key.decode(file.read()))
+        except (OSError, ValueError):
+            pass
+
+    def _changed(self, key: StateKey, value) -> None:
+        with self.condition:
+            self.dirty.add(key)
+            self.condition.notify()
+
+    def _writer(self) -> None:
+        while True:
+            with self.condition:
+                while not self.dirty:
+                    self.condition.wait()
+            sleep(COALESCE_DELAY)
+            with self.condition:
+                keys, self.dirty = self.dirty, set()
+            for key in keys:
+                self.write(key)
+
+    def write(self, key: StateKey) -> None:
+        path = self.path(key)
+        text = key.encode(self.bus.get(key))
+        try:
+            self.written[key] = text
+            with open(path + ".tmp", "w", encoding="utf-8") as file:
+                file.write(text)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            logging.error(f"Failed to write {path}: {e}")
+
+    def flush(self) -> None:
+        """Write all pending changes now."""
+        with self.condition:
+            keys, self.dirty = self.dirty, set()
+        for key in keys:
+            self.write(key)
+
+class FileWatcher:
+    """Feeds changes made to the .data files by other processes back into the bus.
+
+    Uses inotify on Linux so no thread wakes up unless a file actually changed.
+    """
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self, bus: StateBus, adapter: FileAdapter, directory: str = TEMP_DIRECTORY):
+        self.bus = bus
+        self.adapter = adapter
+        self.directory = directory
+        self.keys_by_file = {key.file: key for key in bus.values}
+        target = self._inotify_loop if sys.platform.startswith("linux") else self._poll_loop
+        threading.Thread(target=target, name="StateFileWatcher", daemon=True).start()
+
+    def _reload(self, key: StateKey) -> None:
+        try:
+            with open(os.path.join(self.directory, key.file), "r", encoding="utf-8") as file:
+                text = file.read()
+            if text != self.adapter.written.get(key):
+                self.bus.set(key, key.decode(text))
+        except (OSError, ValueError):
+            pass
+
+    def _inotify_loop(self) -> None:
+        import ctypes
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            fd = libc.inotify_init1(os.O_CLOEXEC)
+            if fd < 0 or libc.inotify_add_watch(fd, self.directory.encode(), self.IN_CLOSE_WRITE | self.IN_MOVED_TO) < 0:
+                raise OSError(ctypes.get_errno(), "inotify unavailable")
+        except (OSError, AttributeError) as e:
+            logging.warning(f"inotify unavailable ({e}), polling state files instead")
+            return self._poll_loop()
+
+        while True:
+            data = os.read(fd, 4096)
+            offset = 0
+            while offset < len(data):
+                _, _, _, length = self.EVENT_HEADER.unpack_from(data, offset)
+                offset += self.EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+                offset += length
+                if name in self.keys_by_file:
+                    self._reload(self.keys_by_file[name])
+
+    def _poll_loop(self) -> None:
+        modified = {}
+        while True:
+            for name, key in self.keys_by_file.items():
+                try:
+                    mtime = os.stat(os.path.join(self.directory, name)).st_mtime_ns
+                except OSError:
+                    continue
+                if modified.get(name) != mtime:
+                    modified[name] = mtime
+                    self._reload(key)
+            sleep(POLL_INTERVAL)
+
+state_bus = StateBus()
+file_adapter = FileAdapter(state_bus)
+file_watcher = FileWatcher(state_bus, file_adapter)
+
+# Drop-in replacements for the file-based helpers in Frontend/GUI.py
+def TempDirectoryPath(Filename):
+    return os.path.join(TEMP_DIRECTORY, Filename)
+
+def SetAssistantStatus(Status):
+    state_bus.set(STATUS, Status)
+
+def GetAssistantStatus():
+    return state_bus.get(STATUS)
+
+def SetMicrophoneStatus(Command):
+    state_bus.set(MICROPHONE, str(Command) == "True")
+
+def GetMicrophoneStatus():
+    return str(state_bus.get(MICROPHONE))
+
+def ShowTextTOScreen(Text):
+    state_bus.set(RESPONSES, Text)
@@ -0,0 +1,43 @@
+import re
+from typing import Iterable, Iterator
+
+# Words ending in "." that do not end a sentence
+ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "e.g", "i.e", "no", "approx"}
+SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*\s+|\n+")
+
+class SentenceSegmenter:
+    """Turn a stream of model tokens into complete sentences as soon as they end."""
+
+    def __init__(self):
+        self.buffer = ""
+
+    def _is_abbreviation(self, end: int) -> bool:
+        words = self.buffer[:end].rstrip(".!?\"')] \n").split()
+        return bool(words) and words[-1].lower().rstrip(".") in ABBREVIATIONS and self.buffer[end - 1] == "."
+
+    def feed(self, token: str) -> list[str]:
+        """Add a token and return the sentences it completed."""
+        self.buffer += token
+        sentences = []
+        position = 0
+        for match in SENTENCE_END.finditer(self.buffer):
+            terminator_end = match.start() + len(match.group().rstrip())
+            if self._is_abbreviation(terminator_end):
+                continue
+            sentence = self.buffer[position:terminator_end].strip()
+            if sentence:
+                sentences.append(sentence)
+            position = match.end()
+        self.buffer = self.buffer[position:]
+        return sentences
+
+    def flush(self) -> list[str]:
+        """Return whatever is left once the stream has ended."""
+        rest, self.buffer = self.buffer.strip(), ""
+        return [rest] if rest else []
+
+def SplitSentences(tokens: Iterable[str]) -> Iterator[str]:
+    segmenter = SentenceSegmenter()
+    for token in tokens:
+        yield from segmenter.feed(token)
+    yield from segmenter.flush()
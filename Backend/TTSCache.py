@@ -0,0 +1,119 @@
+import os
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from Backend.Metrics import IncrementCounter
+
+TTS_CACHE_DIR = os.path.join("Data", "TTSCache")
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+MAX_MEMORY_BYTES = 8 * 1024 * 1024  # Dynamic speech, kept only for this run
+
+def AudioKey(text: str, voice: str, pitch: str, rate: str) -> str:
+    return hashlib.sha256(f"{voice}\0{pitch}\0{rate}\0{text}".encode("utf-8")).hexdigest()
+
+class AudioCache:
+    """Content-addressed store of synthesized speech with a size-bounded LRU.
+
+    Meant for fixed phrases synthesized ahead of time; one-off sentences go
+    to MemoryAudioCache so they don't churn the disk.
+    """
+
+    def __init__(self, directory: str = TTS_CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> size, least recently used first
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+    def _scan(self) -> None:
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".mp3"):
+                stat = os.stat(os.path.join(self.directory, name))
+                files.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(files):
+            self.entries[key] = size
+            self.total_bytes += size
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def get(self, key: str, count_miss: bool = True) -> str | None:
+        """Return the cached file for key, or None on a miss; count_miss=False leaves a miss out of the stats."""
+        with self.lock:
+            if key not in self.entries or not os.path.exists(self.path(key)):
+                self.entries.pop(key, None)
+                if count_miss:
+                    self.misses += 1
+                    IncrementCounter("tts.cache_misses")
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        IncrementCounter("tts.cache_hits")
+        try:
+            os.utime(self.path(key))  # Keeps LRU order across restarts
+        except OSError:
+            pass
+        return self.path(key)
+
+    def add(self, key: str, temp_path: str) -> str:
+        """Move a freshly synthesized file into the cache and evict old entries if needed."""
+        path = self.path(key)
+        os.replace(temp_path, path)
+        size = os.path.getsize(path)
+        with self.lock:
+            self.total_bytes += size - self.entries.pop(key, 0)
+            self.entries[key] = size
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                old_key, old_size = self.entries.popitem(last=False)
+                self.total_bytes -= old_size
+                try:
+                    os.remove(self.path(old_key))
+                except OSError as e:
+                    logging.error(f"Failed to evict TTS cache entry: {e}")
+        return path
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+class MemoryAudioCache:
+    """Size-bounded in-memory LRU of synthesized speech, for sentences that are not worth a file."""
+
+    def __init__(self, max_bytes: int = MAX_MEMORY_BYTES):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> mp3 bytes, least recently used first
+        self.total_bytes = 0
+
+    def get(self, key: str) -> bytes | None:
+        with self.lock:
+            data = self.entries.get(key)
+            if data is not None:
+                self.entries.move_to_end(key)
+        IncrementCounter("tts.memory_hits" if data is not None else "tts.memory_misses")
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        with self.lock:
+            old = self.entries.pop(key, None)
+            self.total_bytes += len(data) - (len(old) if old is not None else 0)
+            self.entries[key] = data
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+
+audio_cache = AudioCache()
+memory_audio_cache = MemoryAudioCache()
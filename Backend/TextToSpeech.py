@@ -1,36 +1,83 @@
-import pygame
 import random
-import asyncio
 import edge_tts
 import os
+import queue
+import threading
 from dotenv import dotenv_values
+from Backend.TTSCache import AudioKey, audio_cache, memory_audio_cache
+from Backend.AudioPlayer import player
+from Backend.Runtime import runtime
 
 env_vars = dotenv_values(".env")
 AssistantVoice = env_vars.get("AssistantVoice")
 
-async def TextToAudioFile(text) -> None:
-    file_path = r"Data\speech.mp3"
+# Voice settings; part of the audio cache key
+Pitch = '-5Hz'
+Rate = '+15%'
 
-    if os.path.exists(file_path):
-        os.remove(file_path)
+# How often a playing clip asks the caller's func whether to keep going
+INTERRUPT_CHECK_INTERVAL = 0.25
 
-    Communicate = edge_tts.Communicate(text, AssistantVoice, pitch='-5Hz', rate='+15%')
-    await Communicate.save(r"Data\speech.mp3")
+async def TextToAudioFile(text) -> str:
+    """Return the path of an mp3 for text in the disk cache, synthesizing it only on a miss; for static phrases."""
+    key = AudioKey(text, AssistantVoice, Pitch, Rate)
+    cached_path = audio_cache.get(key)
+    if cached_path:
+        return cached_path
 
-def TTS(Text, func=lambda r=None: True):
-    while True:
+    temp_path = audio_cache.path(key) + f".{threading.get_ident()}.tmp"
+    try:
+        Communicate = edge_tts.Communicate(text, AssistantVoice, pitch=Pitch, rate=Rate)
+        await Communicate.save(temp_path)
+        return audio_cache.add(key, temp_path)
+    finally:
+        if os.path.exists(temp_path):  # Synthesis failed part way; add() moves it otherwise
+            os.remove(temp_path)
+
+async def TextToAudio(text) -> bytes:
+    """Return mp3 bytes for text: a pre-generated phrase from disk, else synthesized and kept in memory only."""
+    key = AudioKey(text, AssistantVoice, Pitch, Rate)
+    cached = memory_audio_cache.get(key)
+    if cached is not None:
+        return cached
+    # Most text here is dynamic and never on disk, so only hits count towards the disk cache's stats
+    cached_path = audio_cache.get(key, count_miss=False)
+    if cached_path:
+        with open(cached_path, "rb") as file:
+            return file.read()
+
+    audio = bytearray()
+    Communicate = edge_tts.Communicate(text, AssistantVoice, pitch=Pitch, rate=Rate)
+    async for chunk in Communicate.stream():
+        if chunk["type"] == "audio":
+            audio += chunk["data"]
+    memory_audio_cache.put(key, bytes(audio))
+    return bytes(audio)
+
+async def PrewarmPhrases(phrases) -> None:
+    for phrase in phrases:
         try:
-            asyncio.run(TextToAudioFile(Text))
+            await TextToAudioFile(phrase)
+        except Exception as e:
+            print(f"Error prewarming TTS cache: {e}")
 
-            pygame.mixer.init()
+def PrewarmAudioCache(phrases):
+    """Synthesize known static phrases in the background so they play instantly later."""
+    return runtime.submit(PrewarmPhrases(list(phrases)))
 
-            pygame.mixer.music.load(r"Data\speech.mp3")
-            pygame.mixer.music.play()
+def WaitForClip(clip, func=lambda r=None: True):
+    """Block until clip has played, stopping playback if func() returns False."""
+    while not clip.done.wait(INTERRUPT_CHECK_INTERVAL):
+        if func() == False:
+            player.stop()
+            clip.done.wait()
+            return False
+    return not clip.interrupted
 
-            while pygame.mixer.music.get_busy():
-                if func() == False:
-                    break
-                pygame.time.Clock().tick(10)
+def TTS(Text, func=lambda r=None: True):
+    while True:
+        try:
+            WaitForClip(player.play(runtime.run(TextToAudio(Text))), func)
             return True
         except Exception as e:
             print(f"Error in TTS: {e}")
@@ -38,38 +85,99 @@ def TTS(Text, func=lambda r=None: True):
         finally:
             try:
                 func(False)
-                pygame.mixer.music.stop()
-                pygame.mixer.quit()
             except Exception as e:
                 print(f"Error in finally block: {e}")
 
+responses = [
+    "The rest of the result has been printed to the chat screen, kindly check it out sir.",
+    "The rest of the text is now on the chat screen, sir, please check it.",
+    "You can see the rest of the text on the chat screen, sir.",
+    "The remaining part of the text is now on the chat screen, sir.",
+    "Sir, you'll find more text on the chat screen for you to see.",
+    "The rest of the answer is now on the chat screen, sir.",
+    "Sir, please look at the chat screen, the rest of the answer is there.",
+    "You'll find the complete answer on the chat screen, sir.",
+    "The next part of the text is on the chat screen, sir.",
+    "Sir, please check the chat screen for more information.",
+    "There's more text on the chat screen for you, sir.",
+    "Sir, take a look at the chat screen for additional text.",
+    "You'll find more to read on the chat screen, sir.",
+    "Sir, check the chat screen for the rest of the text.",
+    "The chat screen has the rest of the text, sir.",
+    "There's more to see on the chat screen, sir, please look.",
+    "Sir, the chat screen holds the continuation of the text.",
+    "You'll find the complete answer on the chat screen, kindly check it out sir.",
+    "Please review the chat screen for the rest of the text, sir.",
+    "Sir, look at the chat screen for the complete answer."
+]
+
+# Sentences spoken from a long answer before pointing the user to the chat screen
+MAX_SPOKEN_SENTENCES = 2
+
+def IsLongAnswer(Text) -> bool:
+    """Answers this long are only partly spoken; the rest is left on the chat screen."""
+    return len(str(Text).split(".")) > 4 and len(Text) >= 250
+
+class SentenceSpeaker:
+    """Synthesize sentences on a background thread while the answer is still being generated.
+
+    Each clip is queued on the shared player as soon as it is ready, so the
+    next sentence starts right after the previous one ends. As in
+    TextToSpeech, a long answer stops after max_sentences with a pointer to
+    the chat screen; later sentences wait until the answer is known to be
+    long, or has ended short and is spoken in full.
+    """
+
+    def __init__(self, func=lambda r=None: True, max_sentences=MAX_SPOKEN_SENTENCES):
+        self.func = func
+        self.max_sentences = max_sentences
+        self.text = ""
+        self.held = []
+        self.spoken = 0
+        self.redirected = False
+        self.last_clip = None
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            sentence = self.queue.get()
+            if sentence is None:
+                return
+            try:
+                self.last_clip = player.play(runtime.run(TextToAudio(sentence)))
+            except Exception as e:
+                print(f"Error in TTS: {e}")
+
+    def speak(self, sentence):
+        sentence = sentence.replace("</s>", "").strip()
+        if not sentence or self.redirected:
+            return
+        self.text = f"{self.text} {sentence}".lstrip()
+        if self.spoken < self.max_sentences:
+            self.spoken += 1
+            self.queue.put(sentence)
+        elif IsLongAnswer(self.text):
+            self.redirected = True
+            self.held.clear()
+            self.queue.put(random.choice(responses))
+        else:
+            self.held.append(sentence)
+
+    def finish(self):
+        """Speak what a short answer still holds back, then wait until everything queued has been spoken."""
+        for sentence in self.held:
+            self.queue.put(sentence)
+        self.held.clear()
+        self.queue.put(None)
+        self.thread.join()
+        if self.last_clip is not None:
+            WaitForClip(self.last_clip, self.func)
+        self.func(False)
+
 def TextToSpeech(Text, func=lambda r=None: True):
-    Data = str(Text).split(".")
-    
-    responses = [
-        "The rest of the result has been printed to the chat screen, kindly check it out sir.",
-        "The rest of the text is now on the chat screen, sir, please check it.",
-        "You can see the rest of the text on the chat screen, sir.",
-        "The remaining part of the text is now on the chat screen, sir.",
-        "Sir, you'll find more text on the chat screen for you to see.",
-        "The rest of the answer is now on the chat screen, sir.",
-        "Sir, please look at the chat screen, the rest of the answer is there.",
-        "You'll find the complete answer on the chat screen, sir.",
-        "The next part of the text is on the chat screen, sir.",
-        "Sir, please check the chat screen for more information.",
-        "There's more text on the chat screen for you, sir.",
-        "Sir, take a look at the chat screen for additional text.",
-        "You'll find more to read on the chat screen, sir.",
-        "Sir, check the chat screen for the rest of the text.",
-        "The chat screen has the rest of the text, sir.",
-        "There's more to see on the chat screen, sir, please look.",
-        "Sir, the chat screen holds the continuation of the text.",
-        "You'll find the complete answer on the chat screen, kindly check it out sir.",
-        "Please review the chat screen for the rest of the text, sir.",
-        "Sir, look at the chat screen for the complete answer."
-    ]
-
-    if len(Data) > 4 and len(Text) >= 250:
+    if IsLongAnswer(Text):
         TTS("".join(Text.split(".")[0:2]) + ". " + random.choice(responses), func)
     else:
         TTS(Text, func)
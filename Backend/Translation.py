@@ -0,0 +1,215 @@
+import os
+import re
+import json
+import atexit
+import threading
+import logging
+from collections import OrderedDict, Counter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from time import perf_counter
+from Backend.Metrics import IncrementCounter, RecordLatency
+
+TRANSLATION_CACHE_PATH = os.path.join("Data", "TranslationCache.json")
+MAX_ENTRIES = 5000
+SAVE_EVERY = 20  # Flush to disk after this many new translations (and always at exit)
+TRANSLATE_TIMEOUT = 2.5  # Seconds before giving up and using the original text
+BATCH_SEPARATOR = "\n"
+
+# (first, last) code point ranges per script; the language is the one used when a script is unambiguous
+SCRIPTS = [
+    ("latin", None, [(0x0041, 0x005A), (0x0061, 0x007A), (0x00C0, 0x024F)]),
+    ("devanagari", "hi", [(0x0900, 0x097F)]),
+    ("bengali", "bn", [(0x0980, 0x09FF)]),
+    ("gurmukhi", "pa", [(0x0A00, 0x0A7F)]),
+    ("gujarati", "gu", [(0x0A80, 0x0AFF)]),
+    ("tamil", "ta", [(0x0B80, 0x0BFF)]),
+    ("telugu", "te", [(0x0C00, 0x0C7F)]),
+    ("kannada", "kn", [(0x0C80, 0x0CFF)]),
+    ("malayalam", "ml", [(0x0D00, 0x0D7F)]),
+    ("arabic", "ar", [(0x0600, 0x06FF), (0x0750, 0x077F)]),
+    ("hebrew", "he", [(0x0590, 0x05FF)]),
+    ("cyrillic", "ru", [(0x0400, 0x04FF)]),
+    ("greek", "el", [(0x0370, 0x03FF)]),
+    ("thai", "th", [(0x0E00, 0x0E7F)]),
+    ("hangul", "ko", [(0xAC00, 0xD7AF), (0x1100, 0x11FF)]),
+    ("kana", "ja", [(0x3040, 0x30FF)]),
+    ("han", "zh", [(0x4E00, 0x9FFF)]),
+]
+SCRIPT_LOOKUP = [(first, last, name) for name, _, ranges in SCRIPTS for first, last in ranges]
+SCRIPT_LANGUAGE = {name: language for name, language, _ in SCRIPTS}
+
+ENGLISH_WORDS = set("""
+the be to of and a in that have i it for not on with he as you do at this but his by from they we say her she
+or an will my one all would there their what so up out if about who get which go me when make can like time no
+just him know take people into year your good some could them see other than then now look only come its over
+think also back after use two how our work first well way even new want because any these give day most us is
+are was were been has had did does please tell open close play search show what's who's where when why how
+""".split())
+ENGLISH_RATIO = 0.25  # Share of known English words for Latin text to count as English
+
+def ScriptOf(character: str) -> str | None:
+    code = ord(character)
+    for first, last, name in SCRIPT_LOOKUP:
+        if first <= code <= last:
+            return name
+    return None
+
+def DetectLanguage(text: str) -> str:
+    """Best-effort language code from the dominant script; "en", a script language, or "und"."""
+    scripts = Counter(script for script in map(ScriptOf, text) if script)
+    if not scripts:
+        return "und"
+    script = scripts.most_common(1)[0][0]
+    if script == "kana" or (script == "han" and scripts.get("kana")):
+        return "ja"
+    if script != "latin":
+        return SCRIPT_LANGUAGE[script]
+    words = re.findall(r"[a-z']+", text.lower())
+    if words and sum(word in ENGLISH_WORDS for word in words) / len(words) >= ENGLISH_RATIO:
+        return "en"
+    return "und"  # Latin-script text that doesn't look like English (Hinglish, Spanish, ...)
+
+def NeedsTranslation(text: str, target: str = "en") -> bool:
+    return bool(text.strip()) and DetectLanguage(text) != target
+
+def SplitSentences(text: str) -> list[str]:
+    return [sentence for sentence in re.split(r"(?<=[.!?।。？！])\s+|\n+", text.strip()) if sentence]
+
+class TranslationCache:
+    """LRU cache of sentence translations, persisted as JSON."""
+
+    def __init__(self, path: str = TRANSLATION_CACHE_PATH, max_entries: int = MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.unsaved = 0
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                self.entries.update(json.load(file))  # Stored as [key, translation] pairs, oldest first
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
+    @staticmethod
+    def key(text: str, target: str) -> str:
+        return target + ":" + re.sub(r"\s+", " ", text.strip().lower())
+
+    def get(self, text: str, target: str) -> str | None:
+        key = self.key(text, target)
+        with self.lock:
+            translation = self.entries.get(key)
+            if translation is not None:
+                self.entries.move_to_end(key)
+        return translation
+
+    def put(self, text: str, target: str, translation: str) -> None:
+        with self.lock:
+            key = self.key(text, target)
+            self.entries[key] = translation
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self.unsaved += 1
+            should_save = self.unsaved >= SAVE_EVERY
+        if should_save:
+            self.save()
+
+    def save(self) -> None:
+        with self.lock:
+            snapshot = list(self.entries.items())
+            self.unsaved = 0
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path + ".tmp", "w", encoding="utf-8") as file:
+                json.dump(snapshot, file, ensure_ascii=False)
+            os.replace(self.path + ".tmp", self.path)
+        except OSError as e:
+            logging.error(f"Failed to save translation cache: {e}")
+
+class Translator:
+    """Translates only what needs it: skips text already in the target language, serves
+    repeated sentences from the cache, and sends the rest as one batched request with a timeout."""
+
+    def __init__(self, cache: TranslationCache, translate_function=None, timeout: float = TRANSLATE_TIMEOUT):
+        self.cache = cache
+        self.translate_function = translate_function
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="Translator")
+
+    def _remote(self, text: str, target: str) -> str:
+        if self.translate_function is None:
+            import mtranslate
+            self.translate_function = lambda text, target: mtranslate.translate(text, target, "auto")
+        return self.translate_function(text, target)
+
+    def _batch(self, sentences: list[str], target: str) -> list[str]:
+        """Translate several sentences in one request, falling back to one request each if the split fails."""
+        if len(sentences) == 1:
+            return [self._remote(sentences[0], target)]
+        translated = self._remote(BATCH_SEPARATOR.join(sentences), target).split(BATCH_SEPARATOR)
+        if len(translated) == len(sentences):
+            return translated
+        IncrementCounter("translation.batch_splits")
+        return list(self.executor.map(lambda sentence: self._remote(sentence, target), sentences))
+
+    def translate(self, text: str, target: str = "en") -> str:
+        """Translated text, or the original if translation isn't needed, fails or times out."""
+        start = perf_counter()
+        try:
+            if not NeedsTranslation(text, target):
+                IncrementCounter("translation.skipped")
+                return text
+            sentences = SplitSentences(text)
+            results = [self.cache.get(sentence, target) for sentence in sentences]
+            missing = [sentence for sentence, result in zip(sentences, results) if result is None]
+            IncrementCounter("translation.cache_hits", len(sentences) - len(missing))
+            if missing:
+                IncrementCounter("translation.cache_misses", len(missing))
+                future = self.executor.submit(self._batch, missing, target)
+                try:
+                    translated = iter(future.result(timeout=self.timeout))
+                except FutureTimeout:
+                    IncrementCounter("translation.timeouts")
+                    return text
+                except Exception as e:
+                    IncrementCounter("translation.errors")
+                    logging.error(f"Translation failed: {e}")
+                    return text
+                for i, result in enumerate(results):
+                    if result is None:
+                        results[i] = next(translated).strip()
+                        self.cache.put(sentences[i], target, results[i])
+            return " ".join(results)
+        finally:
+            RecordLatency("translation.turn", perf_counter() - start)
+
+translation_cache = TranslationCache()
+translator = Translator(translation_cache)
+atexit.register(translation_cache.save)
+
+def Translate(text: str, target: str = "en") -> str:
+    return translator.translate(text, target)
+
+if __name__ == "__main__":
+    # Offline check with a slow stand-in translator: python -m Backend.Translation
+    from time import sleep
+    from Backend.Metrics import GetMetrics
+
+    def StandIn(text, target):
+        sleep(0.2)
+        return "\n".join(f"[{target}] {line}" for line in text.split("\n"))
+
+    demo = Translator(TranslationCache(path=os.devnull), StandIn, timeout=1.0)
+    samples = [
+        "What is the weather today?",
+        "आज मौसम कैसा है? मुझे बताओ।",
+        "आज मौसम कैसा है? मुझे बताओ।",
+        "Привет, как дела?",
+        "kal ka mausam kaisa rahega",
+        "今日の天気はどうですか",
+    ]
+    for sample in samples:
+        start = perf_counter()
+        result = demo.translate(sample)
+        print(f"{DetectLanguage(sample):>3} {(perf_counter() - start) * 1000:6.1f} ms  {sample!r} -> {result!r}")
+    print(GetMetrics()["counters"])
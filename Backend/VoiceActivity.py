@@ -0,0 +1,323 @@
+import threading
+import logging
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from dataclasses import dataclass
+from Backend.AudioCapture import AudioCapture, SAMPLE_RATE, audio_capture
+from Backend.Metrics import IncrementCounter
+
+FRAME_SECONDS = 0.02  # 20 ms analysis frames
+ENERGY_MARGIN_DB = 9.0  # Speech must be this far above the noise floor
+FLOOR_PERCENTILE = 10  # Noise floor: this percentile of recent frame energy
+FLOOR_SECONDS = 3.0
+MAX_ZCR = 0.35  # Higher crossing rates are hiss / fricative-only noise
+MIN_BAND_RATIO = 0.8  # Share of energy in the voice band
+SPEECH_BAND = (80.0, 4000.0)  # From the lowest fundamentals up; 300-3400 Hz missed most frames of low voices
+MIN_SPEECH_FRAMES = 3  # Frames of speech in a row before a segment starts
+HANGOVER_SECONDS = 0.3  # Keep a segment open through short pauses
+PRE_ROLL_SECONDS = 0.3  # Audio before the onset handed to engines fed from the capture ring
+
+@dataclass
+class SpeechSegment:
+    start: float  # Seconds since the first sample fed
+    end: float | None = None  # None while the segment is still open
+
+class VoiceActivityDetector:
+    """Frame-level voice activity detection over energy, zero-crossing rate and band-energy ratio.
+
+    Features for every frame of a buffer are computed in one batched NumPy
+    pass. A frame is voiced when it is loud relative to the adaptive noise
+    floor, not dominated by zero crossings, and has most of its energy in the
+    voice band; segments open after MIN_SPEECH_FRAMES voiced frames and close
+    once HANGOVER_SECONDS pass without one.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, frame_seconds: float = FRAME_SECONDS):
+        self.sample_rate = sample_rate
+        self.frame_size = int(sample_rate * frame_seconds)
+        self.frame_seconds = self.frame_size / sample_rate
+        frequencies = np.fft.rfftfreq(self.frame_size, 1 / sample_rate)
+        self.band = (frequencies >= SPEECH_BAND[0]) & (frequencies <= SPEECH_BAND[1])
+        self.floor_frames = int(FLOOR_SECONDS / self.frame_seconds)
+        self.hangover_frames = int(HANGOVER_SECONDS / self.frame_seconds)
+        self.reset()
+
+    def reset(self) -> None:
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.frames_done = 0
+        self.energy_history = np.zeros(0, dtype=np.float32)
+        self.run_length = 0  # Voiced frames in a row at the end of the last buffer
+        self.last_voiced = -10 ** 9  # Frame index of the last voiced frame
+        self.segment = None
+        self.segments = []
+
+    def features(self, frames: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(energy dB, zero-crossing rate, voice-band energy ratio) per frame."""
+        energy = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (self.frame_size - 1)
+        power = np.abs(np.fft.rfft(frames, axis=1)) ** 2
+        band_ratio = power[:, self.band].sum(axis=1) / (power.sum(axis=1) + 1e-10)
+        return energy, zcr, band_ratio
+
+    def classify(self, frames: np.ndarray) -> np.ndarray:
+        """Raw per-frame voiced flags, before onset and hangover smoothing."""
+        energy, zcr, band_ratio = self.features(frames)
+        # Floor for each frame from the floor_frames before it (and itself), so block size doesn't matter
+        history = np.concatenate([self.energy_history, energy])
+        padded = np.concatenate([np.full(max(0, self.floor_frames - len(history) + len(energy) - 1), history[0]), history])
+        floor = np.percentile(sliding_window_view(padded, self.floor_frames)[-len(energy):], FLOOR_PERCENTILE, axis=1)
+        self.energy_history = history[-self.floor_frames:]
+        return (energy > floor + ENERGY_MARGIN_DB) & (zcr < MAX_ZCR) & (band_ratio > MIN_BAND_RATIO)
+
+    def process(self, samples: np.ndarray) -> tuple[np.ndarray, list[SpeechSegment]]:
+        """Feed samples; returns (per-frame speech flags after smoothing, segments opened or closed)."""
+        buffer = np.concatenate([self.pending, np.asarray(samples, dtype=np.float32)])
+        count = len(buffer) // self.frame_size
+        self.pending = buffer[count * self.frame_size:]
+        if not count:
+            return np.zeros(0, dtype=bool), []
+        voiced = self.classify(buffer[:count * self.frame_size].reshape(count, self.frame_size))
+        index = self.frames_done + np.arange(count)
+        self.frames_done += count
+
+        # Length of the voiced run ending at each frame, continuing the previous buffer's run
+        breaks = np.where(~voiced, np.arange(count), -1)
+        last_break = np.maximum.accumulate(breaks)
+        runs = np.arange(count) - last_break + np.where(last_break < 0, self.run_length, 0)
+        runs[~voiced] = 0
+        self.run_length = int(runs[-1])
+
+        # Frames within the hangover of a voiced frame are "held"; each held run containing
+        # MIN_SPEECH_FRAMES voiced frames in a row is (part of) a speech segment
+        last_voiced = np.maximum.accumulate(np.where(voiced, index, self.last_voiced))
+        held = index - last_voiced <= self.hangover_frames
+        self.last_voiced = int(last_voiced[-1])
+        edges = np.flatnonzero(np.diff(np.concatenate([[False], held, [False]]).astype(np.int8)))
+        confirmed = np.flatnonzero(runs >= MIN_SPEECH_FRAMES)
+
+        changed = []
+        speech = np.zeros(count, dtype=bool)
+        if self.segment is not None and not held[0]:
+            # The hangover ran out exactly at the end of the previous buffer
+            self.segment.end = index[0] * self.frame_seconds
+            changed.append(self.segment)
+            self.segment = None
+        for begin, end in zip(edges[::2], edges[1::2]):
+            if self.segment is None or begin > 0:
+                inside = confirmed[(confirmed >= begin) & (confirmed < end)]
+                if not len(inside):
+                    continue
+                first_frame = index[inside[0]] - MIN_SPEECH_FRAMES + 1
+                self.segment = SpeechSegment(first_frame * self.frame_seconds)
+                self.segments.append(self.segment)
+                changed.append(self.segment)
+                begin = max(begin, inside[0] - MIN_SPEECH_FRAMES + 1)
+            speech[begin:end] = True
+            if end < count:
+                self.segment.end = index[end] * self.frame_seconds
+                if self.segment not in changed:
+                    changed.append(self.segment)
+                self.segment = None
+        return speech, changed
+
+class SpeechGate:
+    """Runs VAD on the live capture stream and lets callers wait for speech before starting recognition.
+
+    wait_for_onset() returns on the first voiced frame, MIN_SPEECH_FRAMES
+    before a segment is confirmed, with the ring position where it was
+    heard; stream() replays the capture ring from just before that point,
+    so an engine fed by the application hears the whole utterance.
+    """
+
+    def __init__(self, capture: AudioCapture):
+        self.capture = capture
+        self.detector = VoiceActivityDetector(capture.sample_rate)
+        self.condition = threading.Condition()
+        self.subscribers = []
+        self.unsubscribe = None
+        self.available = True  # False once the microphone could not be opened; waits then pass straight through
+        self.voiced_blocks = 0  # Capture blocks that contained a voiced frame
+        self.voiced_position = 0  # Ring position of the latest of them
+
+    @property
+    def speaking(self) -> bool:
+        return self.detector.segment is not None
+
+    def start(self) -> None:
+        with self.condition:
+            if self.unsubscribe is not None or not self.available:
+                return
+            try:
+                self.capture.start()
+            except Exception as e:
+                logging.warning(f"Audio capture unavailable ({e}), speech recognition will not be gated")
+                self.available = False
+                return
+            self.unsubscribe = self.capture.subscribe(self._on_audio)
+
+    def _on_audio(self, samples: np.ndarray, start: int) -> None:
+        last_voiced = self.detector.last_voiced
+        _, changed = self.detector.process(samples)
+        voiced = self.detector.last_voiced != last_voiced
+        if not changed and not voiced:
+            return
+        with self.condition:
+            if voiced:
+                self.voiced_blocks += 1
+                self.voiced_position = start
+            self.condition.notify_all()
+            callbacks = list(self.subscribers)
+        for segment in changed:
+            IncrementCounter("vad.segments_closed" if segment.end is not None else "vad.segments_opened")
+            for callback in callbacks:
+                try:
+                    callback(segment)
+                except Exception as e:
+                    logging.error(f"VAD subscriber failed: {e}")
+
+    def subscribe(self, callback):
+        """Call callback(segment) when a speech segment opens (end is None) and again when it closes."""
+        with self.condition:
+            self.subscribers.append(callback)
+        def unsubscribe():
+            with self.condition:
+                if callback in self.subscribers:
+                    self.subscribers.remove(callback)
+        return unsubscribe
+
+    def wait_for_speech(self, timeout: float | None = None) -> bool:
+        """Block until a speech segment is open; False on timeout."""
+        self.start()
+        if not self.available:
+            return True
+        with self.condition:
+            return self.condition.wait_for(lambda: self.speaking, timeout)
+
+    def wait_for_onset(self, timeout: float | None = None) -> int | None:
+        """Block until a voiced frame is heard (or a segment is open); returns its ring position, None on timeout.
+
+        Unconfirmed: follow it with watch_for_silence() to drop onsets that no segment follows.
+        """
+        self.start()
+        if not self.available:
+            return self.capture.ring.position
+        with self.condition:
+            seen = self.voiced_blocks
+            if not self.condition.wait_for(lambda: self.speaking or self.voiced_blocks != seen, timeout):
+                return None
+            return self.voiced_position
+
+    def stream(self, position: int, callback):
+        """Call callback(samples) with captured audio from PRE_ROLL_SECONDS before position on, then live.
+
+        Returns an unsubscribe function. The ring is read while live delivery is held back, and
+        delivery skips what was already passed on, so nothing is repeated or reordered.
+        """
+        lock = threading.Lock()
+        fed = 0  # Ring position up to which audio has been passed on
+
+        def deliver(samples, start):
+            nonlocal fed
+            with lock:
+                samples = samples[max(fed - start, 0):]
+                if len(samples):
+                    fed = max(start, fed) + len(samples)
+                    callback(samples)
+
+        with lock:
+            unsubscribe = self.capture.subscribe(deliver)
+            samples, start = self.capture.ring.read(position - int(PRE_ROLL_SECONDS * self.capture.sample_rate))
+            fed = start + len(samples)
+            callback(samples)
+        return unsubscribe
+
+    def watch_for_silence(self, timeout: float, on_silence):
+        """Call on_silence() unless a speech segment opens within timeout; returns a function ending the watch.
+
+        Used after wait_for_onset(), so a recognizer started on a click or a cough is stopped again.
+        """
+        lock = threading.Lock()
+        stopped = False
+
+        def watch():
+            if self.wait_for_speech(timeout):
+                return
+            with lock:
+                if not stopped:
+                    IncrementCounter("vad.silent_listens")
+                    on_silence()
+
+        def stop():
+            nonlocal stopped
+            with lock:
+                stopped = True
+
+        threading.Thread(target=watch, name="SpeechGateWatch", daemon=True).start()
+        return stop
+
+speech_gate = SpeechGate(audio_capture)
+
+if __name__ == "__main__":
+    # Offline benchmark and accuracy check: python -m Backend.VoiceActivity [recordings | recording.wav labels.csv]
+    # recordings is a directory of real recordings X.wav, each labelled by X.csv with one "start,end" line
+    # (seconds) per speech segment. Without recordings only the speed benchmark runs, on synthetic audio,
+    # which says nothing about accuracy on real speech.
+    import os
+    import sys
+    from time import perf_counter
+    from Backend.AudioCapture import ReadWav
+
+    def Labels(path):
+        with open(path, "r", encoding="utf-8") as file:
+            return [tuple(map(float, line.split(",")[:2])) for line in file if line.strip() and not line.startswith("#")]
+
+    if len(sys.argv) > 2:
+        recordings = [(sys.argv[1], Labels(sys.argv[2]))]
+    elif len(sys.argv) > 1:
+        recordings = [
+            (os.path.join(sys.argv[1], name), Labels(os.path.join(sys.argv[1], name[:-4] + ".csv")))
+            for name in sorted(os.listdir(sys.argv[1]))
+            if name.endswith(".wav") and os.path.exists(os.path.join(sys.argv[1], name[:-4] + ".csv"))
+        ]
+        if not recordings:
+            sys.exit(f"no X.wav + X.csv pairs in {sys.argv[1]}")
+    else:
+        recordings = []
+
+    # Speed: one minute of room noise with harmonic voiced bursts
+    rng = np.random.default_rng(1)
+    t = np.arange(60 * SAMPLE_RATE) / SAMPLE_RATE
+    synthetic = rng.normal(0, 0.003, len(t)) + 0.004 * np.sin(2 * np.pi * 50 * t)
+    for position in np.arange(1.0, 57.0, 3.0):
+        mask = (t >= position) & (t < position + 1.5)
+        synthetic[mask] += 0.05 * sum(np.sin(2 * np.pi * 140 * k * t[mask]) / k for k in range(1, 25))
+    detector = VoiceActivityDetector(SAMPLE_RATE)
+    start = perf_counter()
+    speech, _ = detector.process(synthetic.astype(np.float32))
+    elapsed = perf_counter() - start
+    print(f"{len(speech)} frames in {elapsed * 1000:.1f} ms: {len(speech) / elapsed:,.0f} frames/s (synthetic audio)")
+    if not recordings:
+        print("no labelled recordings given, accuracy not measured")
+        sys.exit()
+
+    totals = np.zeros(4)  # true positives, false negatives, false alarms, true negatives (frames)
+    for path, labels in recordings:
+        samples, rate = ReadWav(path)
+        detector, streamed = VoiceActivityDetector(rate), VoiceActivityDetector(rate)
+        speech, _ = detector.process(samples)
+        for i in range(0, len(samples), 512):
+            streamed.process(samples[i:i + 512])
+        frame_times = np.arange(len(speech)) * detector.frame_seconds
+        truth = np.zeros(len(speech), dtype=bool)
+        for begin, end in labels:
+            truth |= (frame_times >= begin) & (frame_times < end)
+        counts = np.array([np.sum(speech & truth), np.sum(~speech & truth), np.sum(speech & ~truth), np.sum(~speech & ~truth)])
+        totals += counts
+        print(f"{os.path.basename(path):30} recall {counts[0] / max(counts[0] + counts[1], 1) * 100:5.1f}%  "
+              f"false alarms {counts[2] / max(counts[2] + counts[3], 1) * 100:5.1f}%  "
+              f"segments {len(detector.segments)}/{len(labels)}  block-fed match {streamed.segments == detector.segments}")
+    true_positive, false_negative, false_alarm, true_negative = totals
+    print(f"all {len(recordings)} recordings: frame accuracy {(true_positive + true_negative) / totals.sum() * 100:.1f}%, "
+          f"speech recall {true_positive / max(true_positive + false_negative, 1) * 100:.1f}%, "
+          f"false alarms {false_alarm / max(false_alarm + true_negative, 1) * 100:.1f}% of non-speech frames")
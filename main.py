@@ -1,32 +1,53 @@
+from Backend.Startup import startup, LazyAttribute, ImportModule
 from Frontend.GUI import (
     GraphicalUserInterface,
+    AnswerModifier,
+    QueryModifier
+)
+from Backend.StateBus import (
     SetAssistantStatus,
     ShowTextTOScreen,
-    TempDirectoryPath,
     SetMicrophoneStatus,
-    AnswerModifier,
-    QueryModifier,
     GetMicrophoneStatus,
-    GetAssistantStatus
+    GetAssistantStatus,
+    state_bus,
+    DATABASE,
+    RESPONSES,
+    IMAGE_GENERATION,
+    MICROPHONE,
+    STATUS
 )
-from Backend.Model import FirstLayerDMM
-from Backend.RealtimeSearchEngine import RealtimeSearchEngine
-from Backend.Automation import Automation
-from Backend.SpeechToText import SpeechRecognition
-from Backend.Chatbot import ChatBot
-from Backend.TextToSpeech import TextToSpeech
-from Backend.ImageGeneration import GenerateImages
+from Backend.Streaming import SentenceSegmenter
 from dotenv import dotenv_values
-from asyncio import run
-from time import sleep, time, localtime, strftime
-import subprocess
+from Backend.Runtime import runtime
+from Backend.ConversationStore import conversation
+from Backend.Metrics import GetMetrics
+from Backend.AssistantStateMachine import AssistantStateMachine, AssistantHooks, Event
+from time import sleep, localtime, perf_counter
 import threading
-import json
 import os
 import logging
 import sys
-import pyaudio
-import numpy as np
+
+# Heavy backends (API clients, Chrome, pygame, NumPy audio) load on first use or in the startup warm-up
+FirstLayerDMM = LazyAttribute("Backend.Model", "FirstLayerDMM")
+RealtimeSearchEngineStream = LazyAttribute("Backend.RealtimeSearchEngine", "RealtimeSearchEngineStream")
+Automation = LazyAttribute("Backend.Automation", "Automation")
+ChatBotStream = LazyAttribute("Backend.Chatbot", "ChatBotStream")
+SpeechRecognition = LazyAttribute("Backend.SpeechToText", "SpeechRecognition")
+CancelRecognition = LazyAttribute("Backend.SpeechToText", "CancelRecognition")
+ArmRecognition = LazyAttribute("Backend.SpeechToText", "ArmRecognition")
+RecognitionCancelled = LazyAttribute("Backend.SpeechToText", "RecognitionCancelled")
+SpeechBackendUsesMicrophone = LazyAttribute("Backend.SpeechToText", "SpeechBackendUsesMicrophone")
+SpeechBackendCapturesAudio = LazyAttribute("Backend.SpeechToText", "SpeechBackendCapturesAudio")
+FeedRecognition = LazyAttribute("Backend.SpeechToText", "FeedRecognition")
+TextToSpeech = LazyAttribute("Backend.TextToSpeech", "TextToSpeech")
+SentenceSpeaker = LazyAttribute("Backend.TextToSpeech", "SentenceSpeaker")
+clap_detector = LazyAttribute("Backend.AudioCapture", "clap_detector")
+speech_gate = LazyAttribute("Backend.VoiceActivity", "speech_gate")
+image_worker = LazyAttribute("Backend.ImageWorker", "image_worker")
+open_images = LazyAttribute("Backend.ImageGeneration", "open_images")
+startup.mark("main imports done")
 
 # Setup logging
 logging.basicConfig(level=logging.DEBUG, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -37,62 +58,42 @@ Username = env_vars.get("Username", "User")
 Assistantname = env_vars.get("Assistantname", "Assistant")
 DefaultMessage = f'''{Username} 😄: Hello {Assistantname} 🌟, How are you?
 {Assistantname} 🤖: Welcome {Username} 🎉, I am doing well. How may I help you today? 😊'''
-subprocesses = []
 Functions = ["open", "close", "play", "system", "content", "google search", "youtube search", "write", "create presentation"]
 
+# Fixed phrases spoken by the assistant; synthesized ahead of time into the TTS cache
+StaticPhrases = [
+    "Command completed!",
+    "Command failed. Please try again.",
+    "Searching for your query",
+    "Searching in real-time",
+    "Executing image generation",
+    "Image generated!",
+    "Image generation failed. Please retry.",
+    "Waking up. Please wait!",
+    "I'm back and ready to help!",
+    "No activity detected. Entering sleep mode in 5 seconds.",
+    "Now sleeping. Wake me with a clap or voice!",
+    "Goodbye! Shutting down now. Confirm with exit to proceed or say cancel ",
+    "Shutdown cancelled. I'm back!",
+]
+
 # Ensure directories exist
 os.makedirs("Data", exist_ok=True)
 os.makedirs(os.path.join("Frontend", "Files"), exist_ok=True)
 
-# Global variable to track last interaction time
-last_interaction_time = time()
-
-def DetectClap():
-    """Detect clap sound using pyaudio."""
-    CHUNK = 1024
-    RATE = 44100
-    THRESHOLD = 3000  # Adjust this threshold based on your microphone and environment noise
-
-    try:
-        p = pyaudio.PyAudio()
-        stream = p.open(format=pyaudio.paFloat32, channels=1, rate=RATE, input=True, frames_per_buffer=CHUNK)
-        data = np.frombuffer(stream.read(CHUNK, exception_on_overflow=False), dtype=np.float32)
-        stream.stop_stream()
-        stream.close()
-        p.terminate()
-
-        amplitude = np.abs(np.max(data))
-        logging.debug(f"Clap detection: Amplitude = {amplitude}, Threshold = {THRESHOLD}")
-        return amplitude > THRESHOLD
-    except Exception as e:
-        logging.error(f"Error in clap detection: {e}")
-        return False
+INACTIVITY_TIMEOUT = 60  # Seconds without a query before sleeping
+SPEECH_WAIT = 5  # Seconds to wait for voice activity before re-arming the listen
+SPEECH_CONFIRM = 0.5  # Seconds after an onset for the VAD to confirm speech, else the recognizer is stopped
+LISTEN_TIMEOUT = 10  # Seconds the recognizer may take to produce a transcript once speech starts
+recognition_lock = threading.Lock()  # One recognition at a time; an abandoned listen may still be running
 
 def ShowDefaultChatIfNOChats():
-    chat_log_path = r"Data\ChatLog.json"
-    try:
-        with open(chat_log_path, "r", encoding='utf-8') as file:
-            if len(file.read()) < 5:
-                with open(TempDirectoryPath('Database.data'), 'w', encoding='utf-8') as file:
-                    file.write("")
-                with open(TempDirectoryPath('Responses.data'), 'w', encoding='utf-8') as file:
-                    file.write(DefaultMessage)
-    except FileNotFoundError:
-        with open(chat_log_path, "w", encoding='utf-8') as file:
-            json.dump([], file)
-        with open(TempDirectoryPath('Database.data'), 'w', encoding='utf-8') as file:
-            file.write("")
-        with open(TempDirectoryPath('Responses.data'), 'w', encoding='utf-8') as file:
-            file.write(DefaultMessage)
+    if len(conversation) == 0:
+        state_bus.set(DATABASE, "")
+        state_bus.set(RESPONSES, DefaultMessage)
 
 def ReadChatLogJson():
-    chat_log_path = r"Data\ChatLog.json"
-    try:
-        with open(chat_log_path, 'r', encoding='utf-8') as file:
-            chat_log_data = json.load(file)
-        return chat_log_data
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
+    return conversation.messages
 
 def ChatLogIntegration():
     json_data = ReadChatLogJson()
@@ -104,20 +105,17 @@ def ChatLogIntegration():
             formatted_chatlog += f"Assistant: {entry['content']} 🌟\n"
     formatted_chatlog = formatted_chatlog.replace("User", Username + " ")
     formatted_chatlog = formatted_chatlog.replace("Assistant", Assistantname + " ")
-    with open(TempDirectoryPath('Database.data'), 'w', encoding='utf-8') as file:
-        file.write(AnswerModifier(formatted_chatlog))
+    state_bus.set(DATABASE, AnswerModifier(formatted_chatlog))
 
 def ShowChatsOnGUI():
-    with open(TempDirectoryPath('Database.data'), 'r', encoding='utf-8') as file:
-        Data = file.read()
+    Data = state_bus.get(DATABASE)
     if len(str(Data)) > 0:
         lines = Data.split('\n')
         result = '\n'.join(lines)
-        with open(TempDirectoryPath('Responses.data'), 'w', encoding='utf-8') as file:
-            file.write(result)
+        state_bus.set(RESPONSES, result)
 
 def GreetUserByTime():
-    """Greet the user based on the current time with a smooth transition."""
+    """Greet the user based on the current time."""
     current_hour = localtime().tm_hour
     if 5 <= current_hour < 12:
         greeting = f"Good morning Boss! I'm excited to assist you today!"
@@ -127,48 +125,56 @@ def GreetUserByTime():
         greeting = f"Good evening Boss! I'm here to help you unwind or work tonight!"
     ShowTextTOScreen(f"{Assistantname} 🤖: {greeting}")
     TextToSpeech(greeting)
-    sleep(1)  # Smooth transition after greeting
 
 def CheckSystem():
-    """Check the status of backend, frontend, and data components with progress feedback."""
-    components = [("Backend", os.path.isdir("Backend")), ("Frontend", os.path.isdir("Frontend")), ("Data", os.path.isdir("Data"))]
-    for component, exists in components:
-        ShowTextTOScreen(f"{Assistantname} 🤖: Checking {component}... 🔍")
-        sleep(0.5)  # Simulate check delay for smooth feedback
-        if not exists:
+    """Check the status of backend, frontend, and data components."""
+    ShowTextTOScreen(f"{Assistantname} 🤖: Checking components... 🔍")
+    for component in ["Backend", "Frontend", "Data"]:
+        if not os.path.isdir(component):
             logging.error(f"{component} directory not found! 😞")
             ShowTextTOScreen(f"{Assistantname}: Error - {component} directory missing! 🚫")
             TextToSpeech(f"Error - {component} directory missing")
             return False
     logging.info("System components checked successfully. ✅")
-    TextToSpeech("System components checked successfully.")
     return True
 
+def PrewarmSpeech():
+    ImportModule("Backend.SpeechToText").recognizer.start()
+
+def PrewarmAudio():
+    speech_gate.start()
+
+def PrewarmVoice():
+    TextToSpeechModule = ImportModule("Backend.TextToSpeech")
+    TextToSpeechModule.PrewarmAudioCache(StaticPhrases + TextToSpeechModule.responses).result()
+
+def RegisterWarmUps():
+    """Independent warm-ups run in parallel; the required ones gate readiness to listen."""
+    startup.add("audio", PrewarmAudio, required=True)
+    startup.add("speech", PrewarmSpeech)
+    startup.add("voice", PrewarmVoice)
+    startup.add("apps", lambda: ImportModule("Backend.AppIndex").app_index.refresh())
+    for module in ["Backend.Model", "Backend.Chatbot", "Backend.RealtimeSearchEngine", "Backend.Automation"]:
+        startup.add(module.split(".")[-1].lower(), lambda module=module: ImportModule(module))
+
 def InitialExecution():
-    global last_interaction_time
     ShowTextTOScreen(f"{Assistantname} 🤖: System initializing... 🔄")
-    TextToSpeech("System initializing")
-    sleep(1)  # Initial delay for a smooth start
+    RegisterWarmUps()
+    startup.start()
 
-    if CheckSystem():
-        ShowTextTOScreen(f"{Assistantname} 🤖: System ready! 🎉")
-        TextToSpeech("System ready to roll")
-        sleep(0.5)  # Pause before greeting
-    else:
+    if not CheckSystem():
         ShowTextTOScreen(f"{Assistantname} 🤖: System initialization failed. Please fix issues and restart. 😞")
         TextToSpeech("System initialization failed. Please fix issues and restart.")
-        sleep(2)  # Give user time to read error
         sys.exit(1)
 
     SetMicrophoneStatus("False")
     ShowDefaultChatIfNOChats()
     ChatLogIntegration()
     ShowChatsOnGUI()
-    GreetUserByTime()  # Personalized greeting
+    threading.Thread(target=GreetUserByTime, name="Greeting", daemon=True).start()  # Speaks while we finish starting
+    startup.wait()
     SetAssistantStatus("Available... ✅")
-    last_interaction_time = time()  # Set initial interaction time
-
-InitialExecution()
+    startup.mark("ready to listen")
 
 def ShutdownAssistant():
     """Graceful shutdown with user confirmation."""
@@ -178,32 +184,56 @@ def ShutdownAssistant():
     TextToSpeech("Goodbye! Shutting down now. Confirm with exit to proceed or say cancel ")
     sleep(3)  # Wait for user response
     if SpeechRecognition().lower() == "exit":
-        for p in subprocesses:
-            if p.poll() is None:
-                p.terminate()
-                try:
-                    p.wait(timeout=5)
-                except subprocess.TimeoutExpired:
-                    p.kill()
+        image_worker.stop()
         sys.exit(0)
     else:
         SetAssistantStatus("Available... ✅")
         ShowTextTOScreen(f"{Assistantname}: Shutdown cancelled. I'm back! 😄")
         TextToSpeech("Shutdown cancelled. I'm back!")
 
-def EnterSleepMode():
-    """Enter sleep mode with a smooth transition."""
-    global last_interaction_time
+def EnterSleepMode(asleep):
+    """Enter sleep mode with a smooth transition; stops as soon as asleep() says we were woken meanwhile."""
     ShowTextTOScreen(f"{Assistantname} 🤖: No activity detected. Entering sleep mode in 5 seconds... 🌙")
     TextToSpeech("No activity detected. Entering sleep mode in 5 seconds.")
     for i in range(5, 0, -1):
+        if not asleep():
+            return
         ShowTextTOScreen(f"{Assistantname} 🤖: Sleeping in {i}... 😴")
         sleep(1)
-    SetMicrophoneStatus("False")
+    if not asleep(lambda: SetMicrophoneStatus("False")):
+        return  # Woken during the countdown; leave the mic on
     SetAssistantStatus("Sleeping... 😴")
     ShowTextTOScreen(f"{Assistantname}: Now sleeping. Wake me with a clap or voice! 🌙")
     TextToSpeech("Now sleeping. Wake me with a clap or voice!")
-    last_interaction_time = time()
+
+def WaitForWake(token=None):
+    """Block until a clap or speech is heard, or the wait is cancelled (e.g. the mic was switched on).
+
+    token comes from clap_detector.arm(); a cancel since then makes this return False at once.
+    Speech is detected by the VAD on the same capture stream, so no recognizer runs while
+    asleep; the first speech segment ends the clap wait the way a cancel would.
+    """
+    voice = threading.Event()
+
+    def on_segment(segment):
+        if segment.end is None and not voice.is_set():
+            voice.set()
+            clap_detector.cancel()
+
+    unsubscribe = speech_gate.subscribe(on_segment)
+    try:
+        speech_gate.start()
+        if clap_detector.wait(token=token):
+            logging.info("Clap detected! Waking up...")
+            return True
+        if voice.is_set():
+            logging.info("Voice detected! Waking up...")
+            return True
+    except Exception as e:
+        logging.error(f"Error during wake check: {e}")
+    finally:
+        unsubscribe()
+    return False
 
 def WakeFromSleep():
     """Wake from sleep with a smooth transition."""
@@ -215,20 +245,79 @@ def WakeFromSleep():
     ShowTextTOScreen(f"{Assistantname}: I'm back and ready to help! 😄👏")
     TextToSpeech("I'm back and ready to help!")
 
-def MainExecution():
-    global last_interaction_time
+def ReportImageJob(job):
+    """Tell the user how a background image job ended."""
+    if not job.completed.is_set():
+        return
+    state_bus.set(IMAGE_GENERATION, f"{job.prompt},False")
+    if job.status == "done":
+        ShowTextTOScreen(f"{Assistantname}: Image generated! 🎉")
+        TextToSpeech("Image generated!")
+        open_images(job.paths)
+    elif job.status == "failed":
+        logging.error(f"Image job {job.id} failed: {job.error}")
+        ShowTextTOScreen(f"{Assistantname}: Image generation failed. Retry? 😞")
+        TextToSpeech("Image generation failed. Please retry.")
+
+image_jobs_subscribed = False
+
+def SubmitImageJob(prompts):
+    global image_jobs_subscribed
+    if not image_jobs_subscribed:
+        image_worker.subscribe(lambda job: threading.Thread(target=ReportImageJob, args=(job,), daemon=True).start())
+        image_jobs_subscribed = True
+    return image_worker.submit(*prompts)
+
+def StreamAnswer(tokens, emoji):
+    """Show and speak each sentence of a streamed answer as soon as it is complete."""
+    segmenter = SentenceSegmenter()
+    speaker = SentenceSpeaker()
+    answer = ""
+    SetAssistantStatus("Answering... 💬")
+    for token in tokens:
+        answer += token
+        answer = answer.replace("</s>", "")  # Stripped from the whole answer; the marker can be split over tokens
+        for sentence in segmenter.feed(token):
+            ShowTextTOScreen(f"{Assistantname}: {AnswerModifier(answer)}")
+            speaker.speak(sentence)
+    for sentence in segmenter.flush():
+        speaker.speak(sentence)
+    ShowTextTOScreen(f"{Assistantname}: {AnswerModifier(answer)} {emoji}")
+    speaker.finish()
+    return answer
+
+def ListenForQuery(token=None):
+    """token from ArmRecognition(); a CancelRecognition() since then, even one sent while this waited
+    for the lock or the VAD gate, makes the recognizer return "" at once."""
+    with recognition_lock:
+        if token is None:
+            token = ArmRecognition()
+        elif RecognitionCancelled(token):
+            return ""
+        SetAssistantStatus("Listening... 👂")
+        if not SpeechBackendUsesMicrophone():
+            return SpeechRecognition(LISTEN_TIMEOUT, token)
+        # The recognizer only runs once the VAD hears speech. It starts on the first voiced frame, not the
+        # confirmed segment, and engines fed by the app also get the pre-roll from the capture ring
+        onset = speech_gate.wait_for_onset(SPEECH_WAIT)
+        if onset is None:
+            return ""
+        stop_watch = speech_gate.watch_for_silence(SPEECH_CONFIRM, CancelRecognition)
+        stop_feed = None if SpeechBackendCapturesAudio() else speech_gate.stream(onset, FeedRecognition)
+        try:
+            return SpeechRecognition(LISTEN_TIMEOUT, token)
+        finally:
+            stop_watch()
+            if stop_feed is not None:
+                stop_feed()
+
+def HandleQuery(Query):
     TaskExecution = False
     ImageExecution = False
     PresentationExecution = False
-    ImageGenerationQuery = ""
+    ImageGenerationQueries = []
     PresentationDetails = {"topic": "", "presenter": "", "date": "", "company_name": "Your Company Name Here"}
 
-    SetAssistantStatus("Listening... 👂")
-    Query = SpeechRecognition()
-    if Query:
-        last_interaction_time = time()
-        if GetAssistantStatus() == "Sleeping... 😴":
-            WakeFromSleep()
     ShowTextTOScreen(f"{Username}: {Query} 😄")
     SetAssistantStatus("Thinking... 🤔")
     Decision = FirstLayerDMM(Query)
@@ -244,7 +333,7 @@ def MainExecution():
 
     for queries in Decision:
         if "generate image" in queries:
-            ImageGenerationQuery = queries.replace("generate image ", "")
+            ImageGenerationQueries.append(queries.replace("generate image ", ""))
             ImageExecution = True
         elif "create presentation" in queries:
             parts = queries.replace("create presentation ", "").split()
@@ -262,30 +351,20 @@ def MainExecution():
     if ImageExecution:
         ShowTextTOScreen(f"{Assistantname} 🤖: Executing image generation... 🎨")
         TextToSpeech("Executing image generation")
-        with open(r"Frontend\Files\ImageGeneration.data", 'w') as file:
-            file.write(f"{ImageGenerationQuery}, True")
+        state_bus.set(IMAGE_GENERATION, f"{'; '.join(ImageGenerationQueries)}, True")
         try:
-            p1 = subprocess.Popen(
-                ['python', r'Backend\ImageGeneration.py'],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                stdin=subprocess.PIPE,
-                shell=False
-            )
-            subprocesses.append(p1)
-            sleep(1)
+            # Every prompt of the turn goes to the image worker as one batch; ReportImageJob announces the result
+            SubmitImageJob(ImageGenerationQueries)
             SetAssistantStatus("Available... ✅")
-            ShowTextTOScreen(f"{Assistantname}: Image generated! 🎉")
-            TextToSpeech("Image generated!")
         except Exception as e:
-            logging.error(f"Error starting ImageGeneration.py: {e}")
+            logging.error(f"Error submitting image job: {e}")
             ShowTextTOScreen(f"{Assistantname}: Image generation failed. Retry? 😞")
             TextToSpeech("Image generation failed. Please retry.")
         return True
 
     if TaskExecution:
         SetAssistantStatus("Executing... 🚀")
-        success = run(Automation(Decision))
+        success = runtime.run(Automation(Decision))
         SetAssistantStatus("Available... ✅")
         if success:
             ShowTextTOScreen(f"{Assistantname}: Command completed! 🎉")
@@ -299,67 +378,152 @@ def MainExecution():
         SetAssistantStatus("Searching... 🔍")
         ShowTextTOScreen(f"{Assistantname} 🤖: Searching for your query... 🔍")
         TextToSpeech("Searching for your query")
-        Answer = RealtimeSearchEngine(QueryModifier(Merged_query))
-        ShowTextTOScreen(f"{Assistantname}: {Answer} 🌐")
-        SetAssistantStatus("Answering... 💬")
-        TextToSpeech(Answer)
+        StreamAnswer(RealtimeSearchEngineStream(QueryModifier(Merged_query)), "🌐")
         return True
 
     for Queries in Decision:
         if "general" in Queries:
             SetAssistantStatus("Thinking... 🤔")
             QueryFinal = Queries.replace("general ", "")
-            Answer = ChatBot(QueryModifier(QueryFinal))
-            ShowTextTOScreen(f"{Assistantname}: {Answer} 🌟")
-            SetAssistantStatus("Answering... 💬")
-            TextToSpeech(Answer)
+            StreamAnswer(ChatBotStream(QueryModifier(QueryFinal), cacheable=True), "🌟")
             return True
         elif "realtime" in Queries:
             SetAssistantStatus("Searching... 🔍")
             ShowTextTOScreen(f"{Assistantname} 🤖: Searching in real-time... 🔍")
             TextToSpeech("Searching in real-time")
             QueryFinal = Queries.replace("realtime ", "")
-            Answer = ChatBot(QueryModifier(QueryFinal))
-            ShowTextTOScreen(f"{Assistantname}: {Answer} 🌐")
-            SetAssistantStatus("Answering... 💬")
-            TextToSpeech(Answer)
+            StreamAnswer(ChatBotStream(QueryModifier(QueryFinal)), "🌐")
             return True
         elif "exit" in Queries:
             ShutdownAssistant()
             return True
 
+def MainExecution():
+    return HandleQuery(ListenForQuery())
+
+def ShowAvailable():
+    AIStatus = GetAssistantStatus()
+    if "Available..." not in AIStatus and "Sleeping..." not in AIStatus:
+        SetAssistantStatus("Available... ✅")
+
+class MainHooks(AssistantHooks):
+    arm_listen = staticmethod(lambda: ArmRecognition())
+    listen = staticmethod(ListenForQuery)
+    cancel_listen = staticmethod(lambda: CancelRecognition())
+    handle = staticmethod(HandleQuery)
+    enter_sleep = staticmethod(EnterSleepMode)
+    wake = staticmethod(WakeFromSleep)
+    arm_wake = staticmethod(lambda: clap_detector.arm())
+    wait_for_wake = staticmethod(WaitForWake)
+    cancel_wake = staticmethod(lambda: clap_detector.cancel())
+    idle = staticmethod(ShowAvailable)
+
+assistant = AssistantStateMachine(MainHooks(), INACTIVITY_TIMEOUT)
+state_bus.subscribe(MICROPHONE, lambda key, on: assistant.post(Event.MIC_ON if on else Event.MIC_OFF))
+state_bus.subscribe(STATUS, lambda key, status: status.startswith("Answering") and assistant.post(Event.ANSWER_STARTED))
+
 def FirstThread():
-    global last_interaction_time
-    while True:
-        CurrentStatus = GetMicrophoneStatus()
-        current_time = time()
-        if CurrentStatus == "True" and (current_time - last_interaction_time) > 60:
-            EnterSleepMode()
-        elif CurrentStatus == "False" and GetAssistantStatus() == "Sleeping... 😴":
-            try:
-                if DetectClap():
-                    logging.info("Clap detected! Waking up...")
-                    WakeFromSleep()
-                    last_interaction_time = time()
-                elif (current_time - last_interaction_time) <= 60 and SpeechRecognition():
-                    logging.info("Voice detected! Waking up...")
-                    WakeFromSleep()
-                    last_interaction_time = time()
-            except Exception as e:
-                logging.error(f"Error during wake check: {e}")
-                sleep(0.1)  # Avoid tight loop on error
-        elif CurrentStatus == "True":
-            MainExecution()
-        else:
-            AIStatus = GetAssistantStatus()
-            if "Available..." not in AIStatus and "Sleeping..." not in AIStatus:
-                SetAssistantStatus("Available... ✅")
-            sleep(0.1)
+    assistant.start()
+    if GetMicrophoneStatus() == "True":
+        assistant.post(Event.MIC_ON)
 
 def SecondThread():
     GraphicalUserInterface()
 
+# Queries replayed by --load-test when no manifest is given; none of them is an automation command
+LoadTestQueries = [
+    "what is the capital of france",
+    "tell me a joke",
+    "how does a transformer model work",
+    "who is the prime minister of india",
+    "tell me about black holes",
+    "what is the weather today",
+    "explain recursion with an example",
+    "who won the last world cup",
+]
+
+# Canned answer streamed by the offline stand-ins for the chat and search models
+OfflineAnswerText = "This is a stand-in answer from the offline load test. No model or search API was called for it."
+
+def OfflineDecision(prompt):
+    """Stand-in for FirstLayerDMM: the local rules and n-gram model only, never the remote model."""
+    decision, confidence = ImportModule("Backend.IntentClassifier").ClassifyIntent(prompt)
+    return decision or [f"general {prompt}"]
+
+def OfflineAnswer(query, *args, **kwargs):
+    """Stand-in for ChatBotStream and RealtimeSearchEngineStream."""
+    for word in OfflineAnswerText.split(" "):
+        yield word + " "
+
+async def OfflineAudio(text):
+    """Stand-in for TextToAudio; the load test mutes the player, so no audio is needed."""
+    return b""
+
+async def DryRunAutomation(commands, timeout=None):
+    logging.info(f"Load test: skipped automation {commands}")
+    return True
+
+def DryRunImageJob(prompts):
+    logging.info(f"Load test: skipped image generation {prompts}")
+
+def LoadTest(turns, manifest=None, speed=0.0, offline=False):
+    """Push replayed utterances through MainExecution and report turn throughput and latency.
+
+    Automation and image generation never run: a replayed "open notepad" would
+    open real windows on every turn. offline also swaps the decision model, the
+    chat and search models and speech synthesis for local stand-ins, so the
+    numbers measure the assistant's own overhead without calling Groq, Cohere,
+    Google or edge_tts.
+    """
+    global Automation, SubmitImageJob, FirstLayerDMM, ChatBotStream, RealtimeSearchEngineStream
+    Automation, SubmitImageJob = DryRunAutomation, DryRunImageJob
+    if offline:
+        FirstLayerDMM, ChatBotStream, RealtimeSearchEngineStream = OfflineDecision, OfflineAnswer, OfflineAnswer
+        ImportModule("Backend.TextToSpeech").TextToAudio = OfflineAudio
+    SpeechToText = ImportModule("Backend.SpeechToText")
+    utterances = SpeechToText.LoadReplayManifest(manifest) if manifest else [(query, None) for query in LoadTestQueries]
+    SpeechToText.SetSpeechBackend(SpeechToText.ReplayRecognizer(utterances, speed, loop=True))
+    ImportModule("Backend.AudioPlayer").player.muted = True
+    latencies = []
+    start = perf_counter()
+    for _ in range(turns):
+        turn_start = perf_counter()
+        try:
+            MainExecution()
+        except Exception as e:
+            logging.error(f"Load test turn failed: {e}")
+        latencies.append(perf_counter() - turn_start)
+    elapsed = perf_counter() - start
+    latencies.sort()
+    print(f"{turns} turns in {elapsed:.1f} s: {turns / elapsed:.2f} turns/s")
+    print(f"turn latency p50 {latencies[len(latencies) // 2]:.3f} s, "
+          f"p95 {latencies[int(len(latencies) * 0.95)]:.3f} s, max {latencies[-1]:.3f} s")
+    for kind, table in GetMetrics().items():
+        for name, value in sorted(table.items()):
+            print(f"  {kind[:-1]} {name}: {value}")
+
 if __name__ == "__main__":
+    if "--load-test" in sys.argv:
+        # python main.py --load-test [turns] [manifest.csv|directory] [--speed N] [--offline]; either positional may be left out
+        import argparse
+        parser = argparse.ArgumentParser(prog="main.py --load-test")
+        parser.add_argument("inputs", nargs="*", metavar="turns | manifest")
+        parser.add_argument("--speed", type=float, default=0.0)
+        parser.add_argument("--offline", action="store_true", help="use local stand-ins for the LLM, search and TTS backends")
+        options = parser.parse_args(sys.argv[sys.argv.index("--load-test") + 1:])
+        turns = [value for value in options.inputs if value.isdigit() and not os.path.exists(value)]
+        manifests = [value for value in options.inputs if value not in turns]
+        if len(turns) > 1 or len(manifests) > 1:
+            parser.error("expected at most one turn count and one manifest")
+        LoadTest(int(turns[0]) if turns else 1000, manifests[0] if manifests else None, options.speed, options.offline)
+        sys.exit(0)
+    InitialExecution()
+    if "--startup-profile" in sys.argv:
+        # Let the optional warm-ups finish too, then show where the time went
+        startup.wait(list(startup.tasks))
+        startup.mark("all warm-ups done")
+        print(startup.report())
+        sys.exit(0)
     thread1 = threading.Thread(target=FirstThread, daemon=True)
     thread1.start()
     SecondThread()
\ No newline at end of file